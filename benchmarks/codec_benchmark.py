@@ -0,0 +1,116 @@
+"""
+Compares the ways Will can serialize what goes over pubsub and into storage, on
+the kind of events a Slack message produces.
+
+    python benchmarks/codec_benchmark.py [--encrypt]
+"""
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from will import settings  # noqa
+settings.SECRET_KEY = "benchmark-secret-key"
+settings.ENABLE_INTERNAL_ENCRYPTION = "--encrypt" in sys.argv
+
+from will.abstractions import Channel, Event, Message, Person  # noqa
+from will.mixins.encryption import EncryptionMixin  # noqa
+
+NUMBER = 2000
+
+
+def slack_event():
+    people = {}
+    for i in range(0, 8):
+        people["U%s" % i] = Person(
+            id="U%s" % i,
+            handle="person%s" % i,
+            mention_handle="<@U%s>" % i,
+            source={"id": "U%s" % i, "name": "person%s" % i, "tz": "America/New_York", "is_admin": False},
+            name="Person %s" % i,
+            first_name="Person",
+            timezone="America/New_York",
+        )
+    channel = Channel(
+        id="C1",
+        name="general",
+        source={"id": "C1", "name": "general", "is_channel": True},
+        members=people,
+    )
+    message = Message(
+        content="@will what's the weather like in Boston?",
+        type="message.incoming",
+        is_direct=True,
+        is_private_chat=False,
+        is_group_chat=True,
+        backend="will.backends.io_adapters.slack",
+        sender=people["U1"],
+        channel=channel,
+        will_is_mentioned=True,
+        will_said_it=False,
+        backend_supports_acl=True,
+        original_incoming_event={
+            "type": "message",
+            "channel": "C1",
+            "user": "U1",
+            "text": "<@U0> what's the weather like in Boston?",
+            "ts": "1510000000.000100",
+            "source_team": "T1",
+            "team": "T1",
+        },
+    )
+    return Event(type="message.incoming", data=message)
+
+
+def legacy_dumps(codec, obj):
+    return codec.encrypt(obj)
+
+
+def legacy_loads(codec, value):
+    return codec.decrypt(value)
+
+
+def main():
+    # The old decrypt_from_b64 warns on every unencrypted value.
+    logging.getLogger().setLevel(logging.ERROR)
+    event = slack_event()
+    rows = []
+
+    legacy = EncryptionMixin()
+    value = legacy_dumps(legacy, event)
+    if value is None:
+        print("Skipping dill+base64, it failed to encrypt.")
+    else:
+        rows.append((
+            "dill+base64 (old)",
+            len(value),
+            timeit.timeit(lambda: legacy_dumps(legacy, event), number=NUMBER),
+            timeit.timeit(lambda: legacy_loads(legacy, value), number=NUMBER),
+        ))
+
+    for backend in ["pickle", "msgpack", "dill"]:
+        settings.SERIALIZATION_BACKEND = backend
+        for binary_safe in [True, False]:
+            codec = EncryptionMixin()
+            codec.binary_safe = binary_safe
+            try:
+                value = codec.encode(event)
+            except ImportError:
+                print("Skipping %s, it isn't installed." % backend)
+                break
+            rows.append((
+                "%s%s" % (backend, "" if binary_safe else " (text)"),
+                len(value),
+                timeit.timeit(lambda: codec.encode(event), number=NUMBER),
+                timeit.timeit(lambda: codec.decode(value), number=NUMBER),
+            ))
+
+    print("%-20s %8s %12s %12s" % ("codec", "bytes", "dumps ns/op", "loads ns/op"))
+    for name, size, dump_time, load_time in rows:
+        print("%-20s %8d %12d %12d" % (name, size, dump_time * 1e9 / NUMBER, load_time * 1e9 / NUMBER))
+
+
+if __name__ == "__main__":
+    main()
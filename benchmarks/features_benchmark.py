@@ -0,0 +1,71 @@
+"""
+Measures the CPU time spent preparing a message's text for RegexBackend, FuzzyBestMatch
+and FuzzyAllMatchesBackend when each does it for itself, against the features analysis
+doing it once for all three.
+
+Matching the listeners costs the same either way, so it's left out.  With a few hundred
+listeners, fuzzy scoring takes milliseconds a message, and swamps the difference.
+
+    python benchmarks/features_benchmark.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from will.backends.analysis.features import message_features  # noqa
+from will.backends.generation.fuzzy_index import process_query  # noqa
+from will.backends.generation.listener_index import fold_case  # noqa
+from listener_index_benchmark import MESSAGES  # noqa
+
+NUMBER = 2000
+REPEAT = 5
+
+try:
+    cpu_time = time.process_time
+except AttributeError:
+    # Python 2
+    cpu_time = time.clock
+
+
+def separate(content):
+    # RegexBackend: the first word, for @commands, and the case-folded text, for the listener index.
+    content.split(None, 1)
+    fold_case(content)
+    # Each fuzzy backend: the processed query, and the case-folded text, for the regex windows.
+    for backend in range(0, 2):
+        process_query(content)
+        fold_case(content)
+
+
+def shared(content):
+    message_features(content)
+
+
+def best_time(fn, messages):
+    best = None
+    for repeat in range(0, REPEAT):
+        start = cpu_time()
+        for i in range(0, NUMBER):
+            for m in messages:
+                fn(m)
+        took = cpu_time() - start
+        if best is None or took < best:
+            best = took
+    return best * 1e6 / (NUMBER * len(messages))
+
+
+def main():
+    print("%14s %18s %18s %16s" % ("messages", "separate us/msg", "shared us/msg", "saved us/msg"))
+    for label, messages in [
+        ("chat", MESSAGES),
+        ("long pastes", [" ".join(MESSAGES) * 4]),
+    ]:
+        separate_time = best_time(separate, messages)
+        shared_time = best_time(shared, messages)
+        print("%14s %18.1f %18.1f %16.1f" % (label, separate_time, shared_time, separate_time - shared_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares fuzz_process.extract over every listener pattern with FuzzyChoiceIndex.extract,
+as the number of listeners grows.
+
+    python benchmarks/fuzzy_index_benchmark.py
+"""
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fuzzywuzzy import process as fuzz_process  # noqa
+
+from will.backends.generation.fuzzy_index import FuzzyChoiceIndex  # noqa
+from listener_index_benchmark import MESSAGES, listeners  # noqa
+
+NUMBER = 20
+CUTOFF = 91
+
+
+def main():
+    logging.getLogger().setLevel(logging.ERROR)
+    print("%10s %16s %16s %8s" % ("listeners", "extract ns/msg", "indexed ns/msg", "speedup"))
+    for count in [10, 50, 100, 250, 500, 1000]:
+        ls = listeners(count)
+        for l in ls.values():
+            l["regex_pattern"] = l["regex"].pattern[len("(?i)"):]
+        choices = []
+        for l in ls.values():
+            if l["regex_pattern"] not in choices:
+                choices.append(l["regex_pattern"])
+        index = FuzzyChoiceIndex(ls)
+
+        def extract_all():
+            return [[r for r in fuzz_process.extract(m, choices) if r[1] >= CUTOFF] for m in MESSAGES]
+
+        def extract_indexed():
+            return [[(l["regex_pattern"], s) for l, s in index.extract(m, score_cutoff=CUTOFF)] for m in MESSAGES]
+
+        assert extract_all() == extract_indexed()
+        all_time = timeit.timeit(extract_all, number=NUMBER)
+        indexed_time = timeit.timeit(extract_indexed, number=NUMBER)
+        runs = NUMBER * len(MESSAGES)
+        print("%10d %16d %16d %7.1fx" % (
+            count, all_time * 1e9 / runs, indexed_time * 1e9 / runs, all_time / indexed_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
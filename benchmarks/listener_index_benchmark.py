@@ -0,0 +1,80 @@
+"""
+Compares running every listener's regex against a message with running only the
+candidates the ListenerIndex picks, as the number of listeners grows.
+
+    python benchmarks/listener_index_benchmark.py
+"""
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from will.backends.generation.listener_index import ListenerIndex  # noqa
+
+NUMBER = 200
+
+TEMPLATES = [
+    "^%s$",
+    "^%s (?P<arg>.*)$",
+    "(?:can |will you )?%s(?: for me)?",
+    "^(?:please )?%s (?P<first>\\w+) (?P<second>.*)",
+    "\\b%ss?\\b",
+]
+
+WORDS = [
+    "deploy", "phone", "birthday", "setlist", "teams", "checkin", "standup", "lunch", "weather",
+    "remind", "status", "ticket", "oncall", "release", "rollback", "coffee", "karma", "poll",
+]
+
+MESSAGES = [
+    "hey, did anyone see the game last night?",
+    "I'll be a few minutes late to the meeting",
+    "lol that's great",
+    "can you review my PR when you get a chance?",
+    "what's the weather like in boston",
+    "deploy web to production",
+    "thanks everyone!",
+    "is the build broken again",
+]
+
+
+def listeners(count):
+    random.seed(count)
+    ls = {}
+    for i in range(0, count):
+        word = "%s%s" % (random.choice(WORDS), i // len(WORDS) or "")
+        pattern = random.choice(TEMPLATES) % word
+        ls["plugin%s.fn" % i] = {"regex": re.compile("(?i)%s" % pattern)}
+    return ls
+
+
+def scan_all(ls, message):
+    return [name for name, l in ls.items() if l["regex"].search(message)]
+
+
+def scan_candidates(ls, index, message):
+    candidates = index.candidates(message)
+    return [name for name, l in ls.items() if name in candidates and l["regex"].search(message)]
+
+
+def main():
+    print("%10s %16s %16s %8s" % ("listeners", "all ns/msg", "indexed ns/msg", "speedup"))
+    for count in [10, 50, 100, 250, 500, 1000]:
+        ls = listeners(count)
+        index = ListenerIndex(ls)
+        for m in MESSAGES:
+            assert scan_all(ls, m) == scan_candidates(ls, index, m)
+
+        all_time = timeit.timeit(lambda: [scan_all(ls, m) for m in MESSAGES], number=NUMBER)
+        indexed_time = timeit.timeit(lambda: [scan_candidates(ls, index, m) for m in MESSAGES], number=NUMBER)
+        runs = NUMBER * len(MESSAGES)
+        print("%10d %16d %16d %7.1fx" % (
+            count, all_time * 1e9 / runs, indexed_time * 1e9 / runs, all_time / indexed_time
+        ))
+
+
+if __name__ == "__main__":
+    main()
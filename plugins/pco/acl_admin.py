@@ -1,12 +1,12 @@
 from will.plugin import WillPlugin
-from will.decorators import respond_to, hear
+from will.decorators import command, respond_to, hear
 from plugins.pco import msg_attachment, authenticate
 from will import settings
 from will.acl import get_acl_members
 
 
 class AclAdmin(WillPlugin):
-    @respond_to("(?:show | )?(!acl)(?P<acl_list>.*?(?=(?:\?)|$))", acl=["botadmin"])
+    @command("!acl", args=["acl_list"], stop_at="?", direct_mentions_only=True, acl=["botadmin"])
     def acl_lookup(self, message, acl_list):
         """!acl: lists the users who can adminster this bot"""
         msg = ""
@@ -26,9 +26,14 @@ class AclAdmin(WillPlugin):
 
         self.reply("Here are all the access control lists I have:", message=message, attachments=attachment.slack())
 
-    @respond_to("(?:Can I |do I have )?(!apps|access |!app)(?P<app>.*?(?=(?:\?)|$))")
-    def app_lookup(self, message, app):
+    @command("!apps", "!app", args=["app"], stop_at="?", direct_mentions_only=True)
+    def app_command(self, message, app):
         """!app: tells you which PCO apps you have permissions to"""
+        self.app_lookup(message, app)
+
+    @respond_to("(?:Can I |do I have )?(access )(?P<app>.*?(?=(?:\?)|$))")
+    def app_lookup(self, message, app):
+        """access [app]: tells you if you have permissions to a PCO app"""
         print("This is what's in app: " + app)
         app = app.strip()
         if authenticate.check_name(message):
@@ -1,5 +1,5 @@
 from will.plugin import WillPlugin
-from will.decorators import respond_to, periodic, hear, randomly, route, rendered_template, require_settings
+from will.decorators import command, respond_to, periodic, hear, randomly, route, rendered_template, require_settings
 from plugins.pco import birthday, address, phone_numbers, checkins, msg_attachment, authenticate
 from will.mixins.slackwhitelist import wl_chan_id
 
@@ -13,10 +13,15 @@ app = "check-ins"
 
 class PcoPeoplePlugin(WillPlugin):
 
-    @respond_to("(?:when was )?(last time |!checkin |attended |when did )"
+    @command("!checkin", args=["pco_name"], stop_at="'?.", direct_mentions_only=True)
+    def pco_checkin_command(self, message, pco_name):
+        """!checkin [name]: tells you the last time someone checked-in"""
+        self.pco_checkin_lookup(message, pco_name)
+
+    @respond_to("(?:when was )?(last time |attended |when did )"
                 "(?P<pco_name>.*?(?=(?:\'|\?|\.|and |was |attended|checked |check|attend)|$))")
     def pco_checkin_lookup(self, message, pco_name):
-        """!checkin [name]: tells you the last time someone checked-in"""
+        """last time [name]: tells you the last time someone checked-in"""
         if authenticate.check_name(message):
             if authenticate.get(message, app):
                 print("checkin request")
@@ -1,5 +1,5 @@
 from will.plugin import WillPlugin
-from will.decorators import respond_to, periodic, hear, randomly, route, rendered_template, require_settings
+from will.decorators import command, respond_to, periodic, hear, randomly, route, rendered_template, require_settings
 from plugins.pco import birthday, address, phone_numbers, checkins, emails, msg_attachment, authenticate
 from will.mixins.slackwhitelist import wl_chan_id
 
@@ -13,10 +13,15 @@ app = "people"
 
 class PcoPeoplePlugin(WillPlugin):
 
-    @respond_to("(?:do you |find |got |a |need to |can somebody )?(number for |!number |!phone |call )"
+    @command("!phone", "!number", args=["pco_name"], stop_at="'?.", direct_mentions_only=True)
+    def pco_phone_command(self, message, pco_name):
+        """!phone (name): tells you the phone number of a certain user"""
+        self.pco_phone_lookup(message, pco_name)
+
+    @respond_to("(?:do you |find |got |a |need to |can somebody )?(number for |call )"
                 "(?P<pco_name>.*?(?=(?:\'|\?|\.|and)|$))")
     def pco_phone_lookup(self, message, pco_name):
-        """!phone | "number for" (name): tells you the phone number of a certain user"""
+        """"number for" (name): tells you the phone number of a certain user"""
         if authenticate.check_name(message):
             if authenticate.get(message, app):
                     self.reply("I might have that number I'll look.")
@@ -40,9 +45,14 @@ class PcoPeoplePlugin(WillPlugin):
             self.say('I could not authenticate you. Please make sure your "Full name" '
                      'is in your Slack profile and matches your Planning Center Profile.', channel=wl_chan_id(self))
 
-    @respond_to("(?:do you |find |got |a )?(birthday for |!birthday |!birth )(?P<pco_name>.*?(?=(?:\'|\?)|$))")
+    @command("!birthday", "!birth", args=["pco_name"], stop_at="'?", direct_mentions_only=True)
+    def pco_birthday_command(self, message, pco_name):
+        """!birthday (name): tells you the birthday of a certain user"""
+        self.pco_birthday_lookup(message, pco_name)
+
+    @respond_to("(?:do you |find |got |a )?(birthday for )(?P<pco_name>.*?(?=(?:\'|\?)|$))")
     def pco_birthday_lookup(self, message, pco_name):
-        """!birthday | "birthday for" (name): tells you the birthday of a certain user"""
+        """"birthday for" (name): tells you the birthday of a certain user"""
         if authenticate.check_name(message):
             if authenticate.get(message, app):
                 self.reply("I might have that birthday I'll look.")
@@ -65,9 +75,14 @@ class PcoPeoplePlugin(WillPlugin):
             self.say('I could not authenticate you. Please make sure your "Full name" '
                      'is in your Slack profile and matches your Planning Center Profile.', channel=wl_chan_id(self))
 
-    @respond_to("(?:do you |find |got |a )?(address for |!address )(?P<pco_name>.*?(?=(?:\'|\?)|$))")
+    @command("!address", args=["pco_name"], stop_at="'?", direct_mentions_only=True)
+    def pco_address_command(self, message, pco_name):
+        """!address (name): tells you the street address of a certain user"""
+        self.pco_address_lookup(message, pco_name)
+
+    @respond_to("(?:do you |find |got |a )?(address for )(?P<pco_name>.*?(?=(?:\'|\?)|$))")
     def pco_address_lookup(self, message, pco_name):
-        """!address | "address for" (name): tells you the street address of a certain user"""
+        """"address for" (name): tells you the street address of a certain user"""
         if authenticate.check_name(message):
             if authenticate.get(message, app):
                 self.reply("I might have that address.")
@@ -91,10 +106,15 @@ class PcoPeoplePlugin(WillPlugin):
             self.say('I could not authenticate you. Please make sure your "Full name" '
                      'is in your Slack profile and matches your Planning Center Profile.', channel=wl_chan_id(self))
 
-    @respond_to("(?:do you |find |got |a |need to |can somebody )?(email for |!email |email )"
+    @command("!email", args=["pco_name"], stop_at="'?.", direct_mentions_only=True)
+    def pco_email_command(self, message, pco_name):
+        """!email (name): tells you the email address of a certain user"""
+        self.pco_email_lookup(message, pco_name)
+
+    @respond_to("(?:do you |find |got |a |need to |can somebody )?(email for |email )"
                 "(?P<pco_name>.*?(?=(?:\'|\?|\.|and)|$))")
     def pco_email_lookup(self, message, pco_name):
-        """!email | "email for" (name): tells you the email address of a certain user"""
+        """"email for" (name): tells you the email address of a certain user"""
         if authenticate.check_name(message):
             if authenticate.get(message, app):
                 self.reply("I might have that email address. I'll look.")
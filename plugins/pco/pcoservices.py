@@ -1,5 +1,5 @@
 from will.plugin import WillPlugin
-from will.decorators import respond_to, periodic, hear, randomly, route, rendered_template, require_settings
+from will.decorators import command, respond_to, periodic, hear, randomly, route, rendered_template, require_settings
 from plugins.pco import song_info, authenticate, set_list, teams
 from will.mixins.slackwhitelist import wl_chan_id
 
@@ -8,8 +8,13 @@ app = "services"
 
 # I turned off credentials for this because it's not sensitive info.
 class PcoServicesPlugin(WillPlugin):
-    @respond_to("(?:do you |find |got |a )?(set list for |!setlist|setlist for |"
-                "!sunday |songs for |order of service for )(?P<pco_date>.*?(?=(?:\'|\?)|$))")
+    @command("!setlist", "!sunday", args=["pco_date"], stop_at="'?", direct_mentions_only=True)
+    def pco_setlist_command(self, message, pco_date):
+        """!setlist [date]: tells you the set list for a certain date"""
+        self.pco_setlist_lookup(message, pco_date)
+
+    @respond_to("(?:do you |find |got |a )?(set list for |setlist for |"
+                "songs for |order of service for )(?P<pco_date>.*?(?=(?:\'|\?)|$))")
     def pco_setlist_lookup(self, message, pco_date):
         if pco_date is "":
             pco_date = 'sunday'
@@ -23,7 +28,13 @@ class PcoServicesPlugin(WillPlugin):
         else:
             self.reply("Sorry I don't find any set lists scheduled on" + pco_date + " in Services.")
 
-    @respond_to("(?:what is |show me |what's |a )?(song list for |!songlist|!checksongs|!setsongs|!songcheck)"
+    @command("!songlist", "!checksongs", "!setsongs", "!songcheck", args=["pco_date"], stop_at="'?",
+             direct_mentions_only=True)
+    def pco_setlist_songs_command(self, message, pco_date):
+        """!songlist [date]: tells you the songs scheduled for a certain date"""
+        self.pco_setlist_songs(message, pco_date)
+
+    @respond_to("(?:what is |show me |what's |a )?(song list for )"
                 "(?P<pco_date>.*?(?=(?:\'|\?)|$))")
     def pco_setlist_songs(self, message, pco_date):
         if pco_date is "":
@@ -38,7 +49,12 @@ class PcoServicesPlugin(WillPlugin):
         else:
             self.reply("Sorry I don't find any songs scheduled on " + pco_date + " in Services.")
 
-    @respond_to("(?:what is |show me |what's |a )?(arrangement for |!song )(?P<pco_song>.*?(?=(?:\'|\?)|$))")
+    @command("!song", args=["pco_song"], stop_at="'?", direct_mentions_only=True)
+    def pco_song_command(self, message, pco_song):
+        """!song [song]: tells you the arrangement for a certain song"""
+        self.pco_song_lookup(message, pco_song)
+
+    @respond_to("(?:what is |show me |what's |a )?(arrangement for )(?P<pco_song>.*?(?=(?:\'|\?)|$))")
     def pco_song_lookup(self, message, pco_song):
         """arrangement for [song]: tells you the arrangement for a certain song"""
         self.reply("Let me get that song for you.")
@@ -50,7 +66,7 @@ class PcoServicesPlugin(WillPlugin):
             self.reply("Sorry I don't find " + song + "in services.")
         self.reply("", message=message, attachments=attachment)
 
-    @respond_to("(!teams|!team)(?P<pco_team>.*?(?=(?:\?)|$))")
+    @command("!teams", "!team", args=["pco_team"], stop_at="?", direct_mentions_only=True)
     def pco_team_lookup(self, message, pco_team):
         pco_team = pco_team.strip()
         """Lookup a [team] and print it's members"""
@@ -1,2 +1,3 @@
 from .nothing import NoAnalysis
 from .history import HistoryAnalysis
+from .features import FeatureAnalysis
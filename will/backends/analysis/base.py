@@ -16,15 +16,13 @@ class AnalysisBackend(PubSubMixin, SleepMixin, object):
     def __watch_pubsub(self):
         while True:
             try:
-                m = self.pubsub.get_message()
-                if m:
+                for m in self.pubsub.iter_messages():
                     self.__analyze(m)
 
             except AttributeError:
-                pass
+                self.sleep_for_event_loop()
             except (KeyboardInterrupt, SystemExit):
                 pass
-            self.sleep_for_event_loop()
 
     def __analyze(self, data):
         try:
@@ -0,0 +1,66 @@
+import re
+
+from will.backends.generation.fuzzy_index import process_query
+from will.backends.generation.listener_index import fold_case
+from will.utils import Bunch
+from .base import AnalysisBackend
+
+# <@U5GUL9D9N> on slack, @handle most everywhere else.
+MENTION_REGEX = re.compile(r"<@[^>\s]+>|@[\w.\-]+")
+NGRAM_SIZE = 3
+
+
+def ngrams(s, size=NGRAM_SIZE):
+    # Character n-grams, so they work the same for any language.
+    s = " ".join(s.split())
+    if len(s) <= size:
+        return set([s]) if s else set()
+    return set([s[i:i + size] for i in range(0, len(s) - size + 1)])
+
+
+class MessageFeatures(Bunch):
+    """
+    Nothing in Will uses the n-grams yet, so they're only worked out if someone asks.
+    """
+
+    @property
+    def ngrams(self):
+        if "_ngrams" not in self:
+            self["_ngrams"] = ngrams(self.normalized)
+        return self["_ngrams"]
+
+
+def message_features(content):
+    """
+    Everything the generation backends want to know about a message's text, worked out
+    once.  normalized is case-folded, but lines up character for character with content.
+    """
+    normalized = fold_case(content)
+    tokens = content.split()
+    first_token = None
+    command = None
+    if tokens:
+        first_token = tokens[0]
+        if first_token.startswith("!") and len(first_token) > 1:
+            command = first_token
+
+    return MessageFeatures(
+        normalized=normalized,
+        tokens=tokens,
+        first_token=first_token,
+        mentions=MENTION_REGEX.findall(content),
+        command=command,
+        fuzzy_query=process_query(content),
+    )
+
+
+class FeatureAnalysis(AnalysisBackend):
+
+    def do_analyze(self, message):
+        # Tokens and the like, under "features", so every generation backend can share them.
+        content = getattr(message.data, "content", None)
+        if content is None:
+            return {}
+        return {
+            "features": message_features(content)
+        }
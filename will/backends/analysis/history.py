@@ -1,30 +1,101 @@
-import requests
+import copy
 
 from will import settings
 from will.mixins import StorageMixin
 from will.decorators import require_settings
 from .base import AnalysisBackend
 
+# Every LazyHistory in a process loads through this one connection.
+_storage = StorageMixin()
+
+
+def history_key(message):
+    # One history per channel.  Backends without channels get one per person.
+    channel = getattr(message, "channel", None)
+    if channel is not None and getattr(channel, "id", None):
+        place = channel.id
+    elif getattr(message, "sender", None) is not None and getattr(message.sender, "id", None):
+        place = message.sender.id
+    else:
+        place = "default"
+    return "history.%s.%s" % (getattr(message, "backend", None), place)
+
+
+class LazyHistory(list):
+    """
+    The messages heard in a channel before this one, most recent first.  They're only
+    loaded from storage the first time someone looks, and it pickles as just a reference
+    to them, so it's cheap to send around with every message.
+    """
+
+    def __init__(self, key, limit, before_hash, before_timestamp):
+        list.__init__(self)
+        self.history_ref = (key, limit, before_hash, before_timestamp)
+        self.filled = False
+
+    def __reduce__(self):
+        return (self.__class__, self.history_ref)
+
+    def fill(self):
+        if self.filled:
+            return
+        self.filled = True
+        key, limit, before_hash, before_timestamp = self.history_ref
+        # Stored oldest first.
+        earlier = [
+            m for m in reversed(_storage.list_range(key))
+            if m.hash != before_hash and m.timestamp <= before_timestamp
+        ]
+        self.extend(earlier[:limit])
+
+    def __getitem__(self, index):
+        self.fill()
+        return list.__getitem__(self, index)
+
+    def __iter__(self):
+        self.fill()
+        return list.__iter__(self)
+
+    def __len__(self):
+        self.fill()
+        return list.__len__(self)
+
+    def __contains__(self, item):
+        self.fill()
+        return list.__contains__(self, item)
+
+    def __eq__(self, other):
+        self.fill()
+        return list.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self.fill()
+        return list.__repr__(self)
+
 
 class HistoryAnalysis(AnalysisBackend, StorageMixin):
 
     def do_analyze(self, message):
-        # Load the last few messages, add it to the context under "history"
-        history = self.load("message_history", [])
-        if not history:
-            history = []
+        # Remember this message in its channel's history, and add the ones before it to
+        # the context under "history".  Each channel keeps the last HISTORY_CONTEXT_LENGTH.
+        message = message.data
         max_history_context = getattr(settings, "HISTORY_CONTEXT_LENGTH", 20)
+        key = history_key(message)
 
-        if history:
-            context = {
-                "history": history[:max_history_context]
-            }
-        else:
-            context = {
-                "history": [],
-            }
+        if not getattr(self, "cleared_global_history", False):
+            # Older Wills kept every message they ever heard, in one list.
+            self.clear("message_history")
+            self.cleared_global_history = True
 
-        history.append(message)
-        self.save("message_history", history)
+        # The raw event is most of a message's size, and the content's already here.
+        stored = copy.copy(message)
+        stored.original_incoming_event = None
+        self.list_push(key, stored)
+        self.list_trim(key, -(max_history_context + 1), -1)
 
-        return context
+        return {
+            "history": LazyHistory(key, max_history_context, message.hash, message.timestamp),
+        }
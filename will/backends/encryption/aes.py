@@ -28,6 +28,16 @@ def unpad(s):
     return s
 
 
+def pad_bytes(b):
+    # PKCS#7, since binary values can end in anything.
+    n = BS - len(b) % BS
+    return b + bytearray([n] * n)
+
+
+def unpad_bytes(b):
+    return b[:-bytearray(b[-1:])[0]]
+
+
 class AESEncryption(WillBaseEncryptionBackend):
 
     @classmethod
@@ -45,6 +55,17 @@ class AESEncryption(WillBaseEncryptionBackend):
             logging.critical("Error preparing message for the wire: \n%s" % traceback.format_exc())
             return None
 
+    @classmethod
+    def encrypt_bytes(cls, raw):
+        iv = os.urandom(BS)
+        cipher = AES.new(key, AES.MODE_CBC, iv)
+        return iv + cipher.encrypt(bytes(pad_bytes(raw)))
+
+    @classmethod
+    def decrypt_bytes(cls, enc):
+        cipher = AES.new(key, AES.MODE_CBC, enc[:BS])
+        return unpad_bytes(cipher.decrypt(enc[BS:]))
+
     @classmethod
     def decrypt_from_b64(cls, raw_enc):
         try:
@@ -10,3 +10,13 @@ class WillBaseEncryptionBackend(object):
     @staticmethod
     def decrypt_from_b64(enc):
         raise NotImplemented
+
+    # Binary versions of the above, without any pickling or base64.  Optional - without them,
+    # values are encrypted with encrypt_to_b64 instead.
+    @staticmethod
+    def encrypt_bytes(raw):
+        raise NotImplementedError
+
+    @staticmethod
+    def decrypt_bytes(enc):
+        raise NotImplementedError
@@ -1,4 +1,3 @@
-import imp
 import logging
 import signal
 import traceback
@@ -6,7 +5,7 @@ from will import settings
 from will.decorators import require_settings
 from will.acl import test_acl
 from will.abstractions import Event
-from multiprocessing import Process
+from will.utils import load_plugin_module, spawn
 
 
 class ExecutionBackend(object):
@@ -64,6 +63,12 @@ class ExecutionBackend(object):
                 )
                 return
 
+        if "full_method_name" in option.context:
+            # So the event handler can time each plugin until it replies.
+            if not hasattr(message, "executed_methods"):
+                message.executed_methods = []
+            message.executed_methods.append(option.context["full_method_name"])
+
         if "say_content" in option.context:
             # We're coming from a generation engine like a chatterbot, which doesn't *do* things.
             self.bot.pubsub.publish(
@@ -76,7 +81,24 @@ class ExecutionBackend(object):
                 reference_message=message.data.original_incoming_event
             )
         else:
-            module = imp.load_source(option.context.plugin_info["parent_name"], option.context.plugin_info["parent_path"])
+            pool = getattr(self.bot, "execution_pool", None)
+            if (
+                pool and pool.enabled and
+                not option.context.get("execute_in_own_process", False) and
+                pool.submit(
+                    option.context.plugin_info,
+                    option.context.function_name,
+                    message,
+                    option.context["args"],
+                    option.context.search_matches,
+                )
+            ):
+                return
+
+            module = load_plugin_module(
+                option.context.plugin_info["parent_name"],
+                option.context.plugin_info["parent_path"]
+            )
             cls = getattr(module, option.context.plugin_info["name"])
 
             instantiated_module = cls(message=message)
@@ -91,8 +113,12 @@ class ExecutionBackend(object):
             )
 
     def run_execute(self, target, *args, **kwargs):
+        # Forget about anything that's already finished.
+        self.bot.running_execution_threads = [
+            t for t in self.bot.running_execution_threads if t.is_alive()
+        ]
         try:
-            t = Process(
+            t = spawn(
                 target=target,
                 args=args,
                 kwargs=kwargs,
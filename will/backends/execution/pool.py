@@ -0,0 +1,142 @@
+import dill as pickle
+import logging
+import os
+import threading
+import traceback
+from multiprocessing import Process, Queue as ProcessQueue
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from will import settings
+from will.utils import load_plugin_module
+
+
+def run_task(task):
+    plugin_info, function_name, message, args, kwargs = pickle.loads(task)
+    try:
+        module = load_plugin_module(plugin_info["parent_name"], plugin_info["parent_path"])
+        cls = getattr(module, plugin_info["name"])
+
+        instantiated_module = cls(message=message)
+        method = getattr(instantiated_module, function_name)
+        method(message, *args, **kwargs)
+    except Exception:
+        logging.critical(
+            "Error running %s.%s: \n%s" % (plugin_info["name"], function_name, traceback.format_exc())
+        )
+
+
+def execution_worker(task_queue, parent_pid=None):
+    while True:
+        try:
+            task = task_queue.get(timeout=1)
+        except queue.Empty:
+            # Don't outlive the event handler if it's killed without a chance to stop us.
+            if parent_pid and os.getppid() != parent_pid:
+                return
+            continue
+        except (KeyboardInterrupt, SystemExit):
+            return
+
+        if task is None:
+            return
+        run_task(task)
+
+
+class ExecutionWorkerPool(object):
+    """
+    Long-lived workers that run matched listeners off a bounded queue, so we're not
+    forking a new process for every one.  In "process" mode each worker is its own
+    process, in "thread" mode they're threads in the event handler.
+
+    submit() returns False when a task can't go to the pool (the queue is full, or it
+    won't pickle), so the caller can fall back to running it in a process of its own.
+    """
+
+    def __init__(self, num_workers=4, mode="process", queue_size=100):
+        self.num_workers = num_workers
+        self.mode = mode
+        self.queue_size = queue_size
+        self.workers = []
+        self.started_pid = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            num_workers=getattr(settings, "EXECUTION_WORKERS", 4),
+            mode=getattr(settings, "EXECUTION_WORKER_MODE", "process"),
+            queue_size=getattr(settings, "EXECUTION_QUEUE_SIZE", 100),
+        )
+
+    @property
+    def enabled(self):
+        return self.num_workers > 0
+
+    def start(self):
+        # The pool is created before the event handler forks, so start it lazily
+        # in whichever process actually uses it.
+        if self.started_pid == os.getpid():
+            return
+        self.started_pid = os.getpid()
+        self.workers = []
+        if self.mode == "thread":
+            self.task_queue = queue.Queue(maxsize=self.queue_size)
+        else:
+            self.task_queue = ProcessQueue(maxsize=self.queue_size)
+        for i in range(0, self.num_workers):
+            self.workers.append(self.start_worker())
+
+    def start_worker(self):
+        if self.mode == "thread":
+            w = threading.Thread(target=execution_worker, args=(self.task_queue,))
+        else:
+            w = Process(target=execution_worker, args=(self.task_queue, os.getpid()))
+        w.daemon = True
+        w.start()
+        return w
+
+    def reap(self):
+        # Replace any worker that a plugin managed to take down with it.
+        for i, w in enumerate(self.workers):
+            if not w.is_alive():
+                logging.warning("Execution worker %s died, starting a new one." % i)
+                if hasattr(w, "join"):
+                    w.join(0)
+                self.workers[i] = self.start_worker()
+
+    def submit(self, plugin_info, function_name, message, args, kwargs):
+        self.start()
+        self.reap()
+        try:
+            task = pickle.dumps((plugin_info, function_name, message, args, kwargs))
+        except Exception:
+            logging.warning(
+                "Couldn't pickle %s.%s for the execution pool:\n%s" % (
+                    plugin_info["name"], function_name, traceback.format_exc()
+                )
+            )
+            return False
+
+        try:
+            self.task_queue.put_nowait(task)
+        except queue.Full:
+            logging.warning(
+                "Execution queue is full (%s tasks), running %s.%s in its own process." % (
+                    self.queue_size, plugin_info["name"], function_name
+                )
+            )
+            return False
+        return True
+
+    def stop(self):
+        if self.started_pid != os.getpid():
+            return
+        for w in self.workers:
+            try:
+                self.task_queue.put_nowait(None)
+            except queue.Full:
+                break
+        self.started_pid = None
@@ -1,5 +1,7 @@
+import collections
 import logging
 import random
+import threading
 import time
 import traceback
 import dill as pickle
@@ -12,19 +14,20 @@ from will.utils import Bunch
 
 class GenerationBackend(PubSubMixin, SleepMixin, object):
     is_will_generationbackend = True
+    # Only backends whose options depend on nothing but the message and listeners should
+    # set this, since generate() hands back the same options for the same message.
+    cache_generation = False
 
     def __watch_pubsub(self):
         while True:
             try:
-                m = self.pubsub.get_message()
-                if m:
+                for m in self.pubsub.iter_messages():
                     self.__generate(m.data)
             except (KeyboardInterrupt, SystemExit):
                 pass
-            self.sleep_for_event_loop()
 
     def __generate(self, message):
-        ret = self.do_generate(message)
+        ret = self.generate(message)
         try:
             self.pubsub.publish("generation.complete", ret, reference_message=message)
         except (KeyboardInterrupt, SystemExit):
@@ -36,6 +39,77 @@ class GenerationBackend(PubSubMixin, SleepMixin, object):
         # Take message, return a list of possible responses/matches
         raise NotImplemented
 
+    def message_features(self, event):
+        # The features analysis has usually worked these out already.
+        analysis = getattr(event, "analysis", None)
+        if isinstance(analysis, dict) and analysis.get("features", None) is not None:
+            return analysis["features"]
+        from will.backends.analysis.features import message_features
+        return message_features(event.data.content)
+
+    def generate(self, event):
+        """
+        do_generate, but for backends with cache_generation set, remembers which listeners
+        matched the last GENERATION_CACHE_SIZE different messages (default 1000, 0 turns it
+        off), so the commands people use all the time only get matched once.
+        """
+        if not self.cache_generation:
+            return self.do_generate(event)
+        if not hasattr(self, "generation_cache"):
+            self.generation_cache = GenerationCache(getattr(settings, "GENERATION_CACHE_SIZE", 1000))
+        cache = self.generation_cache
+        message = event.data
+        listeners = getattr(getattr(self, "bot", None), "message_listeners", None)
+        if not cache.size or listeners is None or getattr(message, "content", None) is None:
+            return self.do_generate(event)
+
+        cache.check_listeners(listeners)
+        key = (
+            message.content,
+            bool(getattr(message, "is_direct", False)),
+            bool(getattr(message, "is_private_chat", False)),
+            bool(getattr(message, "will_said_it", False)),
+        )
+        entries = cache.get(key)
+        self.save_generation_cache_counts()
+        if entries is not None:
+            return [self._option_from_cache(listeners, *e) for e in entries]
+
+        options = self.do_generate(event)
+        entries = [self._cache_entry(listeners, o) for o in options or []]
+        if None not in entries:
+            cache.put(key, entries)
+        return options
+
+    def save_generation_cache_counts(self, force=False):
+        # Generation backends usually run in their own process, so the counts go to /metrics through storage.
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return
+        now = time.time()
+        if not force and now < getattr(self, "generation_cache_saved_at", 0) + getattr(settings, "METRICS_SAVE_INTERVAL", 5):
+            return
+        self.generation_cache_saved_at = now
+        cache = self.generation_cache
+        with cache.lock:
+            counts = {"hits": cache.hits, "misses": cache.misses}
+        self.bot.hash_set("will_generation_cache", getattr(self, "name", self.__class__.__name__), counts)
+
+    def _cache_entry(self, listeners, option):
+        # Only options we can build again exactly from the listener get cached.
+        context = getattr(option, "context", None)
+        name = getattr(context, "full_method_name", None)
+        if set(option.__dict__.keys()) != set(OPTION_REQUIRED_FIELDS) or name not in listeners:
+            return None
+        return (name, option.backend, option.score, dict(context.get("search_matches", None) or {}))
+
+    def _option_from_cache(self, listeners, name, backend, score, search_matches):
+        context = Bunch()
+        for k, v in listeners[name].items():
+            if k != "fn":
+                context[k] = v
+        context.search_matches = dict(search_matches)
+        return GeneratedOption(context=context, backend=backend, score=score)
+
     def start(self, name, **kwargs):
         for k, v in kwargs.items():
             self.__dict__[k] = v
@@ -53,6 +127,45 @@ OPTION_REQUIRED_FIELDS = [
 ]
 
 
+class GenerationCache(object):
+    """
+    A thread-safe LRU of generation results, with hit and miss counts.  It empties itself
+    whenever the listeners it's caching for change.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.listeners_seen = None
+        self.lock = threading.Lock()
+
+    def check_listeners(self, listeners):
+        seen = (id(listeners), len(listeners))
+        if seen != self.listeners_seen:
+            with self.lock:
+                self.entries.clear()
+                self.listeners_seen = seen
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            value = self.entries.pop(key)
+            self.entries[key] = value
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
 class GeneratedOption(object):
 
     def __init__(self, *args, **kwargs):
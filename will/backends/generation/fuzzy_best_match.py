@@ -1,70 +1,50 @@
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process as fuzz_process
-import regex
+import logging
+import time
 from will import settings
 from will.decorators import require_settings
 from will.utils import Bunch
 from .base import GenerationBackend, GeneratedOption
+from .fuzzy_index import FuzzyChoiceIndex, FuzzyRegexTimeout, compile_fuzzy_regex
 
 
 class FuzzyBestMatch(GenerationBackend):
+    cache_generation = True
 
     def _generate_compiled_regex(self, method_meta):
+        # Compiled at bootstrap, before we forked.  Anything missing gets compiled here, once.
         if not hasattr(self, "cached_regex"):
-            self.cached_regex = {}
-
-        method_path = method_meta["plugin_info"]["parent_path"]
-        if not method_path in self.cached_regex:
-
-            regex_string = method_meta["regex_pattern"]
-            if "case_sensitive" in method_meta and not method_meta["case_sensitive"]:
-                regex_string = "(?i)%s" % regex_string
-
-            if method_meta["multiline"]:
-                try:
-                    self.cached_regex[method_path] = regex.compile("%s{e<=%s}" % (
-                        regex_string,
-                        settings.FUZZY_REGEX_ALLOWABLE_ERRORS
-                    ), regex.MULTILINE | regex.DOTALL | regex.ENHANCEMATCH)
-                except:
-                    self.cached_regex[method_path] = regex.compile("%s{e<=%s}" % (
-                        regex.escape(regex_string),
-                        settings.FUZZY_REGEX_ALLOWABLE_ERRORS
-                    ), regex.MULTILINE | regex.DOTALL | regex.ENHANCEMATCH)
-            else:
-                try:
-                    self.cached_regex[method_path] = regex.compile("%s{e<=%s}" % (
-                        regex_string,
-                        settings.FUZZY_REGEX_ALLOWABLE_ERRORS
-                    ), regex.ENHANCEMATCH)
-                except:
-                    self.cached_regex[method_path] = regex.compile("%s{e<=%s}" % (
-                        regex.escape(regex_string),
-                        settings.FUZZY_REGEX_ALLOWABLE_ERRORS
-                    ), regex.ENHANCEMATCH)
-
-        return self.cached_regex[method_path]
+            self.cached_regex = getattr(self.bot, "fuzzy_regexes", None) or {}
+
+        name = method_meta["full_method_name"]
+        if name not in self.cached_regex:
+            self.cached_regex[name] = compile_fuzzy_regex(method_meta, settings.FUZZY_REGEX_ALLOWABLE_ERRORS)
+        return self.cached_regex[name]
+
+    @property
+    def choice_index(self):
+        # Built at bootstrap, before we forked.  Plugins can't change after that.
+        if not hasattr(self, "_choice_index"):
+            self._choice_index = getattr(self.bot, "fuzzy_choice_index", None)
+            if self._choice_index is None:
+                self._choice_index = FuzzyChoiceIndex(self.bot.message_listeners)
+        return self._choice_index
 
     def do_generate(self, event):
         exclude_list = ["fn", ]
         matches = []
 
         message = event.data
+        deadline = time.time() + getattr(settings, "FUZZY_REGEX_TIME_BUDGET", 0.25)
 
         # TODO: add token_sort_ratio
 
-        if not hasattr(self, "match_choices"):
-            self.match_choices = []
-            self.match_methods = {}
         if message.content:
-            for name, l in self.bot.message_listeners.items():
-                if not l["regex_pattern"] in self.match_methods:
-                    self.match_methods[l["regex_pattern"]] = l
-                    self.match_choices.append(l["regex_pattern"])
-
-            match_str, confidence = fuzz_process.extractOne(message.content, self.match_choices)
-            l = self.match_methods[match_str]
-            if confidence >= settings.FUZZY_MINIMUM_MATCH_CONFIDENCE:
+            features = self.message_features(event)
+            best = self.choice_index.extract(
+                features.fuzzy_query, processed=True, limit=1, score_cutoff=settings.FUZZY_MINIMUM_MATCH_CONFIDENCE
+            )
+            if best:
+                l, confidence = best[0]
                 regex_matches = l["regex"].search(message.content)
                 if (
                         # The search regex matches and
@@ -85,7 +65,13 @@ class FuzzyBestMatch(GenerationBackend):
                 ):
                     fuzzy_regex = self._generate_compiled_regex(l)
 
-                    regex_matches = fuzzy_regex.search(message.content)
+                    timed_out = False
+                    try:
+                        regex_matches = fuzzy_regex.search(message.content, deadline, folded=features.normalized)
+                    except FuzzyRegexTimeout:
+                        logging.warning("Ran out of time fuzzy matching %s." % l["full_method_name"])
+                        regex_matches = None
+                        timed_out = True
                     context = Bunch()
                     for k, v in l.items():
                         if k not in exclude_list:
@@ -96,6 +82,9 @@ class FuzzyBestMatch(GenerationBackend):
                         context.search_matches = {}
 
                     o = GeneratedOption(context=context, backend="regex", score=confidence)
+                    if timed_out:
+                        # Worth trying again next time, so don't let this get cached.
+                        o.timed_out = True
                     matches.append(o)
 
         return matches
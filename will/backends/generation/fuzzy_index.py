@@ -0,0 +1,226 @@
+import bisect
+import heapq
+import re
+import regex
+import time
+import traceback
+import Levenshtein
+from fuzzywuzzy import fuzz
+from fuzzywuzzy import utils as fuzz_utils
+
+from .listener_index import fold_case, sre_parse
+
+try:
+    RegexTimeout = TimeoutError
+except NameError:
+    # Python 2
+    RegexTimeout = RuntimeError
+
+TOKEN_REGEX = re.compile(r"\S+")
+
+
+class FuzzyRegexTimeout(Exception):
+    pass
+
+
+def process_choice(s):
+    # What fuzz.WRatio does to both strings before comparing them.
+    return fuzz_utils.full_process(s, force_ascii=True)
+
+
+def process_query(s):
+    # fuzz_process.extract processes the query once more, first.
+    return process_choice(fuzz_utils.full_process(s))
+
+
+def max_length_ratio(score_cutoff):
+    """
+    How different in length two strings can be, and still have a fuzz.WRatio of
+    score_cutoff or better.
+
+    Once the longer one is 1.5x the shorter, WRatio's partial scores are scaled to 90 at
+    most, and the plain ratio can't beat 2 / (1 + 1.5) = 80.  Past 8x, the partial scores
+    are scaled to 60, and the plain ratio can't beat 22.
+    """
+    if score_cutoff > 90:
+        return 1.5
+    if score_cutoff > 60:
+        return 8
+    return None
+
+
+def anchor_word(pattern):
+    """
+    The first word of the literal text a pattern starts with, like "remind" in
+    "remind me (?P<text>.*)".  None if it doesn't start with any.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except:
+        # It'll be matched as plain text.
+        parsed = [(sre_parse.LITERAL, ord(c)) for c in pattern]
+
+    literal = []
+    for op, av in parsed:
+        if op == sre_parse.AT:
+            continue
+        if op != sre_parse.LITERAL:
+            break
+        literal.append(u"%c" % av)
+    words = fold_case(u"".join(literal)).split()
+    if words:
+        return words[0]
+    return None
+
+
+class FuzzyRegex(object):
+    """
+    A listener's compiled fuzzy regex, searched in two passes, so a long message can't
+    tie up generation.
+
+    First, we look for the first token in the message that contains, or is within
+    allowable_errors edits of, the first word of the pattern.  The regex only gets run
+    from there to the end of the message, and not at all if there isn't one.  Then, the
+    search gets whatever's left of the message's time budget, and gives up with
+    FuzzyRegexTimeout once it's spent.
+    """
+
+    def __init__(self, compiled, pattern, allowable_errors, multiline=False):
+        self.compiled = compiled
+        self.allowable_errors = allowable_errors
+        self.multiline = multiline
+        self.anchor = anchor_word(pattern)
+
+    def is_near_anchor(self, word):
+        if self.anchor in word:
+            return True
+        if abs(len(word) - len(self.anchor)) > self.allowable_errors:
+            return False
+        return Levenshtein.distance(self.anchor, word) <= self.allowable_errors
+
+    def windows(self, content, folded=None):
+        if not self.anchor:
+            return [(0, len(content))]
+
+        for token in TOKEN_REGEX.finditer(folded if folded is not None else fold_case(content)):
+            if self.is_near_anchor(token.group(0)):
+                # Searching from here covers every later token too.  It has to go to the
+                # end of the message, or $ and \s would mean something else.
+                return [(token.start(), len(content))]
+        return []
+
+    def search(self, content, deadline=None, folded=None):
+        # folded is fold_case(content), if it's already been worked out.
+        for start, end in self.windows(content, folded=folded):
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    raise FuzzyRegexTimeout()
+            try:
+                match = self.compiled.search(content, start, end, timeout=timeout)
+            except RegexTimeout:
+                raise FuzzyRegexTimeout()
+            if match:
+                return match
+        return None
+
+
+def compile_fuzzy_regex(listener, allowable_errors):
+    """
+    Compiles a listener's regex_pattern to allow up to allowable_errors typos, as a
+    FuzzyRegex.  If the pattern won't compile that way, it's matched as plain text instead.
+    """
+    regex_string = listener["regex_pattern"]
+    flags = regex.ENHANCEMATCH
+    if listener.get("multiline", False):
+        flags = flags | regex.MULTILINE | regex.DOTALL
+    prefix = ""
+    if "case_sensitive" in listener and not listener["case_sensitive"]:
+        prefix = "(?i)"
+
+    try:
+        compiled = regex.compile("%s%s{e<=%s}" % (prefix, regex_string, allowable_errors), flags)
+    except:
+        compiled = regex.compile("%s%s{e<=%s}" % (prefix, regex.escape(regex_string), allowable_errors), flags)
+    return FuzzyRegex(compiled, regex_string, allowable_errors, multiline=listener.get("multiline", False))
+
+
+def compile_fuzzy_regexes(listeners, allowable_errors):
+    """
+    Compiles every listener's fuzzy regex, by full method name.
+
+    Returns the compiled regexes, how long each one took (in seconds), and the names and
+    tracebacks of any that wouldn't compile at all.
+    """
+    compiled = {}
+    timings = {}
+    failures = {}
+    for name, l in listeners.items():
+        start = time.time()
+        try:
+            compiled[name] = compile_fuzzy_regex(l, allowable_errors)
+        except:
+            failures[name] = traceback.format_exc()
+        timings[name] = time.time() - start
+    return compiled, timings, failures
+
+
+class FuzzyChoiceIndex(object):
+    """
+    Every listener's regex pattern, processed for fuzzy matching once, up front, instead of
+    on every message.
+
+    The processed choices are kept sorted by length, so extract() only has to score the
+    ones close enough in length to the message to reach score_cutoff, rather than all of
+    them.  Scores, and the order of ties, are the same as fuzz_process.extract's.
+    """
+
+    def __init__(self, listeners):
+        choices = []
+        seen = set()
+        for name, l in listeners.items():
+            if l["regex_pattern"] in seen:
+                continue
+            seen.add(l["regex_pattern"])
+            processed = process_choice(l["regex_pattern"])
+            if processed:
+                choices.append((len(processed), len(choices), processed, l))
+        choices.sort(key=lambda c: c[0])
+
+        self.lengths = [c[0] for c in choices]
+        self.positions = [c[1] for c in choices]
+        self.choices = [c[2] for c in choices]
+        self.listeners = [c[3] for c in choices]
+
+    def __len__(self):
+        return len(self.choices)
+
+    def extract(self, query, limit=5, score_cutoff=0, processed=False):
+        """
+        Returns up to limit (listener, score) pairs scoring score_cutoff or better, best first.
+        Pass processed=True if query has already been through process_query.
+        """
+        processed_query = query if processed else process_query(query)
+        if not processed_query:
+            return []
+
+        start, end = 0, len(self.choices)
+        ratio = max_length_ratio(score_cutoff)
+        if ratio:
+            query_length = len(processed_query)
+            start = bisect.bisect_left(self.lengths, query_length / float(ratio))
+            end = bisect.bisect_right(self.lengths, query_length * ratio)
+
+        scored = []
+        for i in range(start, end):
+            length = self.lengths[i]
+            if ratio == 1.5 and max(length, query_length) >= 1.5 * min(length, query_length):
+                continue
+            score = fuzz.WRatio(processed_query, self.choices[i], full_process=False)
+            if score >= score_cutoff:
+                scored.append((self.positions[i], score, i))
+
+        # Ties go to whichever listener came first, like fuzz_process.extract.
+        scored.sort()
+        return [(self.listeners[i], score) for position, score, i in heapq.nlargest(limit, scored, key=lambda s: s[1])]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import six
+
+try:
+    # Python 3.11+
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# Characters that case-insensitive regexes treat as the same letter, but .lower() doesn't.
+CASE_FOLDS = {
+    ord(u"İ"): u"i",  # dotted capital I
+    ord(u"ı"): u"i",  # dotless i
+    ord(u"ſ"): u"s",  # long s
+}
+
+REPEATS = [getattr(sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_parse, name)]
+ZERO_WIDTH = [sre_parse.AT]
+
+
+def fold_case(s):
+    if isinstance(s, six.text_type):
+        return s.translate(CASE_FOLDS).lower()
+    return s.lower()
+
+
+def _best(options):
+    # Any of them will do.  The one with the longest shortest string is the rarest.
+    options = [o for o in options if o]
+    if not options:
+        return None
+    return max(options, key=lambda o: (min([len(s) for s in o]), -len(o)))
+
+
+def required_literals(parsed):
+    """
+    Given a parsed regex, returns a set of strings, at least one of which is in anything
+    that matches it.  Returns None if there's no such set, like for ".*".
+    """
+    options = []
+    run = []
+
+    def end_run():
+        if run:
+            options.append(set([u"".join(run)]))
+            del run[:]
+
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            c = u"%c" % av
+            if ord(c) < 128:
+                run.append(fold_case(c))
+                continue
+            end_run()
+        elif op in ZERO_WIDTH:
+            # Anchors don't take up any characters, so the literals either side are still adjacent.
+            continue
+        elif op == sre_parse.SUBPATTERN:
+            end_run()
+            options.append(required_literals(av[-1]))
+        elif op == getattr(sre_parse, "ATOMIC_GROUP", None):
+            end_run()
+            options.append(required_literals(av))
+        elif op == sre_parse.BRANCH:
+            end_run()
+            branches = [required_literals(b) for b in av[1]]
+            if all(branches):
+                options.append(set().union(*branches))
+        elif op in REPEATS:
+            end_run()
+            if av[0] >= 1:
+                options.append(required_literals(av[2]))
+        else:
+            end_run()
+    end_run()
+    return _best(options)
+
+
+class AhoCorasick(object):
+    """
+    Finds which of a set of strings appear in a piece of text, in one pass over it.
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for w in words:
+            state = 0
+            for c in w:
+                if c not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][c] = len(self.goto) - 1
+                state = self.goto[state][c]
+            self.output[state].add(w)
+
+        # Breadth first, so every state's fail link is set before its children need it.
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, child in self.goto[state].items():
+                queue.append(child)
+                f = self.fail[state]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                if state:
+                    self.fail[child] = self.goto[f].get(c, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    def search(self, text):
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for c in text:
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class ListenerIndex(object):
+    """
+    Narrows down which message listeners could possibly match a message, so only those
+    need their regex run.
+
+    For each listener's regex, we work out a few literal strings it can't match without
+    (like "remind me" in "remind me (?P<text>.*)"), and find them all in a message with
+    one Aho-Corasick pass.  Listeners we can't find any literals for are always candidates.
+    The index only ever rules out listeners that couldn't match, so the results are the same
+    as running every regex.
+    """
+
+    def __init__(self, listeners):
+        self.always = set()
+        self.listeners_by_literal = {}
+        for name, l in listeners.items():
+            literals = None
+            try:
+                literals = required_literals(sre_parse.parse(l["regex"].pattern, l["regex"].flags))
+            except:
+                logging.debug("Couldn't index %s, checking it for every message." % name)
+            if not literals:
+                self.always.add(name)
+                continue
+            for literal in literals:
+                self.listeners_by_literal.setdefault(literal, set()).add(name)
+        self.matcher = AhoCorasick(self.listeners_by_literal.keys())
+
+    def candidates(self, content, folded=False):
+        # Pass folded=True if content has already been through fold_case.
+        if not folded:
+            content = fold_case(content)
+        names = set(self.always)
+        for literal in self.matcher.search(content):
+            names |= self.listeners_by_literal[literal]
+        return names
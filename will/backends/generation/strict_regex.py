@@ -6,38 +6,86 @@ from .base import GenerationBackend, GeneratedOption
 
 
 class RegexBackend(GenerationBackend):
+    cache_generation = True
 
     def do_generate(self, event):
-        exclude_list = ["fn", ]
-        matches = []
-
         message = event.data
+        features = self.message_features(event)
+
+        # @commands are looked up by their first word.  If one matches, that's our answer.
+        matches = self.match_commands(message, features.first_token)
+        if matches:
+            return matches
+
+        candidates = None
+        if getattr(self.bot, "listener_index", None):
+            candidates = self.bot.listener_index.candidates(features.normalized, folded=True)
         for name, l in self.bot.message_listeners.items():
-            search_matches = l["regex"].search(message.content)
-            if (
-                    # The search regex matches and
-                    search_matches
-
-                    # It's not from me, or this search includes me, and
-                    and (
-                        message.will_said_it is False or
-                        ("include_me" in l and l["include_me"])
-                    )
-
-                    # I'm mentioned, or this is an overheard, or we're in a 1-1
-                    and (
-                        message.is_private_chat or
-                        ("direct_mentions_only" not in l or not l["direct_mentions_only"]) or
-                        message.is_direct
-                    )
-            ):
-                context = Bunch()
-                for k, v in l.items():
-                    if k not in exclude_list:
-                        context[k] = v
-                context.search_matches = search_matches.groupdict()
-
-                o = GeneratedOption(context=context, backend="regex", score=100)
+            if candidates is not None and name not in candidates:
+                continue
+            if l.get("command_names", None):
+                continue
+            o = self.match_listener(l, message)
+            if o:
                 matches.append(o)
 
         return matches
+
+    def match_commands(self, message, first_word):
+        registry = getattr(self.bot, "command_registry", None)
+        if not registry or not first_word:
+            return []
+
+        names = []
+        for word in self.command_words(first_word):
+            names = names + [n for n in registry.get(word, []) if n not in names]
+
+        matches = []
+        for name in names:
+            o = self.match_listener(self.bot.message_listeners[name], message)
+            if o:
+                matches.append(o)
+        return matches
+
+    def command_words(self, first_word):
+        # What a command registered as might look like, as the first word of a message.  Its
+        # regex decides whether the rest, like the "?" in "!teams?", is one of its stop_at.
+        words = [first_word]
+        stop_at = getattr(self.bot, "command_stop_at", None)
+        if stop_at:
+            stopped = re.split("[%s]" % re.escape(stop_at), first_word)[0]
+            if stopped and stopped != first_word:
+                words.append(stopped)
+        for word in list(words):
+            if word.lower() != word:
+                words.append(word.lower())
+        return words
+
+    def match_listener(self, l, message):
+        exclude_list = ["fn", ]
+        search_matches = l["regex"].search(message.content)
+        if (
+                # The search regex matches and
+                search_matches
+
+                # It's not from me, or this search includes me, and
+                and (
+                    message.will_said_it is False or
+                    ("include_me" in l and l["include_me"])
+                )
+
+                # I'm mentioned, or this is an overheard, or we're in a 1-1
+                and (
+                    message.is_private_chat or
+                    ("direct_mentions_only" not in l or not l["direct_mentions_only"]) or
+                    message.is_direct
+                )
+        ):
+            context = Bunch()
+            for k, v in l.items():
+                if k not in exclude_list:
+                    context[k] = v
+            context.search_matches = search_matches.groupdict()
+
+            return GeneratedOption(context=context, backend="regex", score=100)
+        return None
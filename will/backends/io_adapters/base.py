@@ -9,10 +9,9 @@ import time
 import traceback
 
 from will import settings
-from will.utils import Bunch, show_valid, error, warn
+from will.utils import Bunch, show_valid, error, warn, spawn
 from will.mixins import PubSubMixin, SleepMixin, SettingsMixin
 from will.abstractions import Message, Event, Person
-from multiprocessing import Process
 
 
 class IOBackend(PubSubMixin, SleepMixin, SettingsMixin, object):
@@ -59,11 +58,15 @@ class IOBackend(PubSubMixin, SleepMixin, SettingsMixin, object):
         return self.pubsub.publish("message.incoming", message, reference_message=message)
 
     def __start_event_listeners(self):
-        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+        except ValueError:
+            # We're a thread under the asyncio engine, and only the main thread gets signals anyway.
+            pass
         running = True
         while running:
             try:
-                pubsub_event = self.pubsub.get_message()
+                pubsub_event = self.pubsub.get_message(timeout=None)
                 if pubsub_event:
                     if pubsub_event.type == "message.incoming":
                         self.handle_incoming_event(pubsub_event)
@@ -78,7 +81,6 @@ class IOBackend(PubSubMixin, SleepMixin, SettingsMixin, object):
                         running = False
             except (KeyboardInterrupt, SystemExit):
                 pass
-            self.sleep_for_event_loop()
 
     def __handle_terminate(self):
         if hasattr(self, "__event_listener_thread"):
@@ -108,7 +110,7 @@ class IOBackend(PubSubMixin, SleepMixin, SettingsMixin, object):
             if hasattr(self, "stdin_process") and self.stdin_process:
                 self.pubsub.subscribe(["message.incoming.stdin", ])
 
-            self.__event_listener_thread = Process(
+            self.__event_listener_thread = spawn(
                 target=self.__start_event_listeners,
             )
             self.__event_listener_thread.start()
@@ -2,7 +2,7 @@ from datetime import datetime
 import json
 import logging
 from multiprocessing.queues import Empty
-from multiprocessing import Process, Queue
+from multiprocessing import Queue
 import random
 import re
 import requests
@@ -20,7 +20,7 @@ from will import settings
 from will.utils import is_admin
 from will.acl import is_acl_allowed
 from will.abstractions import Event, Message, Person, Channel
-from will.utils import Bunch, UNSURE_REPLIES, clean_for_pickling
+from will.utils import Bunch, UNSURE_REPLIES, clean_for_pickling, spawn
 from will.mixins import StorageMixin, PubSubMixin
 
 ROOM_NOTIFICATION_URL = "https://%(server)s/v2/room/%(room_id)s/notification?auth_token=%(token)s"
@@ -782,9 +782,9 @@ class HipChatBackend(IOBackend, HipChatRosterMixin, HipChatRoomMixin, StorageMix
         self.people
         self.channels
 
-        self.bridge_thread = Process(target=self.__handle_bridge_queue)
+        self.bridge_thread = spawn(target=self.__handle_bridge_queue)
         self.bridge_thread.start()
-        self.xmpp_thread = Process(target=self.client.process, kwargs={"block": True})
+        self.xmpp_thread = spawn(target=self.client.process, kwargs={"block": True})
         self.xmpp_thread.start()
 
     def terminate(self):
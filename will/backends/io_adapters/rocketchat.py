@@ -245,9 +245,11 @@ class RocketChatBackend(IOBackend, StorageMixin):
                           data=params)
         resp_json = r.json()
         self._token = resp_json['data']['authToken']
-        self.save("WILL_ROCKETCHAT_TOKEN", self._token)
         self._userid = resp_json['data']['userId']
-        self.save("WILL_ROCKETCHAT_USERID", self._userid)
+        self.save_many({
+            "WILL_ROCKETCHAT_TOKEN": self._token,
+            "WILL_ROCKETCHAT_USERID": self._userid,
+        })
 
     def _rest_users_list(self):
         logging.debug('Getting users list from Rocket.Chat')
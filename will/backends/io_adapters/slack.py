@@ -12,10 +12,10 @@ from markdownify import MarkdownConverter
 
 from will import settings
 from .base import IOBackend
-from will.utils import Bunch, UNSURE_REPLIES, clean_for_pickling
+from will.utils import Bunch, UNSURE_REPLIES, clean_for_pickling, spawn
 from will.mixins import SleepMixin, StorageMixin
-from multiprocessing import Process
 from will.abstractions import Event, Message, Person, Channel
+from will.roster import get_roster, slim_channel, slim_person
 from slackclient import SlackClient
 from slackclient.server import SlackConnectionError
 
@@ -86,8 +86,9 @@ class SlackBackend(IOBackend, SleepMixin, StorageMixin):
             # u'type': u'message', u'bot_id': u'B5HL9ABFE'},
             # u'type': u'message', u'hidden': True, u'channel': u'D5HGP0YE7'}
 
-            sender = self.people[event["user"]]
-            channel = clean_for_pickling(self.channels[event["channel"]])
+            # Just enough to go on.  The rest of each is in the roster, for anyone who needs it.
+            sender = slim_person(self.people[event["user"]], self.internal_name)
+            channel = slim_channel(self.channels[event["channel"]], self.internal_name)
             # print "channel: %s" % channel
             interpolated_handle = "<@%s>" % self.me.id
             real_handle = "@%s" % self.me.handle
@@ -451,11 +452,16 @@ class SlackBackend(IOBackend, SleepMixin, StorageMixin):
             )
         if len(channels.keys()) == 0:
             # Server isn't set up yet, and we're likely in a processing thread,
-            if self.load("slack_channel_cache", None):
-                self._channels = self.load("slack_channel_cache", None)
+            cached = self.load("slack_channel_cache", None)
+            if cached:
+                self._channels = cached
         else:
             self._channels = channels
-            self.save("slack_channel_cache", channels)
+            if get_roster(self.internal_name).publish(channels=channels):
+                # Members are left in the roster, so this stays small in big workspaces.
+                self.save("slack_channel_cache", dict([
+                    (id, slim_channel(c, self.internal_name)) for id, c in channels.items()
+                ]))
 
     def _update_people(self):
         people = {}
@@ -487,17 +493,21 @@ class SlackBackend(IOBackend, SleepMixin, StorageMixin):
                     self.me.timezone = user_timezone
         if len(people.keys()) == 0:
             # Server isn't set up yet, and we're likely in a processing thread,
-            if self.load("slack_people_cache", None):
-                self._people = self.load("slack_people_cache", None)
+            cached = self.load_many(["slack_people_cache", "slack_me_cache", "slack_handle_cache"])
+            if cached["slack_people_cache"]:
+                self._people = cached["slack_people_cache"]
             if not hasattr(self, "me") or not self.me:
-                self.me = self.load("slack_me_cache", None)
+                self.me = cached["slack_me_cache"]
             if not hasattr(self, "handle") or not self.handle:
-                self.handle = self.load("slack_handle_cache", None)
+                self.handle = cached["slack_handle_cache"]
         else:
             self._people = people
-            self.save("slack_people_cache", people)
-            self.save("slack_me_cache", self.me)
-            self.save("slack_handle_cache", self.handle)
+            if get_roster(self.internal_name).publish(people=people):
+                self.save_many({
+                    "slack_people_cache": people,
+                    "slack_me_cache": self.me,
+                    "slack_handle_cache": self.handle,
+                })
 
     def _update_backend_metadata(self):
         self._update_people()
@@ -549,7 +559,7 @@ class SlackBackend(IOBackend, SleepMixin, StorageMixin):
         # Property, auto-inits.
         self.client
 
-        self.rtm_thread = Process(target=self._watch_slack_rtm)
+        self.rtm_thread = spawn(target=self._watch_slack_rtm)
         self.rtm_thread.start()
 
     def terminate(self):
@@ -1,6 +1,7 @@
 import logging
 import os
 import redis
+import time
 import traceback
 from six.moves.urllib.parse import urlparse
 
@@ -47,7 +48,7 @@ class PubSubPrivateBase(SettingsMixin, EncryptionMixin):
 
         return self.publish_to_backend(
             self._localize_topic(topic),
-            self.encrypt(e)
+            self.encode(e)
         )
 
     def unsubscribe(self, topic):
@@ -69,15 +70,21 @@ class PubSubPrivateBase(SettingsMixin, EncryptionMixin):
     def subscribe(self, topic):
         return self.do_subscribe(self._localize_topic(topic))
 
-    def get_message(self):
+    def get_message(self, timeout=0):
         """
         Gets the latest object from the backend, and handles unpickling
         and validation.
+
+        By default this doesn't block.  Pass a timeout (in seconds) to wait up to
+        that long for a message to arrive, or None to wait until one does.
         """
         try:
-            m = self.get_from_backend()
+            if timeout == 0:
+                m = self.get_from_backend()
+            else:
+                m = self.wait_for_backend(timeout=timeout)
             if m and m["type"] not in SKIP_TYPES:
-                return self.decrypt(m["data"])
+                return self.decode(m["data"])
 
         except AttributeError:
             raise Exception("Tried to call get message without having subscribed first!")
@@ -85,8 +92,23 @@ class PubSubPrivateBase(SettingsMixin, EncryptionMixin):
             pass
         except:
             logging.critical("Error in watching pubsub get message: \n%s" % traceback.format_exc())
+            if timeout != 0:
+                # Don't let a broken connection turn a blocking wait into a busy loop.
+                time.sleep(settings.EVENT_LOOP_INTERVAL)
         return None
 
+    def iter_messages(self, timeout=None):
+        """
+        Yields messages as they arrive, blocking in between.
+
+        If a timeout is given, None is yielded each time that many seconds pass
+        without a message, so callers can do periodic work.
+        """
+        while True:
+            m = self.get_message(timeout=timeout)
+            if m is not None or timeout is not None:
+                yield m
+
 
 class BasePubSub(PubSubPrivateBase):
     """
@@ -96,6 +118,9 @@ class BasePubSub(PubSubPrivateBase):
     - unsubscribe()
     - publish_to_backend()
     - get_from_backend()
+
+    and, where the backend can wait for messages natively, should override:
+    - wait_for_backend()
     """
 
     def do_subscribe(self, topic):
@@ -120,6 +145,19 @@ class BasePubSub(PubSubPrivateBase):
         """
         raise NotImplementedError
 
+    def wait_for_backend(self, timeout=None):
+        """
+        Like get_from_backend(), but blocks for up to timeout seconds (forever, if None)
+        for a message to arrive.  This default falls back to polling get_from_backend().
+        """
+        if timeout is not None:
+            give_up_at = time.time() + timeout
+        while True:
+            m = self.get_from_backend()
+            if m or (timeout is not None and time.time() >= give_up_at):
+                return m
+            time.sleep(settings.EVENT_LOOP_INTERVAL)
+
 
 def bootstrap(settings):
     return BasePubSub(settings)
@@ -0,0 +1,335 @@
+import errno
+import fcntl
+import fnmatch
+import hashlib
+import logging
+import os
+import select
+import socket
+import struct
+import tempfile
+import threading
+import traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .base import BasePubSub
+
+# Frames are a 4-byte length, then an op and its payload.
+HEADER = struct.Struct("!I")
+PUBLISH = b"P"
+SUBSCRIBE = b"S"
+UNSUBSCRIBE = b"U"
+MESSAGE = b"M"
+SEPARATOR = b"\0"
+
+# Brokers running in this process, by socket path.
+_brokers = {}
+_broker_lock = threading.Lock()
+
+
+def _to_bytes(s):
+    if isinstance(s, bytes):
+        return s
+    return s.encode("utf-8")
+
+
+def _to_str(b):
+    if isinstance(b, str):
+        return b
+    return b.decode("utf-8")
+
+
+def _send_frame(sock, payload):
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, length):
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _recv_frame(sock):
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    return _recv_exactly(sock, HEADER.unpack(header)[0])
+
+
+class BrokerClient(object):
+
+    def __init__(self, sock, max_pending):
+        self.sock = sock
+        self.patterns = []
+        # Writes go through a queue, so one process that stops reading can't stall everyone else.
+        self.outbox = queue.Queue(maxsize=max_pending)
+        self.writer = threading.Thread(target=self.write_loop)
+        self.writer.daemon = True
+        self.writer.start()
+
+    def matches(self, topic):
+        for p in self.patterns:
+            if fnmatch.fnmatchcase(topic, p):
+                return True
+        return False
+
+    def write_loop(self):
+        while True:
+            frame = self.outbox.get()
+            if frame is None:
+                return
+            try:
+                _send_frame(self.sock, frame)
+            except socket.error:
+                return
+
+
+class LocalBroker(object):
+    """
+    Passes published messages on to every connection subscribed to a matching topic.
+    """
+
+    def __init__(self, server_socket, max_pending=10000):
+        self.server_socket = server_socket
+        self.max_pending = max_pending
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def start(self):
+        t = threading.Thread(target=self.accept_loop)
+        t.daemon = True
+        t.start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                sock, address = self.server_socket.accept()
+            except socket.error:
+                logging.critical("Local pubsub broker stopped accepting: \n%s" % traceback.format_exc())
+                return
+            client = BrokerClient(sock, self.max_pending)
+            with self.clients_lock:
+                self.clients.append(client)
+            t = threading.Thread(target=self.read_loop, args=(client,))
+            t.daemon = True
+            t.start()
+
+    def read_loop(self, client):
+        try:
+            while True:
+                frame = _recv_frame(client.sock)
+                if frame is None:
+                    break
+                op, payload = frame[:1], frame[1:]
+                if op == PUBLISH:
+                    topic, body = payload.split(SEPARATOR, 1)
+                    self.publish(_to_str(topic), MESSAGE + payload)
+                elif op == SUBSCRIBE:
+                    client.patterns.append(_to_str(payload))
+                elif op == UNSUBSCRIBE:
+                    topic = _to_str(payload)
+                    client.patterns = [p for p in client.patterns if p != topic]
+        except socket.error:
+            pass
+        except:
+            logging.critical("Error in local pubsub broker: \n%s" % traceback.format_exc())
+
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+        try:
+            client.outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        client.sock.close()
+
+    def publish(self, topic, frame):
+        with self.clients_lock:
+            clients = list(self.clients)
+        for c in clients:
+            if c.matches(topic):
+                try:
+                    c.outbox.put_nowait(frame)
+                except queue.Full:
+                    logging.warning("Local pubsub subscriber is %s messages behind, dropping %s." % (
+                        self.max_pending, topic
+                    ))
+
+
+def close_inherited_broker():
+    """
+    A process forked from the broker gets copies of its sockets, which would keep them
+    looking alive to everyone else after the broker's gone.  Close ours.
+    """
+    with _broker_lock:
+        for path, broker in list(_brokers.items()):
+            if broker.pid != os.getpid():
+                broker.server_socket.close()
+                for c in broker.clients:
+                    c.sock.close()
+                del _brokers[path]
+
+
+def start_broker(path, max_pending):
+    """
+    Binds path and starts a broker thread in this process, unless a live broker
+    already has it.  Returns True if we're now the broker.
+    """
+    with _broker_lock:
+        if path in _brokers and _brokers[path].pid == os.getpid():
+            return True
+
+        # Only one process gets to clean up a stale socket and bind.
+        with open("%s.lock" % path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(path)
+                    return False
+                except socket.error:
+                    pass
+                finally:
+                    probe.close()
+
+                if os.path.exists(path):
+                    os.unlink(path)
+                server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                server_socket.bind(path)
+                server_socket.listen(128)
+                _brokers[path] = LocalBroker(server_socket, max_pending=max_pending)
+                _brokers[path].start()
+                logging.info("Started local pubsub broker at %s" % path)
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class LocalPubSub(BasePubSub):
+    """
+    A pubsub backend for running all of Will's processes on one machine, without redis.
+
+    The first process to need it binds a unix domain socket at LOCAL_PUBSUB_PATH and runs
+    a small broker thread.  Every connection, from any process, goes through it.  If that
+    process goes away, the next connection to notice takes over.  Topics match with the
+    same glob patterns as redis' psubscribe.
+
+    LOCAL_PUBSUB_PATH defaults to a socket in the temp directory, named for SECRET_KEY, so
+    separate Wills on one machine don't hear each other.
+    """
+
+    binary_safe = True
+
+    def __init__(self, settings, *args, **kwargs):
+        super(LocalPubSub, self).__init__(*args, **kwargs)
+        self.path = getattr(settings, "LOCAL_PUBSUB_PATH", None)
+        if not self.path:
+            key_hash = hashlib.md5(_to_bytes(settings.SECRET_KEY)).hexdigest()[:12]
+            self.path = os.path.join(tempfile.gettempdir(), "will-pubsub-%s.sock" % key_hash)
+        self.max_pending = getattr(settings, "LOCAL_PUBSUB_MAX_PENDING", 10000)
+        self.topics = []
+        self.sock = None
+        self.pid = None
+        self._buffer = b""
+        self._pending = []
+
+    @property
+    def connection(self):
+        # Forked processes share our socket, so each one gets its own, with our subscriptions.
+        if self.sock is None or self.pid != os.getpid():
+            self.connect()
+        return self.sock
+
+    def connect(self):
+        close_inherited_broker()
+        self.pid = os.getpid()
+        self._buffer = b""
+        self._pending = []
+        for attempt in range(0, 3):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+                break
+            except socket.error as e:
+                sock.close()
+                if e.errno not in (errno.ENOENT, errno.ECONNREFUSED) or attempt == 2:
+                    raise
+                start_broker(self.path, self.max_pending)
+        for t in self.topics:
+            _send_frame(sock, SUBSCRIBE + _to_bytes(t))
+        self.sock = sock
+
+    def _send(self, payload):
+        try:
+            _send_frame(self.connection, payload)
+        except socket.error:
+            # The broker went away.  Reconnect (becoming it, if need be), and try once more.
+            self.sock = None
+            _send_frame(self.connection, payload)
+
+    def publish_to_backend(self, topic, body_str):
+        logging.debug("publishing %s" % (topic,))
+        self._send(PUBLISH + _to_bytes(topic) + SEPARATOR + _to_bytes(body_str))
+
+    def do_subscribe(self, topic):
+        logging.debug("subscribed to %s" % topic)
+        if type(topic) != type([]):
+            topic = [topic]
+        for t in topic:
+            self.topics.append(t)
+            self._send(SUBSCRIBE + _to_bytes(t))
+
+    def unsubscribe(self, topic):
+        if type(topic) != type([]):
+            topic = [topic]
+        for t in self._localize_topic(topic):
+            self.topics = [existing for existing in self.topics if existing != t]
+            self._send(UNSUBSCRIBE + _to_bytes(t))
+
+    def _read(self, timeout):
+        sock = self.connection
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if not readable:
+            return
+        data = sock.recv(65536)
+        if not data:
+            # Broker's gone.  The next call reconnects, and resubscribes.
+            self.sock = None
+            return
+        self._buffer += data
+        while len(self._buffer) >= HEADER.size:
+            length = HEADER.unpack(self._buffer[:HEADER.size])[0]
+            if len(self._buffer) < HEADER.size + length:
+                break
+            frame = self._buffer[HEADER.size:HEADER.size + length]
+            self._buffer = self._buffer[HEADER.size + length:]
+            if frame[:1] == MESSAGE:
+                topic, body = frame[1:].split(SEPARATOR, 1)
+                self._pending.append({"type": "pmessage", "channel": _to_str(topic), "data": body})
+
+    def get_from_backend(self):
+        if not self._pending:
+            self._read(0)
+        if self._pending:
+            return self._pending.pop(0)
+        return None
+
+    def wait_for_backend(self, timeout=None):
+        if not self._pending:
+            self._read(timeout)
+        if self._pending:
+            return self._pending.pop(0)
+        return None
+
+
+def bootstrap(settings):
+    return LocalPubSub(settings)
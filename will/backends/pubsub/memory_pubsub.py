@@ -0,0 +1,79 @@
+import fnmatch
+import logging
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .base import BasePubSub
+
+# Every subscribed MemoryPubSub in this process.
+_subscribers = []
+_subscribers_lock = threading.Lock()
+
+
+class MemoryPubSub(BasePubSub):
+    """
+    An in-process pubsub backend, used by the asyncio engine, where everything runs in
+    a single process.
+
+    Events are handed to subscribers as-is, so nothing is pickled, encrypted, or sent
+    over the network.  Topics match with the same glob patterns redis' psubscribe uses.
+    It can't reach other processes, so it only makes sense with ENGINE = "asyncio".
+    """
+
+    def __init__(self, settings, *args, **kwargs):
+        super(MemoryPubSub, self).__init__(*args, **kwargs)
+        self.topics = []
+        self.queue = queue.Queue()
+
+    def encode(self, obj):
+        return obj
+
+    def decode(self, value):
+        return value
+
+    def publish_to_backend(self, topic, obj):
+        logging.debug("publishing %s" % (topic,))
+        with _subscribers_lock:
+            subscribers = list(_subscribers)
+        for s in subscribers:
+            for t in s.topics:
+                if fnmatch.fnmatchcase(topic, t):
+                    s.queue.put({"type": "pmessage", "channel": topic, "data": obj})
+                    break
+
+    def do_subscribe(self, topic):
+        logging.debug("subscribed to %s" % topic)
+        if type(topic) != type([]):
+            topic = [topic]
+        with _subscribers_lock:
+            self.topics.extend(topic)
+            if self not in _subscribers:
+                _subscribers.append(self)
+
+    def unsubscribe(self, topic):
+        if type(topic) != type([]):
+            topic = [topic]
+        with _subscribers_lock:
+            self.topics = [t for t in self.topics if t not in self._localize_topic(topic)]
+            if not self.topics and self in _subscribers:
+                _subscribers.remove(self)
+
+    def get_from_backend(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def wait_for_backend(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def bootstrap(settings):
+    return MemoryPubSub(settings)
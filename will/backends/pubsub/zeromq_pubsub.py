@@ -52,8 +52,8 @@ Examples:
         self.sub_socket.connect(settings.ZEROMQ_URL)
         self.sub_socket.setsockopt(zmq.SUBSCRIBE, '')
 
-        # self.poller = zmq.Poller()
-        # self.poller.register(self.sub_socket, zmq.POLLIN)
+        self.poller = zmq.Poller()
+        self.poller.register(self.sub_socket, zmq.POLLIN)
 
     def publish_to_backend(self, topic, body_str):
         return self.pub_socket.send("%s%s%s" % (topic, DIVIDER, body_str))
@@ -77,8 +77,8 @@ Examples:
             s = self.sub_socket.recv(zmq.DONTWAIT)
             if s:
                 topic, m = s.split(DIVIDER)
-                if m and m["type"] not in SKIP_TYPES:
-                    return m
+                if m:
+                    return {"type": "pmessage", "channel": topic, "data": m}
         except zmq.Again:
             return None
 
@@ -90,6 +90,14 @@ Examples:
             )
         return None
 
+    def wait_for_backend(self, timeout=None):
+        if timeout is not None:
+            # zmq wants milliseconds.
+            timeout = timeout * 1000
+        if self.poller.poll(timeout):
+            return self.get_from_backend()
+        return None
+
 
 def bootstrap(settings):
     return ZeroMQPubSub(settings)
@@ -0,0 +1,17 @@
+class WillBaseSerializationBackend(object):
+    """
+    Turns objects into bytes and back, for pubsub and storage.
+
+    Each backend has a one-byte tag that's written in front of everything it
+    serializes, so values can always be read back, whichever backend is set now.
+    """
+    tag = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def dumps(self, obj):
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
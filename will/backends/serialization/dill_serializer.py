@@ -0,0 +1,21 @@
+import dill
+
+from .base import WillBaseSerializationBackend
+
+
+class DillSerializer(WillBaseSerializationBackend):
+    """
+    dill handles far more than pickle can (lambdas, nested functions, and so on),
+    but is a good deal slower.  Used for anything the chosen backend can't handle.
+    """
+    tag = b"d"
+
+    def dumps(self, obj):
+        return dill.dumps(obj, -1)
+
+    def loads(self, data):
+        return dill.loads(data)
+
+
+def bootstrap(settings):
+    return DillSerializer(settings)
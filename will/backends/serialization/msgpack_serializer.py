@@ -0,0 +1,120 @@
+import datetime
+import msgpack
+from pytz import timezone as pytz_timezone, utc
+from six.moves import cPickle as pickle
+
+from will.abstractions import Event, Message, Person, Channel
+from will.utils import Bunch
+from .base import WillBaseSerializationBackend
+
+# msgpack extension type codes.
+EXT_PICKLE = 0
+EXT_TUPLE = 1
+EXT_DATETIME = 2
+EXT_TIMEDELTA = 3
+EXT_TIMEZONE = 4
+EXT_BUNCH = 5
+EXT_EVENT = 6
+EXT_PERSON = 7
+EXT_CHANNEL = 8
+EXT_MESSAGE = 9
+
+BUNCH_CODES = {
+    Bunch: EXT_BUNCH,
+    Event: EXT_EVENT,
+    Person: EXT_PERSON,
+    Channel: EXT_CHANNEL,
+}
+BUNCH_CLASSES = dict([(code, cls) for cls, code in BUNCH_CODES.items()])
+
+UNPACK_KWARGS = {"raw": False}
+if msgpack.version >= (1, 0, 0):
+    # Plenty of our dicts have non-string keys.
+    UNPACK_KWARGS["strict_map_key"] = False
+
+
+class MsgPackSerializer(WillBaseSerializationBackend):
+    """
+    msgpack, with extension types for Will's own Event, Message, Person and Channel
+    objects, and the datetimes and timezones they carry.  Anything else msgpack can't
+    represent is pickled inside it, so it's only fast for the shapes we know about.
+    """
+    tag = b"m"
+
+    def __init__(self, *args, **kwargs):
+        super(MsgPackSerializer, self).__init__(*args, **kwargs)
+        # Making a Packer is slow, and nested objects need one each, so keep spares.
+        self.packers = []
+
+    def dumps(self, obj):
+        try:
+            packer = self.packers.pop()
+        except IndexError:
+            # strict_types, so tuples and dict subclasses come through default() intact.
+            packer = msgpack.Packer(default=self.default, use_bin_type=True, strict_types=True)
+        try:
+            return packer.pack(obj)
+        except:
+            # Don't reuse one that stopped halfway through.
+            packer = None
+            raise
+        finally:
+            if packer is not None:
+                self.packers.append(packer)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, ext_hook=self.ext_hook, **UNPACK_KWARGS)
+
+    def default(self, obj):
+        t = type(obj)
+        if t in BUNCH_CODES:
+            return msgpack.ExtType(BUNCH_CODES[t], self.dumps(dict(obj)))
+        if t is Message:
+            return msgpack.ExtType(EXT_MESSAGE, self.dumps(obj.__dict__))
+        if t is tuple:
+            return msgpack.ExtType(EXT_TUPLE, self.dumps(list(obj)))
+        if t is datetime.datetime and (obj.tzinfo is None or hasattr(obj.tzinfo, "zone")):
+            zone = None
+            if obj.tzinfo is not None:
+                # Store the instant in UTC, so it comes back with the right offset.
+                zone = obj.tzinfo.zone
+                obj = obj.astimezone(utc)
+            return msgpack.ExtType(EXT_DATETIME, self.dumps([
+                obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second, obj.microsecond, zone
+            ]))
+        if t is datetime.timedelta:
+            return msgpack.ExtType(EXT_TIMEDELTA, self.dumps([obj.days, obj.seconds, obj.microseconds]))
+        if isinstance(obj, datetime.tzinfo) and hasattr(obj, "zone"):
+            return msgpack.ExtType(EXT_TIMEZONE, self.dumps(obj.zone))
+        return msgpack.ExtType(EXT_PICKLE, pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+    def ext_hook(self, code, data):
+        if code == EXT_PICKLE:
+            return pickle.loads(data)
+
+        value = self.loads(data)
+        if code in BUNCH_CLASSES:
+            obj = BUNCH_CLASSES[code].__new__(BUNCH_CLASSES[code])
+            obj.__setstate__(value)
+            return obj
+        if code == EXT_MESSAGE:
+            obj = Message.__new__(Message)
+            obj.__dict__.update(value)
+            return obj
+        if code == EXT_TUPLE:
+            return tuple(value)
+        if code == EXT_DATETIME:
+            zone = value.pop()
+            dt = datetime.datetime(*value)
+            if zone is not None:
+                dt = utc.localize(dt).astimezone(pytz_timezone(zone))
+            return dt
+        if code == EXT_TIMEDELTA:
+            return datetime.timedelta(*value)
+        if code == EXT_TIMEZONE:
+            return pytz_timezone(value)
+        return msgpack.ExtType(code, data)
+
+
+def bootstrap(settings):
+    return MsgPackSerializer(settings)
@@ -0,0 +1,18 @@
+from six.moves import cPickle as pickle
+
+from .base import WillBaseSerializationBackend
+
+
+class PickleSerializer(WillBaseSerializationBackend):
+    """The standard library's pickle, at its newest protocol."""
+    tag = b"p"
+
+    def dumps(self, obj):
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+def bootstrap(settings):
+    return PickleSerializer(settings)
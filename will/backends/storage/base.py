@@ -1,21 +1,66 @@
+import contextlib
+import dill as pickle
+import hashlib
+import hmac
 import logging
 import redis
+import six
+import time
 from six.moves.urllib.parse import urlparse
+from will import settings
 from will.mixins import SettingsMixin, EncryptionMixin
+from will.mixins.encryption import is_encoded
 
 
 class PrivateBaseStorageBackend(SettingsMixin, EncryptionMixin, object):
     required_settings = []
 
     def save(self, key, value, *args, **kwargs):
-        self.do_save(key, self.encrypt(value), *args, **kwargs)
+        self.do_save(key, self.encode(value), *args, **kwargs)
 
     def load(self, key, *args, **kwargs):
+        return self.decode_loaded(key, self.do_load(key, *args, **kwargs))
+
+    def save_many(self, values, expire=None):
+        self.do_save_many(dict([(key, self.encode(value)) for key, value in values.items()]), expire=expire)
+
+    def load_many(self, keys):
+        """Returns a dict of each key to its value, or None if it isn't set."""
+        keys = list(keys)
+        return dict([
+            (key, self.decode_loaded(key, value)) for key, value in zip(keys, self.do_load_many(keys))
+        ])
+
+    def decode_loaded(self, key, value):
+        if value is None or is_encoded(value):
+            return self.decode(value)
+
+        # Saved by an older Will, which pickled values itself before encrypting them.
         try:
-            return self.decrypt(self.do_load(key, *args, **kwargs))
+            return pickle.loads(self.decrypt(value))
         except:
             logging.warn("Error decrypting.  Attempting unencrypted load for %s to ease migration." % key)
-            return self.do_load(key, *args, **kwargs)
+            return pickle.loads(value)
+
+
+def redis_slice(values, start, end):
+    # Redis' list indexes: end is inclusive, and negative numbers count from the end.
+    length = len(values)
+    if start < 0:
+        start = max(length + start, 0)
+    if end < 0:
+        end = length + end
+    if end < start:
+        return []
+    return values[start:end + 1]
+
+
+def score_range(members, min_score=None, max_score=None):
+    # (member, score) pairs from a dict of member: score, lowest score first.
+    return sorted([
+        (member, score) for member, score in members.items()
+        if (min_score is None or score >= min_score) and (max_score is None or score <= max_score)
+    ], key=lambda m: (m[1], m[0]))
 
 
 class BaseStorageBackend(PrivateBaseStorageBackend):
@@ -26,14 +71,204 @@ class BaseStorageBackend(PrivateBaseStorageBackend):
     do_load() - gets a value from the backend
     clear() - deletes a key
     clear_all_keys() - clears the db
+
+    do_save_many() and do_load_many() save and load several keys at once.  These versions
+    just do one at a time, so backends that can do them in one trip should override them.
+
+    The list, hash, set, sorted set and counter operations below work on any backend, by loading the
+    whole value, changing it, and saving it back, through update().  Backends should make
+    update() atomic if they can, and override the operations with native ones if they have
+    them.  A key used with these should only ever be used with them, not save() and load().
     """
 
+    def update(self, key, fn, default=None):
+        """
+        Saves fn(the value of key, or default) to key, and returns it.  This version isn't
+        atomic, so backends override it with one that is.
+        """
+        value = self.load(key)
+        if value is None:
+            value = default
+        value = fn(value)
+        self.save(key, value)
+        return value
+
+    def member_digest(self, member):
+        """
+        Hash fields and set members are stored under this, so an equal one always lands
+        in the same place, even when values are encrypted.
+        """
+        if isinstance(member, six.text_type):
+            member = member.encode("utf-8")
+        elif not isinstance(member, bytes):
+            member = repr(member).encode("utf-8")
+        secret = getattr(settings, "SECRET_KEY", "") or ""
+        if isinstance(secret, six.text_type):
+            secret = secret.encode("utf-8")
+        return hmac.new(secret, member, hashlib.sha256).hexdigest()
+
+    # Lists, in the order they were pushed.  Indexes work like redis': end is inclusive,
+    # and negative ones count back from the end.
+
+    def list_push(self, key, value):
+        """Adds value to the end of the list at key, and returns its new length."""
+        return len(self.update(key, lambda l: l + [value], []))
+
+    def list_range(self, key, start=0, end=-1):
+        return redis_slice(self.load(key) or [], start, end)
+
+    def list_trim(self, key, start, end):
+        """Drops everything from the list at key but start to end."""
+        self.update(key, lambda l: redis_slice(l, start, end), [])
+
+    # Hashes: a dict of fields to values, where each field can be read and written on its own.
+
+    def hash_set(self, key, field, value):
+        def set_field(h):
+            h[field] = value
+            return h
+        self.update(key, set_field, {})
+
+    def hash_get(self, key, field, default=None):
+        return (self.load(key) or {}).get(field, default)
+
+    def hash_delete(self, key, field):
+        def delete_field(h):
+            h.pop(field, None)
+            return h
+        self.update(key, delete_field, {})
+
+    def hash_all(self, key):
+        return self.load(key) or {}
+
+    # Sets: members should be simple values, like strings and numbers.
+
+    def set_add(self, key, member):
+        def add(members):
+            members[self.member_digest(member)] = member
+            return members
+        self.update(key, add, {})
+
+    def set_remove(self, key, member):
+        def remove(members):
+            members.pop(self.member_digest(member), None)
+            return members
+        self.update(key, remove, {})
+
+    def set_members(self, key):
+        return set((self.load(key) or {}).values())
+
+    def set_contains(self, key, member):
+        return self.member_digest(member) in (self.load(key) or {})
+
+    # Sorted sets: members, each with a numeric score, read back in score order.  Members
+    # should be short strings, like ids, since some backends keep them as-is.
+
+    def zset_add(self, key, member, score):
+        """Adds member to the sorted set at key, or moves it to score if it's already there."""
+        def add(members):
+            members[member] = score
+            return members
+        self.update(key, add, {})
+
+    def zset_remove(self, key, member):
+        def remove(members):
+            members.pop(member, None)
+            return members
+        self.update(key, remove, {})
+
+    def zset_range_by_score(self, key, min_score=None, max_score=None):
+        """Returns (member, score) pairs with scores between min_score and max_score, lowest first."""
+        return score_range(self.load(key) or {}, min_score, max_score)
+
+    def zset_pop_by_score(self, key, max_score):
+        """Removes, and returns, the (member, score) pairs scoring max_score or less, lowest first."""
+        # Only rewrite the whole set when something's due, since this gets called every tick.
+        if not self.zset_range_by_score(key, max_score=max_score):
+            return []
+        popped = []
+
+        def pop(members):
+            # update() may run this more than once.
+            popped[:] = score_range(members, max_score=max_score)
+            for member, score in popped:
+                del members[member]
+            return members
+        self.update(key, pop, {})
+        return popped
+
+    def incr(self, key, amount=1):
+        """Adds amount to the counter at key, and returns the new count.  incr(key, 0) reads it."""
+        return self.update(key, lambda count: count + amount, 0)
+
     def do_save(self, key, value, expire=None):
         raise NotImplemented
 
     def do_load(self, key):
         raise NotImplemented
 
+    # Locks: held by one process at a time, until it releases them or ttl seconds pass, so
+    # one that dies holding a lock can't hold it forever.  Each time a lock's taken, it
+    # gets a higher token than the last, so anything the lock guards can tell when an
+    # older holder, whose lock has run out, tries to change it late.
+
+    def lock_key(self, name):
+        return "will_lock.%s" % name
+
+    def acquire_lock(self, name, ttl):
+        """Takes the lock called name for ttl seconds, and returns its token, or None if it's taken."""
+        now = time.time()
+        acquired = []
+
+        def take(lock):
+            # update() may run this more than once.
+            acquired[:] = []
+            if lock["expires_at"] is not None and lock["expires_at"] > now:
+                return lock
+            acquired.append(lock["token"] + 1)
+            return {"token": lock["token"] + 1, "expires_at": now + ttl}
+        self.update(self.lock_key(name), take, {"token": 0, "expires_at": None})
+        if acquired:
+            return acquired[0]
+        return None
+
+    def release_lock(self, name, token):
+        """Releases the lock called name, if token's still the one holding it."""
+        def release(lock):
+            if lock["token"] == token:
+                return {"token": lock["token"], "expires_at": None}
+            return lock
+        self.update(self.lock_key(name), release, {"token": 0, "expires_at": None})
+
+    @contextlib.contextmanager
+    def lock(self, name, ttl=60):
+        """
+        with storage.lock("name", ttl) as token: gives the lock's token, or None if someone
+        else has it.  It doesn't wait.
+        """
+        token = self.acquire_lock(name, ttl)
+        try:
+            yield token
+        finally:
+            if token is not None:
+                self.release_lock(name, token)
+
+    def sweep_expired(self, limit=None):
+        """
+        Deletes up to limit values that have expired, and returns how many it deleted.  The
+        scheduler calls this every STORAGE_SWEEP_INTERVAL seconds.  Backends that delete
+        expired values themselves, like redis, don't need to do anything.
+        """
+        return 0
+
+    def do_save_many(self, values, expire=None):
+        for key, value in values.items():
+            self.do_save(key, value, expire=expire)
+
+    def do_load_many(self, keys):
+        """Returns the stored values of keys, in the same order, with None for missing ones."""
+        return [self.do_load(key) for key in keys]
+
     def clear(self, key):
         raise NotImplemented
 
@@ -69,12 +69,50 @@ Examples:
         except cb_exc.NotFoundError:
             pass
 
+    def do_save_many(self, values, expire=None):
+        if values:
+            self.couchbase.set_multi(values, ttl=expire or 0)
+
+    def do_load_many(self, keys):
+        if not keys:
+            return []
+        # quiet, so missing keys come back unsuccessful instead of raising.
+        res = self.couchbase.get_multi(keys, quiet=True)
+        return [res[key].value if res[key].success else None for key in keys]
+
     def size(self):
         """
         Couchbase doesn't support getting the size of the DB
         """
         return "Unknown (See Couchbase Admin UI)"
 
+    def update(self, key, fn, default=None):
+        # Check-and-set: if someone else saved the key after we read it, start over.
+        while True:
+            try:
+                res = self.couchbase.get(key)
+                cas = res.cas
+                value = self.decode_loaded(key, res.value)
+            except cb_exc.NotFoundError:
+                cas = None
+                value = None
+            if value is None:
+                value = default
+            value = fn(value)
+            try:
+                if cas is None:
+                    self.couchbase.add(key, self.encode(value))
+                else:
+                    self.couchbase.set(key, self.encode(value), cas=cas)
+                return value
+            except cb_exc.KeyExistsError:
+                continue
+
+    def incr(self, key, amount=1):
+        if amount < 0:
+            return self.couchbase.decr(key, amount=-amount, initial=0).value
+        return self.couchbase.incr(key, amount=amount, initial=amount).value
+
 
 def bootstrap(settings):
     return CouchbaseStorage(settings)
@@ -1,3 +1,6 @@
+import contextlib
+import fcntl
+import json
 import logging
 import os
 import time
@@ -5,6 +8,10 @@ import time
 from will.utils import sizeof_fmt
 from .base import BaseStorageBackend
 
+INDEX_LOCK_FILENAME = ".will_index.lock"
+SIZE_FILENAME = ".will_size"
+EXPIRY_FILENAME = ".will_expiry"
+
 
 class FileStorageException():
     """
@@ -73,27 +80,147 @@ Examples:
         expire_path = os.path.join(self.dirname, '.' + key + '.expires')
         return key_path, expire_path
 
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    # Alongside the keys, we keep their total size and count in .will_size, and when each
+    # key that expires is due in .will_expiry, so size() and sweep_expired() don't have to
+    # look at every file.  Both are only changed while holding .will_index.lock.
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        with open(os.path.join(self.dirname, INDEX_LOCK_FILENAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index_file(self, filename):
+        try:
+            with open(os.path.join(self.dirname, filename), 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def _write_index_file(self, filename, value):
+        # Written aside and moved into place, so a crash can't leave it half-written.
+        path = os.path.join(self.dirname, filename)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(value, f)
+        os.rename(path + '.tmp', path)
+
+    def _read_size(self):
+        size = self._read_index_file(SIZE_FILENAME)
+        if size is None:
+            # Saved by an older Will, or cleared.  Count it all up, once.
+            size = {"bytes": 0, "keys": 0}
+            for filename in os.listdir(self.dirname):
+                path = os.path.join(self.dirname, filename)
+                if not filename.startswith('.') and os.path.isfile(path):
+                    size["bytes"] += os.path.getsize(path)
+                    size["keys"] += 1
+        return size
+
+    def _adjust_size(self, size, bytes_added, keys_added):
+        # size is what _read_size() said before the change, in case it had to count.
+        if not bytes_added and not keys_added:
+            return
+        size["bytes"] += bytes_added
+        size["keys"] += keys_added
+        self._write_index_file(SIZE_FILENAME, size)
+
+    def _read_expiry_index(self):
+        expiry_index = self._read_index_file(EXPIRY_FILENAME)
+        if expiry_index is None:
+            expiry_index = {}
+            for filename in os.listdir(self.dirname):
+                if filename.startswith('.') and filename.endswith('.expires'):
+                    try:
+                        with open(os.path.join(self.dirname, filename), 'r') as f:
+                            expiry_index[filename[1:-len('.expires')]] = int(f.read())
+                    except (IOError, ValueError):
+                        pass
+        return expiry_index
+
+    def _set_expiry(self, key, expire_at):
+        expiry_index = self._read_expiry_index()
+        if expire_at is None:
+            expiry_index.pop(key, None)
+        else:
+            expiry_index[key] = expire_at
+        self._write_index_file(EXPIRY_FILENAME, expiry_index)
+
     def do_save(self, key, value, expire=None):
         key_path, expire_path = self._key_paths(key)
-        with open(key_path, 'w') as f:
-            f.write(value)
+        with self._index_lock():
+            size = self._read_size()
+            old_size = self._file_size(key_path)
+            with open(key_path, 'w') as f:
+                f.write(value)
 
-        if expire is not None:
-            with open(expire_path, 'w') as f:
-                f.write(str(int(time.time() + expire)))
-        elif os.path.exists(expire_path):
-            os.unlink(expire_path)
+            if expire is not None:
+                expire_at = int(time.time() + expire)
+                with open(expire_path, 'w') as f:
+                    f.write(str(expire_at))
+                self._set_expiry(key, expire_at)
+            elif os.path.exists(expire_path):
+                os.unlink(expire_path)
+                self._set_expiry(key, None)
 
-    def clear(self, key):
+            self._adjust_size(size, self._file_size(key_path) - (old_size or 0), 1 if old_size is None else 0)
+
+    def update(self, key, fn, default=None):
+        # Hold a lock on the key while we change it, so other processes wait their turn.
+        with open(os.path.join(self.dirname, '.' + key + '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return super(FileStorage, self).update(key, fn, default=default)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _clear(self, key):
+        # Only call this holding the index lock.
         key_path, expire_path = self._key_paths(key)
-        if os.path.exists(key_path):
+        old_size = self._file_size(key_path)
+        if old_size is not None:
+            size = self._read_size()
             os.unlink(key_path)
+            self._adjust_size(size, -old_size, -1)
         if os.path.exists(expire_path):
             os.unlink(expire_path)
+            return True
+        return False
+
+    def clear(self, key):
+        with self._index_lock():
+            if self._clear(key):
+                self._set_expiry(key, None)
 
     def clear_all_keys(self):
-        for filename in self._all_setting_files():
-            os.unlink(filename)
+        with self._index_lock():
+            for filename in self._all_setting_files():
+                if os.path.basename(filename) != INDEX_LOCK_FILENAME:
+                    os.unlink(filename)
+            self._write_index_file(SIZE_FILENAME, {"bytes": 0, "keys": 0})
+            self._write_index_file(EXPIRY_FILENAME, {})
+
+    def sweep_expired(self, limit=None):
+        now = time.time()
+        with self._index_lock():
+            expiry_index = self._read_expiry_index()
+            due = sorted([(expire_at, key) for key, expire_at in expiry_index.items() if expire_at < now])
+            if limit is not None:
+                due = due[:limit]
+            for expire_at, key in due:
+                self._clear(key)
+                del expiry_index[key]
+            if due:
+                self._write_index_file(EXPIRY_FILENAME, expiry_index)
+        return len(due)
 
     def do_load(self, key):
         key_path, expire_path = self._key_paths(key)
@@ -110,11 +237,29 @@ Examples:
             with open(key_path, 'r') as f:
                 return f.read()
 
+    def do_load_many(self, keys):
+        # One look at the directory tells us which keys are there, and which can expire.
+        filenames = set(os.listdir(self.dirname))
+        values = []
+        for key in keys:
+            if key not in filenames:
+                values.append(None)
+            elif '.' + key + '.expires' in filenames:
+                values.append(self.do_load(key))
+            else:
+                key_path, expire_path = self._key_paths(key)
+                try:
+                    with open(key_path, 'r') as f:
+                        values.append(f.read())
+                except IOError:
+                    # Cleared since we looked.
+                    values.append(None)
+        return values
+
     def size(self):
-        return sizeof_fmt(sum([
-            os.path.getsize(filename)
-            for filename in self._all_setting_files()
-        ]))
+        with self._index_lock():
+            size = self._read_size()
+        return "%s in %s keys" % (sizeof_fmt(size["bytes"]), size["keys"])
 
 
 def bootstrap(settings):
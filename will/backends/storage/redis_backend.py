@@ -2,8 +2,17 @@ import redis
 from six.moves.urllib import parse
 from .base import BaseStorageBackend
 
+# Only delete the lock if it's still ours.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 class RedisStorage(BaseStorageBackend):
+    binary_safe = True
     required_settings = [
         {
             "name": "REDIS_URL",
@@ -53,9 +62,117 @@ Examples:
     def do_load(self, key):
         return self.redis.get(key)
 
+    def do_save_many(self, values, expire=None):
+        pipe = self.redis.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, value, ex=expire)
+        pipe.execute()
+
+    def do_load_many(self, keys):
+        if not keys:
+            return []
+        return self.redis.mget(keys)
+
     def size(self):
         return self.redis.info()["used_memory_human"]
 
+    def update(self, key, fn, default=None):
+        # WATCH the key, and start over if anyone else changes it before we've saved.
+        def transaction(pipe):
+            value = pipe.get(key)
+            value = self.decode_loaded(key, value)
+            if value is None:
+                value = default
+            value = fn(value)
+            pipe.multi()
+            pipe.set(key, self.encode(value))
+            result.append(value)
+
+        result = []
+        self.redis.transaction(transaction, key)
+        return result[-1]
+
+    def list_push(self, key, value):
+        return self.redis.rpush(key, self.encode(value))
+
+    def list_range(self, key, start=0, end=-1):
+        return [self.decode(v) for v in self.redis.lrange(key, start, end)]
+
+    def list_trim(self, key, start, end):
+        self.redis.ltrim(key, start, end)
+
+    # Hash fields and set members are kept in redis hashes, under their digest, so they can
+    # be encrypted like everything else.  Hash entries hold (field, value), so hash_all can
+    # give the fields back.
+
+    def hash_set(self, key, field, value):
+        self.redis.hset(key, self.member_digest(field), self.encode((field, value)))
+
+    def hash_get(self, key, field, default=None):
+        value = self.redis.hget(key, self.member_digest(field))
+        if value is None:
+            return default
+        return self.decode(value)[1]
+
+    def hash_delete(self, key, field):
+        self.redis.hdel(key, self.member_digest(field))
+
+    def hash_all(self, key):
+        return dict([self.decode(v) for v in self.redis.hvals(key)])
+
+    def set_add(self, key, member):
+        self.redis.hset(key, self.member_digest(member), self.encode(member))
+
+    def set_remove(self, key, member):
+        self.redis.hdel(key, self.member_digest(member))
+
+    def set_members(self, key):
+        return set([self.decode(v) for v in self.redis.hvals(key)])
+
+    def set_contains(self, key, member):
+        return self.redis.hexists(key, self.member_digest(member))
+
+    # Sorted set members are kept as-is, so redis can order them.
+
+    def zset_add(self, key, member, score):
+        # redis-py's zadd has changed its arguments between versions.
+        self.redis.execute_command("ZADD", key, score, member)
+
+    def zset_remove(self, key, member):
+        self.redis.zrem(key, member)
+
+    def _members(self, pairs):
+        return [(m.decode("utf-8") if isinstance(m, bytes) else m, score) for m, score in pairs]
+
+    def zset_range_by_score(self, key, min_score=None, max_score=None):
+        return self._members(self.redis.zrangebyscore(
+            key,
+            "-inf" if min_score is None else min_score,
+            "+inf" if max_score is None else max_score,
+            withscores=True
+        ))
+
+    def zset_pop_by_score(self, key, max_score):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrangebyscore(key, "-inf", max_score, withscores=True)
+        pipe.zremrangebyscore(key, "-inf", max_score)
+        return self._members(pipe.execute()[0])
+
+    def acquire_lock(self, name, ttl):
+        key = self.lock_key(name)
+        # Tokens come from a counter that's never reset, so they only go up.
+        token = self.redis.incr(key + ".token")
+        if self.redis.set(key, token, px=int(ttl * 1000), nx=True):
+            return token
+        return None
+
+    def release_lock(self, name, token):
+        self.redis.eval(RELEASE_LOCK_SCRIPT, 1, self.lock_key(name), token)
+
+    def incr(self, key, amount=1):
+        # Counters are plain numbers, so redis can add to them.
+        return self.redis.incrby(key, amount)
+
 
 def bootstrap(settings):
     return RedisStorage(settings)
@@ -0,0 +1,186 @@
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import six
+
+from will.utils import sizeof_fmt
+from .base import BaseStorageBackend
+
+# SQLite only takes so many ?s in one statement.
+MAX_VARIABLES = 500
+
+
+class SQLiteStorage(BaseStorageBackend):
+    binary_safe = True
+    required_settings = [
+        {
+            "name": "SQLITE_FILE",
+            "obtain_at": """You must supply a SQLITE_FILE setting that is a path to a database file.
+
+Examples:
+
+ * /var/run/will/will.sqlite3
+ * ~will/will.sqlite3""",
+        },
+    ]
+
+    """
+    A storage backend using a single SQLite database, in WAL mode, so every Will process
+    can read it at once while one writes.  Saves are atomic.  Expired values are never
+    loaded, and sweep_expired() deletes them.
+
+    You must supply a SQLITE_FILE setting that is a path to the database file.  It's
+    created if it doesn't exist.  Keep it on a local disk: SQLite's locking doesn't work
+    over NFS and the like.
+    """
+    def __init__(self, settings):
+        self.verify_settings(quiet=True)
+        self.filename = os.path.abspath(os.path.expanduser(settings.SQLITE_FILE))
+        logging.debug("Using %s for sqlite storage", self.filename)
+
+        dirname = os.path.dirname(self.filename)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname, mode=0o700)
+
+        self.local = threading.local()
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS storage "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS storage_expires_at ON storage (expires_at)")
+            # Sorted sets get a table of their own, indexed by score.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sorted_sets "
+                "(key TEXT NOT NULL, member TEXT NOT NULL, score REAL NOT NULL, PRIMARY KEY (key, member))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sorted_sets_score ON sorted_sets (key, score)")
+
+    @property
+    def connection(self):
+        # One connection per thread, and a new one after a fork.
+        if getattr(self.local, "pid", None) != os.getpid():
+            # isolation_level=None, so we say when transactions start, in transaction().
+            conn = sqlite3.connect(self.filename, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe from corruption in WAL mode, and commits don't wait on the disk.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = conn
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    @contextlib.contextmanager
+    def transaction(self):
+        conn = self.connection
+        # IMMEDIATE takes the write lock up front, so two updates can't both read the old value.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _expires_at(self, expire):
+        if expire is None:
+            return None
+        return time.time() + expire
+
+    def do_save(self, key, value, expire=None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO storage (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(value), self._expires_at(expire))
+        )
+
+    def do_save_many(self, values, expire=None):
+        expires_at = self._expires_at(expire)
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO storage (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, sqlite3.Binary(value), expires_at) for key, value in values.items()]
+            )
+
+    def do_load(self, key):
+        row = self.connection.execute(
+            "SELECT value FROM storage WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        if row is not None:
+            return six.binary_type(row[0])
+
+    def do_load_many(self, keys):
+        found = {}
+        now = time.time()
+        for i in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[i:i + MAX_VARIABLES]
+            rows = self.connection.execute(
+                "SELECT key, value FROM storage WHERE key IN (%s) AND (expires_at IS NULL OR expires_at > ?)" % (
+                    ", ".join(["?"] * len(chunk))
+                ),
+                list(chunk) + [now]
+            )
+            for key, value in rows:
+                found[key] = six.binary_type(value)
+        return [found.get(key, None) for key in keys]
+
+    def update(self, key, fn, default=None):
+        with self.transaction():
+            return super(SQLiteStorage, self).update(key, fn, default=default)
+
+    def sweep_expired(self, limit=None):
+        # Expired values are never loaded, so this just frees the space.
+        cursor = self.connection.execute(
+            "DELETE FROM storage WHERE key IN "
+            "(SELECT key FROM storage WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+            (time.time(), -1 if limit is None else limit)
+        )
+        return cursor.rowcount
+
+    def zset_add(self, key, member, score):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sorted_sets (key, member, score) VALUES (?, ?, ?)",
+            (key, member, score)
+        )
+
+    def zset_remove(self, key, member):
+        self.connection.execute("DELETE FROM sorted_sets WHERE key = ? AND member = ?", (key, member))
+
+    def zset_range_by_score(self, key, min_score=None, max_score=None):
+        return self.connection.execute(
+            "SELECT member, score FROM sorted_sets WHERE key = ? AND score >= ? AND score <= ? "
+            "ORDER BY score, member",
+            (
+                key,
+                float("-inf") if min_score is None else min_score,
+                float("inf") if max_score is None else max_score,
+            )
+        ).fetchall()
+
+    def zset_pop_by_score(self, key, max_score):
+        with self.transaction() as conn:
+            popped = self.zset_range_by_score(key, max_score=max_score)
+            conn.execute("DELETE FROM sorted_sets WHERE key = ? AND score <= ?", (key, max_score))
+        return popped
+
+    def clear(self, key):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM storage WHERE key = ?", (key,))
+            conn.execute("DELETE FROM sorted_sets WHERE key = ?", (key,))
+
+    def clear_all_keys(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM storage")
+            conn.execute("DELETE FROM sorted_sets")
+
+    def size(self):
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        return sizeof_fmt(page_count * page_size)
+
+
+def bootstrap(settings):
+    return SQLiteStorage(settings)
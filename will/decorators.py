@@ -1,3 +1,5 @@
+import re
+
 
 def deprecation_warning_for_admin(f):
     err = (
@@ -84,6 +86,85 @@ def hear(regex, include_me=False, case_sensitive=False, multiline=False, admin_o
     return wrap
 
 
+def command_regex(names, args=[], stop_at=None):
+    """
+    The regex a @command listens with, for help, fuzzy matching, and filling in its args.
+    """
+    if stop_at:
+        word = "[^\\s%s]*" % re.escape(stop_at)
+        rest = "(?P<%s>[^%s]*?)\\s*(?:[%s].*)?$"
+        # So "!teams?" is still !teams.
+        end_of_name = "(?=[\\s%s]|$)" % re.escape(stop_at)
+    else:
+        word = "\\S*"
+        rest = "(?P<%s>.*?)\\s*$"
+        end_of_name = "(?=\\s|$)"
+    pattern = "^(?:%s)%s\\s*" % ("|".join([re.escape(n) for n in names]), end_of_name)
+    for a in args[:-1]:
+        pattern += "(?P<%s>%s)\\s*" % (a, word)
+    if args:
+        if stop_at:
+            pattern += rest % (args[-1], re.escape(stop_at), re.escape(stop_at))
+        else:
+            pattern += rest % args[-1]
+    return pattern
+
+
+def command(*names, **options):
+    """
+    Listens for messages that start with one of names, like @command("!phone", "!number").
+
+    Commands are looked up by their first word, without running any regexes, so they're
+    a fast way to add lots of explicit commands.  Whatever follows the command is split on
+    whitespace into args, with the last one getting the rest of the line.  Anything after
+    one of the stop_at characters is ignored:
+
+        @command("!phone", args=["pco_name"], stop_at="'?")
+        def phone(self, message, pco_name):
+            ...
+
+    Also takes direct_mentions_only (default False), and include_me, case_sensitive,
+    admin_only and acl, like @hear and @respond_to.
+    """
+    args = options.pop("args", [])
+    stop_at = options.pop("stop_at", None)
+    direct_mentions_only = options.pop("direct_mentions_only", False)
+    include_me = options.pop("include_me", False)
+    case_sensitive = options.pop("case_sensitive", False)
+    admin_only = options.pop("admin_only", False)
+    acl = options.pop("acl", set())
+    if options:
+        raise TypeError("@command got unexpected arguments: %s" % ", ".join(options.keys()))
+    if not names:
+        raise TypeError("@command needs at least one command to listen for.")
+
+    def wrap(f):
+        if admin_only:
+            f.warnings = deprecation_warning_for_admin(f)
+
+        def wrapped_f(*args, **kwargs):
+            f(*args, **kwargs)
+        wrapped_f.will_fn_metadata = getattr(f, "will_fn_metadata", {})
+        wrapped_f.will_fn_metadata["command_names"] = names
+        wrapped_f.will_fn_metadata["command_stop_at"] = stop_at
+        wrapped_f.will_fn_metadata["listener_regex"] = command_regex(names, args, stop_at)
+        wrapped_f.will_fn_metadata["case_sensitive"] = case_sensitive
+        # So a command on the first line of a longer message still works.
+        wrapped_f.will_fn_metadata["multiline"] = True
+        wrapped_f.will_fn_metadata["listens_only_to_direct_mentions"] = direct_mentions_only
+        wrapped_f.will_fn_metadata["listens_only_to_admin"] = admin_only
+        wrapped_f.will_fn_metadata["listener_includes_me"] = include_me
+        wrapped_f.will_fn_metadata["listens_to_messages"] = True
+        wrapped_f.will_fn_metadata["listener_args"] = []
+        wrapped_f.will_fn_metadata["__doc__"] = f.__doc__
+        wrapped_f.will_fn_metadata["listeners_acl"] = acl
+        if getattr(f, "warnings", None):
+            wrapped_f.will_fn_metadata["warnings"] = getattr(f, "warnings")
+
+        return wrapped_f
+    return wrap
+
+
 def randomly(start_hour=0, end_hour=23, day_of_week="*", num_times_per_day=1):
     def wrap(f):
 
@@ -0,0 +1,152 @@
+import functools
+import logging
+import threading
+import traceback
+
+try:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    asyncio = None
+
+from will import settings
+from will.abstractions import Event
+from will.metrics import epoch_seconds
+
+
+class AsyncioEngine(object):
+    """
+    Runs the message pipeline inside one process, for ENGINE = "asyncio".
+
+    Incoming messages are handled in a single asyncio event loop.  Analysis and generation
+    backends are called directly on a thread pool, with the usual timeouts, and their
+    results are handed straight on to execution - no pubsub round trips or pickling in
+    between.  IO adapters, the scheduler and the web server run as threads alongside,
+    talking to it through the in-memory pubsub, and plugins run on the thread-mode
+    execution pool.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.loop = None
+        self.executor = None
+
+    def run(self):
+        if asyncio is None:
+            logging.critical('ENGINE = "asyncio" needs Python 3.  Use the default engine instead.')
+            return
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.executor = ThreadPoolExecutor(max_workers=getattr(settings, "ENGINE_THREADS", 8))
+        self.loop.set_default_executor(self.executor)
+
+        self.bot.setup_event_handler()
+        self.bot.pubsub.subscribe(["message.*", ])
+        self.listener_thread = threading.Thread(target=self.watch_pubsub)
+        self.listener_thread.daemon = True
+        self.listener_thread.start()
+
+        self.loop.call_soon(self.tick)
+        self.loop.run_forever()
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+    def watch_pubsub(self):
+        # Replies, no_responses, and new messages from the IO adapters.
+        for event in self.bot.pubsub.iter_messages():
+            if hasattr(event, "type"):
+                self.loop.call_soon_threadsafe(self.handle_event, event)
+
+    def tick(self):
+        # Reply timeouts and metrics saves, same as the event handler's loop.
+        try:
+            self.bot.sweep_expired_events()
+            self.bot.save_metrics()
+        except:
+            logging.exception("Error handling message")
+
+        wait = self.bot.seconds_until_next_deadline()
+        if wait is None or wait > 1:
+            wait = 1
+        self.loop.call_later(wait, self.tick)
+
+    def handle_event(self, event):
+        try:
+            if event.type == "message.incoming":
+                self.start_analysis(event)
+            else:
+                self.bot.handle_event(event)
+        except:
+            logging.exception("Error handling message")
+
+    def start_analysis(self, event):
+        logging.info("%s - %s" % (event.type, event.original_incoming_event_hash))
+        self.bot.count_event(event.type)
+        event.stage_timestamps = {"incoming": epoch_seconds(event.timestamp)}
+
+        # What analysis backends get from analysis.start in the multi-process engine.
+        analysis_event = Event(
+            type="analysis.start",
+            data=event.data,
+            original_incoming_event_hash=event.original_incoming_event_hash,
+        )
+        self.fan_out(
+            "analysis",
+            [functools.partial(b.do_analyze, analysis_event) for b in self.bot.analysis_instances],
+            self.bot.analysis_timeout,
+            lambda result: self.bot.add_analysis(event, result),
+            lambda: self.start_generation(event),
+        )
+
+    def start_generation(self, event):
+        self.bot.stamp_stage(event, "analysis")
+        self.fan_out(
+            "generation",
+            [functools.partial(b.generate, event) for b in self.bot.generation_instances],
+            self.bot.generation_timeout,
+            lambda result: self.bot.add_generation_options(event, result),
+            lambda: self.bot.execute_event(event.original_incoming_event_hash, event),
+        )
+
+    def fan_out(self, stage, calls, timeout_ms, on_result, on_done):
+        """
+        Runs calls on the thread pool, handing each result to on_result as it arrives, then
+        calls on_done when they've all finished or timeout_ms passes, whichever is first.
+        Anything that finishes after that is dropped, like late results from pubsub.
+        """
+        state = {"pending": len(calls), "done": False}
+
+        def finish(timed_out=False):
+            if state["done"]:
+                return
+            state["done"] = True
+            timeout_handle.cancel()
+            if timed_out:
+                logging.info("%s timed out with %s results." % (stage.title(), len(calls) - state["pending"]))
+                self.bot.count_event("%s.timeout" % stage)
+            try:
+                on_done()
+            except:
+                logging.exception("Error handling message")
+
+        def collect(future):
+            if state["done"]:
+                return
+            try:
+                on_result(future.result())
+            except:
+                logging.critical("Error completing %s: \n%s" % (stage, traceback.format_exc()))
+            state["pending"] -= 1
+            if state["pending"] <= 0:
+                finish()
+
+        timeout_handle = self.loop.call_later(timeout_ms / 1000.0, finish, True)
+        for c in calls:
+            self.loop.run_in_executor(None, c).add_done_callback(collect)
+        if not calls:
+            finish()
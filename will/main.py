@@ -2,6 +2,7 @@
 
 import copy
 import datetime
+import heapq
 import imp
 from importlib import import_module
 import inspect
@@ -28,10 +29,15 @@ import bottle
 from will import settings
 from will.backends import analysis, execution, generation, io_adapters
 from will.backends.io_adapters.base import Event
+from will.backends.execution.pool import ExecutionWorkerPool
+from will.backends.generation.fuzzy_index import FuzzyChoiceIndex, compile_fuzzy_regexes
+from will.backends.generation.listener_index import ListenerIndex
+from will.engine import AsyncioEngine
+from will.metrics import Metrics, epoch_seconds
 from will.mixins import ScheduleMixin, StorageMixin, ErrorMixin, SleepMixin,\
     PluginModulesLibraryMixin, EmailMixin, PubSubMixin
 from will.scheduler import Scheduler
-from will.utils import show_valid, show_invalid, error, warn, note, print_head, Bunch
+from will.utils import show_valid, show_invalid, error, warn, note, print_head, Bunch, load_plugin_module, spawn
 
 
 # Force UTF8
@@ -129,6 +135,12 @@ class WillBot(EmailMixin, StorageMixin, ScheduleMixin, PubSubMixin, SleepMixin,
     def bootstrap(self):
         print_head()
         self.load_config()
+        self.engine = None
+        if getattr(settings, "ENGINE", "processes") == "asyncio":
+            # Everything shares one process, so stages talk in memory, and plugins run on threads.
+            settings.PUBSUB_BACKEND = "memory"
+            settings.EXECUTION_WORKER_MODE = "thread"
+            self.engine = AsyncioEngine(self)
         self.bootstrap_storage_mixin()
         self.bootstrap_pubsub_mixin()
         self.bootstrap_plugins()
@@ -149,13 +161,16 @@ class WillBot(EmailMixin, StorageMixin, ScheduleMixin, PubSubMixin, SleepMixin,
             # signal.signal(signal.SIGTERM, self.handle_sys_exit)
 
             # Scheduler
-            self.scheduler_thread = Process(target=self.bootstrap_scheduler)
+            self.scheduler_thread = spawn(target=self.bootstrap_scheduler)
 
             # Bottle
-            self.bottle_thread = Process(target=self.bootstrap_bottle)
+            self.bottle_thread = spawn(target=self.bootstrap_bottle)
 
             # Event handler
-            self.incoming_event_thread = Process(target=self.bootstrap_event_handler)
+            if self.engine:
+                self.incoming_event_thread = spawn(target=self.engine.run)
+            else:
+                self.incoming_event_thread = Process(target=self.bootstrap_event_handler)
 
             self.io_threads = []
             self.analysis_threads = []
@@ -428,6 +443,7 @@ To set your %(name)s:
     def bootstrap_execution(self):
         missing_setting_error_messages = []
         self.execution_backends = []
+        self.execution_pool = ExecutionWorkerPool.from_settings()
         self.running_execution_threads = []
         execution_backends = getattr(settings, "EXECUTION_BACKENDS", ["will.backends.execution.all", ])
         for b in execution_backends:
@@ -503,6 +519,12 @@ To set your %(name)s:
                 os.environ["WILL_SECRET_KEY"] = ""
                 os.environ["WILL_EPHEMERAL_SECRET_KEY"] = ""
 
+            if getattr(self, "engine", None):
+                # Everything else is a daemon thread, and goes when we do.
+                self.engine.stop()
+                print(". done.\n")
+                return
+
             if hasattr(self, "scheduler_thread") and self.scheduler_thread:
                 try:
                     self.scheduler_thread.terminate()
@@ -570,122 +592,261 @@ To set your %(name)s:
 
     @yappi_profile(return_callback=yappi_aggregate)
     def bootstrap_event_handler(self):
-        self.analysis_timeout = getattr(settings, "ANALYSIS_TIMEOUT_MS", 2000)
-        self.generation_timeout = getattr(settings, "GENERATION_TIMEOUT_MS", 2000)
         self.pubsub.subscribe(["message.*", "analysis.*", "generation.*"])
-
-        # TODO: change this to the number of running analysis threads
-        num_analysis_threads = len(settings.ANALYZE_BACKENDS)
-        num_generation_threads = len(settings.GENERATION_BACKENDS)
-        analysis_threads = {}
-        generation_threads = {}
+        self.setup_event_handler()
 
         while True:
             try:
-                event = self.pubsub.get_message()
+                event = self.pubsub.get_message(timeout=self.seconds_until_next_deadline())
                 if event and hasattr(event, "type"):
-                    now = datetime.datetime.now()
-                    logging.info("%s - %s" % (event.type, event.original_incoming_event_hash))
-                    logging.debug("\n\n *** Event (%s): %s\n\n" % (event.type, event))
-
-                    # TODO: Order by most common.
-                    if event.type == "message.incoming":
-                        # A message just got dropped off one of the IO Backends.
-                        # Send it to analysis.
-
-                        analysis_threads[event.original_incoming_event_hash] = {
-                            "count": 0,
-                            "timeout_end": now + datetime.timedelta(seconds=self.analysis_timeout / 1000),
-                            "original_incoming_event": event,
-                            "working_event": event,
-                        }
-                        self.pubsub.publish("analysis.start", event.data.original_incoming_event, reference_message=event)
-
-                    elif event.type == "analysis.complete":
-                        q = analysis_threads[event.original_incoming_event_hash]
-                        q["working_event"].update({"analysis": event.data})
-                        q["count"] += 1
-                        logging.info("Analysis for %s:  %s/%s" % (event.original_incoming_event_hash, q["count"], num_analysis_threads))
-
-                        if q["count"] >= num_analysis_threads or now > q["timeout_end"]:
-                            # done, move on.
-                            generation_threads[event.original_incoming_event_hash] = {
-                                "count": 0,
-                                "timeout_end": (
-                                    now +
-                                    datetime.timedelta(seconds=self.generation_timeout / 1000)
-                                ),
-                                "original_incoming_event": q["original_incoming_event"],
-                                "working_event": q["working_event"],
-                            }
-                            try:
-                                del analysis_threads[event.original_incoming_event_hash]
-                            except:
-                                pass
-                            self.pubsub.publish("generation.start", q["working_event"], reference_message=q["original_incoming_event"])
-
-                    elif event.type == "generation.complete":
-                        q = generation_threads[event.original_incoming_event_hash]
-                        if not hasattr(q["working_event"], "generation_options"):
-                            q["working_event"].generation_options = []
-                        if hasattr(event, "data") and len(event.data) > 0:
-                            for d in event.data:
-                                q["working_event"].generation_options.append(d)
-                        q["count"] += 1
-                        logging.info("Generation for %s:  %s/%s" % (event.original_incoming_event_hash, q["count"], num_generation_threads))
-
-                        if q["count"] >= num_generation_threads or now > q["timeout_end"]:
-                            # done, move on to execution.
-                            for b in self.execution_backends:
-                                try:
-                                    logging.info("Executing for %s on %s" % (b, event.original_incoming_event_hash))
-                                    b.handle_execution(q["working_event"])
-                                except:
-                                    logging.critical(
-                                        "Error running %s for %s.  \n\n%s\nContinuing...\n" % (
-                                            b,
-                                            event.original_incoming_event_hash,
-                                            traceback.format_exc()
-                                        )
-                                    )
-                                    break
-                            try:
-                                del generation_threads[event.original_incoming_event_hash]
-                            except:
-                                pass
-
-                    elif event.type == "message.no_response":
-                        logging.info("Publishing no response for %s" % (event.original_incoming_event_hash,))
-                        logging.info(event.data.__dict__)
-                        try:
-                            self.publish("message.outgoing.%s" % event.data.backend, event)
-                        except:
-                            logging.critical(
-                                "Error publishing no_response for %s.  \n\n%s\nContinuing...\n" % (
-                                    event.original_incoming_event_hash,
-                                    traceback.format_exc()
-                                )
-                            )
-                            pass
-                    elif event.type == "message.not_allowed":
-                        logging.info("Publishing not allowed for %s" % (event.original_incoming_event_hash,))
-                        try:
-                            self.publish("message.outgoing.%s" % event.data.backend, event)
-                        except:
-                            logging.critical(
-                                "Error publishing not_allowed for %s.  \n\n%s\nContinuing...\n" % (
-                                    event.original_incoming_event_hash,
-                                    traceback.format_exc()
-                                )
-                            )
-                            pass
-                else:
-                    self.sleep_for_event_loop()
+                    self.handle_event(event)
+                self.sweep_expired_events()
+                self.save_metrics()
             # except KeyError:
             #     pass
             except:
                 logging.exception("Error handling message")
 
+    def setup_event_handler(self):
+        self.analysis_timeout = getattr(settings, "ANALYSIS_TIMEOUT_MS", 2000)
+        self.generation_timeout = getattr(settings, "GENERATION_TIMEOUT_MS", 2000)
+
+        # TODO: change this to the number of running analysis threads
+        self.num_analysis_threads = len(settings.ANALYZE_BACKENDS)
+        self.num_generation_threads = len(settings.GENERATION_BACKENDS)
+
+        # Messages waiting on analysis or generation, keyed by original_incoming_event_hash,
+        # and a heap of (timeout_end, hash, stage) so we can move them on the moment they time out.
+        self.analysis_in_flight = {}
+        self.generation_in_flight = {}
+        self.in_flight_deadlines = []
+
+        # Executed messages we're timing until their first reply goes out.
+        self.metrics_enabled = getattr(settings, "METRICS_ENABLED", True)
+        self.response_timeout = getattr(settings, "METRICS_RESPONSE_TIMEOUT_MS", 60000)
+        self.metrics_save_interval = getattr(settings, "METRICS_SAVE_INTERVAL", 5)
+        self.response_in_flight = {}
+        self.metrics = Metrics(window=getattr(settings, "METRICS_WINDOW", 1000))
+        self.metrics_saved_at = 0
+        self.metrics_dirty = False
+
+    def seconds_until_next_deadline(self):
+        deadlines = []
+        if self.in_flight_deadlines:
+            deadlines.append(self.in_flight_deadlines[0][0])
+        if getattr(self, "metrics_dirty", False):
+            deadlines.append(self.metrics_saved_at + self.metrics_save_interval)
+        if not deadlines:
+            return None
+        return max(min(deadlines) - time.time(), 0.001)
+
+    def track_in_flight(self, stage, event_hash, original_incoming_event, working_event, timeout_ms):
+        timeout_end = time.time() + timeout_ms / 1000.0
+        in_flight = getattr(self, "%s_in_flight" % stage)
+        in_flight[event_hash] = {
+            "count": 0,
+            "timeout_end": timeout_end,
+            "original_incoming_event": original_incoming_event,
+            "working_event": working_event,
+        }
+        heapq.heappush(self.in_flight_deadlines, (timeout_end, event_hash, stage))
+
+    def stamp_stage(self, working_event, stage):
+        if not hasattr(working_event, "stage_timestamps"):
+            working_event.stage_timestamps = {}
+        working_event.stage_timestamps[stage] = time.time()
+
+    def count_event(self, name):
+        if getattr(self, "metrics_enabled", False):
+            self.metrics.increment(name)
+            self.metrics_dirty = True
+
+    def finish_response(self, event_hash):
+        q = self.response_in_flight.pop(event_hash)
+        stage_timestamps = q["working_event"]["stage_timestamps"]
+        self.metrics.observe_stage_timestamps(stage_timestamps)
+        if "response" in stage_timestamps:
+            for full_method_name in q["working_event"]["executed_methods"]:
+                self.metrics.observe_plugin(
+                    full_method_name,
+                    max(stage_timestamps["response"] - stage_timestamps["execution"], 0)
+                )
+        self.metrics_dirty = True
+
+    def save_metrics(self, force=False):
+        if not getattr(self, "metrics_enabled", False) or not self.metrics_dirty:
+            return
+        if force or time.time() >= self.metrics_saved_at + self.metrics_save_interval:
+            self.save("will_metrics", self.metrics)
+            self.metrics_saved_at = time.time()
+            self.metrics_dirty = False
+
+    def outgoing_event_hash(self, event):
+        # Replies and says point back at the message they're about via source_message.
+        data = getattr(event, "data", None)
+        for obj in [getattr(data, "source_message", None), data]:
+            if obj is not None and hasattr(obj, "original_incoming_event_hash"):
+                return obj.original_incoming_event_hash
+        return None
+
+    def sweep_expired_events(self):
+        now = time.time()
+        while self.in_flight_deadlines and self.in_flight_deadlines[0][0] <= now:
+            timeout_end, event_hash, stage = heapq.heappop(self.in_flight_deadlines)
+            q = getattr(self, "%s_in_flight" % stage).get(event_hash, None)
+
+            # Anything that finished (or was re-tracked) since is already taken care of.
+            if not q or q["timeout_end"] != timeout_end:
+                continue
+
+            if stage == "response":
+                # Nothing got said.  Record what we know, and forget about it.
+                self.count_event("response.timeout")
+                self.finish_response(event_hash)
+                continue
+
+            logging.info("%s timed out for %s with %s results." % (stage.title(), event_hash, q["count"]))
+            self.count_event("%s.timeout" % stage)
+            if stage == "analysis":
+                self.start_generation(event_hash)
+            else:
+                self.start_execution(event_hash)
+
+    def start_generation(self, event_hash):
+        # done, move on.
+        q = self.analysis_in_flight.pop(event_hash)
+        self.stamp_stage(q["working_event"], "analysis")
+        self.track_in_flight(
+            "generation",
+            event_hash,
+            q["original_incoming_event"],
+            q["working_event"],
+            self.generation_timeout,
+        )
+        self.pubsub.publish("generation.start", q["working_event"], reference_message=q["original_incoming_event"])
+
+    def start_execution(self, event_hash):
+        # done, move on to execution.
+        q = self.generation_in_flight.pop(event_hash)
+        self.execute_event(event_hash, q["working_event"])
+
+    def execute_event(self, event_hash, working_event):
+        self.stamp_stage(working_event, "generation")
+        if not hasattr(working_event, "generation_options"):
+            working_event.generation_options = []
+        for b in self.execution_backends:
+            try:
+                logging.info("Executing for %s on %s" % (b, event_hash))
+                b.handle_execution(working_event)
+            except:
+                logging.critical(
+                    "Error running %s for %s.  \n\n%s\nContinuing...\n" % (
+                        b,
+                        event_hash,
+                        traceback.format_exc()
+                    )
+                )
+                break
+        self.stamp_stage(working_event, "execution")
+        self.count_event("execution")
+
+        if getattr(self, "metrics_enabled", False):
+            # Only hang on to what the metrics need while we wait for a reply.
+            self.track_in_flight("response", event_hash, None, {
+                "stage_timestamps": working_event.stage_timestamps,
+                "executed_methods": getattr(working_event, "executed_methods", []),
+            }, self.response_timeout)
+
+    def add_analysis(self, working_event, analysis_result):
+        # Each analysis backend adds its own keys, so don't let the last one in replace the rest.
+        if not isinstance(working_event.get("analysis", None), Bunch):
+            working_event.analysis = Bunch()
+        if analysis_result:
+            working_event.analysis.update(analysis_result)
+
+    def add_generation_options(self, working_event, options):
+        if not hasattr(working_event, "generation_options"):
+            working_event.generation_options = []
+        if options:
+            for d in options:
+                working_event.generation_options.append(d)
+
+    def handle_event(self, event):
+        logging.info("%s - %s" % (event.type, event.original_incoming_event_hash))
+        logging.debug("\n\n *** Event (%s): %s\n\n" % (event.type, event))
+
+        # TODO: Order by most common.
+        if event.type == "message.incoming":
+            # A message just got dropped off one of the IO Backends.
+            # Send it to analysis.
+            self.count_event(event.type)
+            event.stage_timestamps = {"incoming": epoch_seconds(event.timestamp)}
+            self.track_in_flight(
+                "analysis",
+                event.original_incoming_event_hash,
+                event,
+                event,
+                self.analysis_timeout,
+            )
+            self.pubsub.publish("analysis.start", event.data, reference_message=event)
+
+        elif event.type == "analysis.complete":
+            q = self.analysis_in_flight.get(event.original_incoming_event_hash, None)
+            if not q:
+                logging.info("Dropping late analysis for %s." % event.original_incoming_event_hash)
+                return
+            self.add_analysis(q["working_event"], event.data)
+            q["count"] += 1
+            logging.info("Analysis for %s:  %s/%s" % (event.original_incoming_event_hash, q["count"], self.num_analysis_threads))
+
+            if q["count"] >= self.num_analysis_threads:
+                self.start_generation(event.original_incoming_event_hash)
+
+        elif event.type == "generation.complete":
+            q = self.generation_in_flight.get(event.original_incoming_event_hash, None)
+            if not q:
+                logging.info("Dropping late generation for %s." % event.original_incoming_event_hash)
+                return
+            self.add_generation_options(q["working_event"], getattr(event, "data", None))
+            q["count"] += 1
+            logging.info("Generation for %s:  %s/%s" % (event.original_incoming_event_hash, q["count"], self.num_generation_threads))
+
+            if q["count"] >= self.num_generation_threads:
+                self.start_execution(event.original_incoming_event_hash)
+
+        elif event.type.startswith("message.outgoing."):
+            self.count_event("message.outgoing")
+            event_hash = self.outgoing_event_hash(event)
+            if event_hash in getattr(self, "response_in_flight", {}):
+                self.response_in_flight[event_hash]["working_event"]["stage_timestamps"]["response"] = time.time()
+                self.finish_response(event_hash)
+
+        elif event.type == "message.no_response":
+            logging.info("Publishing no response for %s" % (event.original_incoming_event_hash,))
+            logging.info(event.data.__dict__)
+            try:
+                self.publish("message.outgoing.%s" % event.data.backend, event)
+            except:
+                logging.critical(
+                    "Error publishing no_response for %s.  \n\n%s\nContinuing...\n" % (
+                        event.original_incoming_event_hash,
+                        traceback.format_exc()
+                    )
+                )
+                pass
+        elif event.type == "message.not_allowed":
+            logging.info("Publishing not allowed for %s" % (event.original_incoming_event_hash,))
+            try:
+                self.publish("message.outgoing.%s" % event.data.backend, event)
+            except:
+                logging.critical(
+                    "Error publishing not_allowed for %s.  \n\n%s\nContinuing...\n" % (
+                        event.original_incoming_event_hash,
+                        traceback.format_exc()
+                    )
+                )
+                pass
+
     @yappi_profile(return_callback=yappi_aggregate)
     def bootstrap_storage_mixin(self):
         puts("Bootstrapping storage...")
@@ -766,6 +927,10 @@ To set your %(name)s:
     def bootstrap_bottle(self):
         bootstrapped = False
         try:
+            if getattr(settings, "METRICS_ENABLED", True):
+                # Core routes go first, so plugins can still override them.
+                bottle.route("/metrics")(self.metrics_view)
+
             for cls, function_name in self.bottle_routes:
                 instantiated_cls = cls(bot=self)
                 instantiated_fn = getattr(instantiated_cls, function_name)
@@ -781,6 +946,13 @@ To set your %(name)s:
             show_valid("Web server started at %s." % (settings.PUBLIC_URL,))
             bottle.run(host='0.0.0.0', port=settings.HTTPSERVER_PORT, server='cherrypy', quiet=True)
 
+    def metrics_view(self):
+        bottle.response.content_type = "text/plain; version=0.0.4; charset=utf-8"
+        metrics = self.load("will_metrics", None)
+        if not metrics:
+            metrics = Metrics()
+        return metrics.render_prometheus(generation_caches=self.hash_all("will_generation_cache"))
+
     @yappi_profile(return_callback=yappi_aggregate)
     def bootstrap_io(self):
         # puts("Bootstrapping IO...")
@@ -801,7 +973,7 @@ To set your %(name)s:
                         c = cls()
 
                         if hasattr(c, "stdin_process") and c.stdin_process:
-                            thread = Process(
+                            thread = spawn(
                                 target=c._start,
                                 args=(b,),
                             )
@@ -809,7 +981,7 @@ To set your %(name)s:
                             self.has_stdin_io_backend = True
                             self.io_threads.append(thread)
                         else:
-                            thread = Process(
+                            thread = spawn(
                                 target=c._start,
                                 args=(
                                     b,
@@ -829,6 +1001,7 @@ To set your %(name)s:
 
         self.analysis_backends = []
         self.analysis_threads = []
+        self.analysis_instances = []
 
         for b in settings.ANALYZE_BACKENDS:
             module = import_module(b)
@@ -840,13 +1013,19 @@ To set your %(name)s:
                         class_name != "AnalysisBackend"
                     ):
                         c = cls()
-                        thread = Process(
-                            target=c.start,
-                            args=(b,),
-                            kwargs={"bot": self},
-                        )
-                        thread.start()
-                        self.analysis_threads.append(thread)
+                        if getattr(self, "engine", None):
+                            # The engine calls do_analyze itself.
+                            c.bot = self
+                            c.name = b
+                            self.analysis_instances.append(c)
+                        else:
+                            thread = Process(
+                                target=c.start,
+                                args=(b,),
+                                kwargs={"bot": self},
+                            )
+                            thread.start()
+                            self.analysis_threads.append(thread)
                         show_valid("Analysis: %s Backend started." % cls.__name__)
                 except Exception as e:
                     self.startup_error("Error bootstrapping %s io" % b, e)
@@ -858,6 +1037,7 @@ To set your %(name)s:
     def bootstrap_generation(self):
         self.generation_backends = []
         self.generation_threads = []
+        self.generation_instances = []
 
         for b in settings.GENERATION_BACKENDS:
             module = import_module(b)
@@ -869,13 +1049,19 @@ To set your %(name)s:
                         class_name != "GenerationBackend"
                     ):
                         c = cls()
-                        thread = Process(
-                            target=c.start,
-                            args=(b,),
-                            kwargs={"bot": self},
-                        )
-                        thread.start()
-                        self.generation_threads.append(thread)
+                        if getattr(self, "engine", None):
+                            # The engine calls do_generate itself.
+                            c.bot = self
+                            c.name = b
+                            self.generation_instances.append(c)
+                        else:
+                            thread = Process(
+                                target=c.start,
+                                args=(b,),
+                                kwargs={"bot": self},
+                            )
+                            thread.start()
+                            self.generation_threads.append(thread)
                         show_valid("Generation: %s Backend started." % cls.__name__)
                 except Exception as e:
                     self.startup_error("Error bootstrapping %s io" % b, e)
@@ -915,10 +1101,10 @@ To set your %(name)s:
                                 # Don't even *try* to load a blacklisted module.
                                 if not blacklisted:
                                     try:
-                                        plugin_modules[full_module_name] = imp.load_source(module_name, module_path)
+                                        plugin_modules[full_module_name] = load_plugin_module(module_name, module_path)
 
                                         parent_root = os.path.join(root, "__init__.py")
-                                        parent = imp.load_source(parent_mod, parent_root)
+                                        parent = load_plugin_module(parent_mod, parent_root)
                                         parent_help_text = getattr(parent, "MODULE_DESCRIPTION", parent_help_text)
                                     except:
                                         # If it's blacklisted, don't worry if this blows up.
@@ -965,6 +1151,9 @@ To set your %(name)s:
 
             # Sift and Sort.
             self.message_listeners = {}
+            self.command_registry = {}
+            # Every command's stop_at characters, which can end the first word of a command.
+            self.command_stop_at = ""
             self.periodic_tasks = []
             self.random_tasks = []
             self.bottle_routes = []
@@ -1066,8 +1255,21 @@ To set your %(name)s:
                                                     "direct_mentions_only": meta["listens_only_to_direct_mentions"],
                                                     "admin_only": meta["listens_only_to_admin"],
                                                     "acl": meta["listeners_acl"],
+                                                    "execute_in_own_process": getattr(
+                                                        plugin_info["class"], "execute_in_own_process", False
+                                                    ),
                                                     "plugin_info": cleaned_info,
+                                                    "command_names": meta.get("command_names", None),
                                                 }
+                                                for command_name in meta.get("command_names", None) or []:
+                                                    # Keyed by first word, to match the first word of a message.
+                                                    key = command_name.split()[0]
+                                                    if not meta["case_sensitive"]:
+                                                        key = key.lower()
+                                                    self.command_registry.setdefault(key, []).append(full_method_name)
+                                                for c in meta.get("command_stop_at", None) or "":
+                                                    if c not in self.command_stop_at:
+                                                        self.command_stop_at += c
                                                 if meta["listener_includes_me"]:
                                                     self.some_listeners_include_me = True
                                             elif "periodic_task" in meta and meta["periodic_task"]:
@@ -1096,5 +1298,29 @@ To set your %(name)s:
                                 show_valid(plugin_name)
                 except Exception as e:
                     self.startup_error("Error bootstrapping %s" % (plugin_info["class"],), e)
+            self.listener_index = ListenerIndex(self.message_listeners)
+            self.fuzzy_choice_index = FuzzyChoiceIndex(self.message_listeners)
             self.save("all_listener_regexes", self.all_listener_regexes)
         puts("")
+        self.bootstrap_fuzzy_regexes()
+
+    def bootstrap_fuzzy_regexes(self):
+        # Fuzzy regexes are slow to compile, so do it once, here, and let the generation
+        # processes inherit them when they fork.
+        self.fuzzy_regexes = {}
+        if not [b for b in getattr(settings, "GENERATION_BACKENDS", []) if "fuzzy" in b]:
+            return
+
+        puts("Compiling fuzzy regexes...")
+        with indent(2):
+            allowable_errors = getattr(settings, "FUZZY_REGEX_ALLOWABLE_ERRORS", 3)
+            self.fuzzy_regexes, timings, failures = compile_fuzzy_regexes(self.message_listeners, allowable_errors)
+            show_valid("%s compiled in %.2fs" % (len(self.fuzzy_regexes), sum(timings.values())))
+            slow = [(t, name) for name, t in timings.items() if t >= 0.1 and name not in failures]
+            for t, name in sorted(slow, reverse=True):
+                warn("%s took %.2fs" % (name, t))
+            for name, tb in failures.items():
+                show_invalid(name)
+                with indent(2):
+                    puts(tb)
+        puts("")
@@ -0,0 +1,138 @@
+import collections
+import time
+
+# The order messages move through the pipeline, and the name of the time spent getting to each stage.
+PIPELINE_STAGES = ["incoming", "analysis", "generation", "execution", "response"]
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+def epoch_seconds(dt):
+    # Events are timestamped with naive, local datetimes.
+    return time.mktime(dt.timetuple()) + dt.microsecond / 1000000.0
+
+
+def _escape_label(value):
+    return ("%s" % value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value):
+    return repr(float(value))
+
+
+class LatencySummary(object):
+    """
+    Running count and sum of latency observations, plus a window of the most recent
+    ones to read quantiles from.
+    """
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = 0.0
+        self.samples = collections.deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = int(round(q * (len(ordered) - 1)))
+        return ordered[index]
+
+
+class Metrics(object):
+    """
+    Per-stage and per-plugin latencies, and event counters, for the message pipeline.
+    Lives in the event handler, and is saved to storage so the web server can serve it.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.started_at = time.time()
+        self.stage_latencies = collections.OrderedDict()
+        self.plugin_latencies = {}
+        self.counters = {}
+
+    def observe_stage(self, stage, seconds):
+        if stage not in self.stage_latencies:
+            self.stage_latencies[stage] = LatencySummary(window=self.window)
+        self.stage_latencies[stage].observe(seconds)
+
+    def observe_plugin(self, full_method_name, seconds):
+        if full_method_name not in self.plugin_latencies:
+            self.plugin_latencies[full_method_name] = LatencySummary(window=self.window)
+        self.plugin_latencies[full_method_name].observe(seconds)
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe_stage_timestamps(self, stage_timestamps):
+        """Records the time spent reaching each stage an event got through."""
+        previous = None
+        for stage in PIPELINE_STAGES:
+            if stage not in stage_timestamps:
+                continue
+            if previous:
+                self.observe_stage(stage, max(stage_timestamps[stage] - stage_timestamps[previous], 0))
+            previous = stage
+        if "incoming" in stage_timestamps and previous != "incoming":
+            self.observe_stage("total", max(stage_timestamps[previous] - stage_timestamps["incoming"], 0))
+
+    def _render_summaries(self, lines, name, help_text, label, summaries):
+        lines.append("# HELP %s %s" % (name, help_text))
+        lines.append("# TYPE %s summary" % name)
+        for key in sorted(summaries.keys()):
+            summary = summaries[key]
+            label_str = '%s="%s"' % (label, _escape_label(key))
+            for q in QUANTILES:
+                lines.append('%s{%s,quantile="%s"} %s' % (name, label_str, q, _format_float(summary.quantile(q))))
+            lines.append("%s_sum{%s} %s" % (name, label_str, _format_float(summary.total)))
+            lines.append("%s_count{%s} %s" % (name, label_str, summary.count))
+
+    def _render_generation_caches(self, lines, generation_caches):
+        for count, help_text in [
+            ("hits", "Messages a generation backend found in its cache."),
+            ("misses", "Messages a generation backend had to match against every listener."),
+        ]:
+            name = "will_generation_cache_%s_total" % count
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s counter" % name)
+            for backend in sorted(generation_caches.keys()):
+                lines.append('%s{backend="%s"} %s' % (
+                    name, _escape_label(backend), generation_caches[backend].get(count, 0)
+                ))
+
+    def render_prometheus(self, generation_caches=None):
+        """
+        Renders everything in the Prometheus text exposition format.  generation_caches is
+        a dict of each generation backend to its cache's hits and misses.
+        """
+        lines = []
+        self._render_summaries(
+            lines,
+            "will_stage_latency_seconds",
+            "Time messages spend getting to each stage of the pipeline.",
+            "stage",
+            self.stage_latencies,
+        )
+        self._render_summaries(
+            lines,
+            "will_plugin_latency_seconds",
+            "Time from a plugin being dispatched to its first reply.",
+            "plugin",
+            self.plugin_latencies,
+        )
+        lines.append("# HELP will_events_total Events seen by the event handler.")
+        lines.append("# TYPE will_events_total counter")
+        for name in sorted(self.counters.keys()):
+            lines.append('will_events_total{event="%s"} %s' % (_escape_label(name), self.counters[name]))
+        if generation_caches:
+            self._render_generation_caches(lines, generation_caches)
+        lines.append("# HELP will_metrics_start_time_seconds When these metrics started being collected.")
+        lines.append("# TYPE will_metrics_start_time_seconds gauge")
+        lines.append("will_metrics_start_time_seconds %s" % _format_float(self.started_at))
+        return "\n".join(lines) + "\n"
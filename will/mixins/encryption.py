@@ -1,11 +1,73 @@
+import base64
 import importlib
 import logging
 import dill as pickle
 import functools
+import six
+import traceback
+import zlib
 from will import settings
 
+# Values we encode start with one of these, followed by a one-byte serializer tag.  Older
+# values (dill, base64'd, and maybe encrypted by encrypt_to_b64) never start with either.
+MAGIC = b"\xffW"
+ENCRYPTED_MAGIC = b"\xffE"
+# Compressed values, followed by a one-byte compressor tag.  Compression happens before
+# encryption, so this is only ever seen bare if encryption's off.
+COMPRESSED_MAGIC = b"\xffZ"
+# Encoded values for transports that can only take text are base64'd, behind this.
+TEXT_PREFIX = "!W"
+
+SERIALIZERS_BY_TAG = {
+    b"p": "pickle",
+    b"m": "msgpack",
+    b"d": "dill",
+}
+_serializers = {}
+
+COMPRESSORS_BY_TAG = {
+    b"z": "zlib",
+    b"l": "lz4",
+}
+COMPRESSOR_TAGS = dict([(name, tag) for tag, name in COMPRESSORS_BY_TAG.items()])
+
+
+def compress(name, data):
+    if name == "lz4":
+        import lz4.frame
+        return lz4.frame.compress(data)
+    return zlib.compress(data)
+
+
+def decompress(name, data):
+    if name == "lz4":
+        import lz4.frame
+        return lz4.frame.decompress(data)
+    return zlib.decompress(data)
+
+
+def get_serializer(name):
+    if name not in _serializers:
+        # The SERIALIZATION_BACKEND setting points to a specific module namespace
+        # pickle => will.backends.serialization.pickle_serializer
+        module = importlib.import_module("will.backends.serialization.%s_serializer" % name)
+        _serializers[name] = module.bootstrap(settings)
+    return _serializers[name]
+
+
+def is_encoded(value):
+    """True if value was written by encode(), rather than an older version of Will."""
+    if isinstance(value, six.text_type):
+        return value.startswith(TEXT_PREFIX)
+    if isinstance(value, (bytes, bytearray)):
+        return value[:2] in (MAGIC, ENCRYPTED_MAGIC, COMPRESSED_MAGIC, TEXT_PREFIX.encode("ascii"))
+    return False
+
 
 class EncryptionMixin(object):
+    # Whether the transport/storage can take arbitrary bytes.  If not, values are base64'd.
+    binary_safe = False
+
     @property
     def encryption_backend(self):
         if not hasattr(self, "_encryption"):
@@ -29,3 +91,62 @@ class EncryptionMixin(object):
         if enc:
             return self.encryption_backend.decrypt_from_b64(enc)
         return None
+
+    def encode(self, obj):
+        """
+        Serializes obj with SERIALIZATION_BACKEND (falling back to dill for anything it
+        can't handle), compresses it if it's over COMPRESSION_THRESHOLD bytes, and
+        encrypts it if ENABLE_INTERNAL_ENCRYPTION is on.
+        """
+        serializer = get_serializer(getattr(settings, "SERIALIZATION_BACKEND", "pickle"))
+        try:
+            frame = MAGIC + serializer.tag + serializer.dumps(obj)
+        except Exception:
+            logging.debug("Falling back to dill for %s:\n%s" % (type(obj), traceback.format_exc()))
+            serializer = get_serializer("dill")
+            frame = MAGIC + serializer.tag + serializer.dumps(obj)
+
+        frame = self.compress_frame(frame)
+
+        if getattr(settings, "ENABLE_INTERNAL_ENCRYPTION", False):
+            try:
+                frame = ENCRYPTED_MAGIC + self.encryption_backend.encrypt_bytes(frame)
+            except NotImplementedError:
+                # An encryption backend that only knows the old way.
+                return self.encrypt(obj)
+
+        if self.binary_safe:
+            return frame
+        return TEXT_PREFIX + base64.b64encode(frame).decode("ascii")
+
+    def decode(self, value):
+        if not value:
+            return None
+        if not is_encoded(value):
+            return self.decrypt(value)
+
+        if isinstance(value, six.text_type):
+            value = value.encode("ascii")
+        if value[:2] == TEXT_PREFIX.encode("ascii"):
+            value = base64.b64decode(value[2:])
+        if value[:2] == ENCRYPTED_MAGIC:
+            value = self.encryption_backend.decrypt_bytes(value[2:])
+        if value[:2] == COMPRESSED_MAGIC:
+            value = decompress(COMPRESSORS_BY_TAG[value[2:3]], value[3:])
+        return get_serializer(SERIALIZERS_BY_TAG[value[2:3]]).loads(value[3:])
+
+    def compress_frame(self, frame):
+        threshold = getattr(settings, "COMPRESSION_THRESHOLD", 1024)
+        name = getattr(settings, "COMPRESSION_BACKEND", "zlib")
+        if not name or threshold is None or len(frame) < threshold:
+            return frame
+        try:
+            compressed = COMPRESSED_MAGIC + COMPRESSOR_TAGS[name] + compress(name, frame)
+        except ImportError:
+            logging.warning("%s isn't installed, using zlib instead." % name)
+            settings.COMPRESSION_BACKEND = "zlib"
+            return self.compress_frame(frame)
+        # Already-compact values can come out bigger.
+        if len(compressed) < len(frame):
+            return compressed
+        return frame
@@ -1,3 +1,4 @@
+import calendar
 import datetime
 import logging
 import random
@@ -7,29 +8,63 @@ from apscheduler.triggers.cron import CronTrigger
 from will.mixins.pubsub import PubSubMixin
 
 
+def schedule_score(when):
+    # Seconds since the epoch, so the sorted set keeps tasks in the order they're due.
+    if when.tzinfo is not None:
+        return calendar.timegm(when.utctimetuple()) + when.microsecond / 1e6
+    return time.mktime(when.timetuple()) + when.microsecond / 1e6
+
+
 class ScheduleMixin(PubSubMixin, object):
+    """
+    Scheduled tasks are kept in a hash of task hash to task, and a sorted set of task
+    hash to when it's due, so the scheduler only ever has to look at the tasks that are
+    due, and adding or removing one doesn't touch the others.
+    """
 
     def times_key(self, periodic_list=False):
         if periodic_list:
-            return "will_periodic_times_list"
-        return "will_schedule_times_list"
+            return "will_periodic_times"
+        return "will_schedule_times"
 
     def schedule_key(self, periodic_list=False):
         if periodic_list:
-            return "will_periodic_list"
-        return "will_schedule_list"
+            return "will_periodic_tasks"
+        return "will_schedule_tasks"
 
     def get_schedule_list(self, periodic_list=False):
-        return self.load(self.schedule_key(periodic_list=periodic_list), {})
-
-    def save_schedule_list(self, new_list, periodic_list=False):
-        self.save(self.schedule_key(periodic_list=periodic_list), new_list)
+        """Every scheduled task, by hash."""
+        return self.hash_all(self.schedule_key(periodic_list=periodic_list))
 
     def get_times_list(self, periodic_list=False):
-        return self.load(self.times_key(periodic_list=periodic_list), {})
-
-    def save_times_list(self, new_list, periodic_list=False):
-        return self.save(self.times_key(periodic_list=periodic_list), new_list)
+        """When every scheduled task is due, as seconds since the epoch, by hash."""
+        return dict(self.zset_range_by_score(self.times_key(periodic_list=periodic_list)))
+
+    def pop_due_tasks(self, now, periodic_list=False):
+        """Takes the tasks that are due by now off the schedule, and returns them, soonest first."""
+        schedule_key = self.schedule_key(periodic_list=periodic_list)
+        tasks = []
+        for item_hash, score in self.zset_pop_by_score(self.times_key(periodic_list=periodic_list), schedule_score(now)):
+            item = self.hash_get(schedule_key, item_hash)
+            self.hash_delete(schedule_key, item_hash)
+            if item is not None:
+                tasks.append(item)
+        return tasks
+
+    def clear_schedule(self, periodic_list=False):
+        self.clear(self.schedule_key(periodic_list=periodic_list))
+        self.clear(self.times_key(periodic_list=periodic_list))
+
+    def migrate_schedule(self):
+        # Older Wills saved the whole schedule in one dict, and the times in another.
+        old_list = self.load("will_schedule_list")
+        if old_list:
+            for item in old_list.values():
+                when = item.pop("when")
+                item.pop("hash", None)
+                self.add_to_schedule(when, item)
+        for key in ["will_schedule_list", "will_schedule_times_list", "will_periodic_list", "will_periodic_times_list"]:
+            self.clear(key)
 
     # TODO: Create new version of this that's properly abstracted, instead of get_user_from_message
     def add_direct_message_to_schedule(self, when, content, message, target_user, *args, **kwargs):
@@ -55,25 +90,16 @@ class ScheduleMixin(PubSubMixin, object):
         self.add_to_schedule(when, event, *args, **kwargs)
 
     def add_to_schedule(self, when, item, periodic_list=False, ignore_scheduler_lock=False):
+        # Each task's added on its own, so this never has to wait on the scheduler.
+        # ignore_scheduler_lock is only still here for plugins that pass it.
         try:
-            while (
-                (ignore_scheduler_lock is False and self.load("scheduler_lock", False)) or
-                self.load("scheduler_add_lock", False)
-            ):
-                import sys
-                sys.stdout.write("waiting for lock to clear\n")
-                time.sleep(random.random())
-
-            self.save("scheduler_add_lock", True)
-            sched_list = self.get_schedule_list(periodic_list=periodic_list)
-            times_list = self.get_times_list(periodic_list=periodic_list)
             item["when"] = when
-            item_hash = hash(repr(sorted(item.items())))
+            # A string, since it's a sorted set member.
+            item_hash = "%s" % hash(repr(sorted(item.items())))
             item["hash"] = item_hash
-            sched_list[item_hash] = item
-            times_list[item_hash] = when
-            self.save_schedule_list(sched_list, periodic_list=periodic_list)
-            self.save_times_list(times_list, periodic_list=periodic_list)
+            # The task goes in first, so the scheduler can't find it due before it's there.
+            self.hash_set(self.schedule_key(periodic_list=periodic_list), item_hash, item)
+            self.zset_add(self.times_key(periodic_list=periodic_list), item_hash, schedule_score(when))
 
         except:
             logging.critical(
@@ -81,16 +107,10 @@ class ScheduleMixin(PubSubMixin, object):
                 when,
                 traceback.format_exc()
             )
-        self.save("scheduler_add_lock", False)
 
     def remove_from_schedule(self, item_hash, periodic_list=False):
-        # If this is ever called from anywhere outside the scheduler_lock, it needs its own lock.
-        sched_list = self.get_schedule_list(periodic_list=periodic_list)
-        times_list = self.get_times_list(periodic_list=periodic_list)
-        del sched_list[item_hash]
-        del times_list[item_hash]
-        self.save_schedule_list(sched_list, periodic_list=periodic_list)
-        self.save_times_list(times_list, periodic_list=periodic_list)
+        self.zset_remove(self.times_key(periodic_list=periodic_list), item_hash)
+        self.hash_delete(self.schedule_key(periodic_list=periodic_list), item_hash)
 
     def add_periodic_task(self, module_name, cls_name, function_name, sched_args,
                           sched_kwargs, ignore_scheduler_lock=False):
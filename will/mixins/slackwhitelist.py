@@ -1,11 +1,41 @@
 # Whitelist allows you to configure a list of channels that are whitelisted.
 # Use this to control what commands are allowed to run in a channel
+import logging
+
+# The whitelisted channel ids, kept as a storage set so adding or removing one doesn't
+# rewrite the rest.
+WHITELIST_KEY = "whitelist_channels"
+_migrated = False
+
+
+# Moves a whitelist saved whole, by an older version, into the set.  Once per process.
+def whitelist_migrate(will):
+    global _migrated
+    if _migrated:
+        return
+    old_whitelist = will.load("whitelist")
+    if old_whitelist:
+        for c_id in old_whitelist:
+            will.set_add(WHITELIST_KEY, c_id)
+        # set_add logs storage errors rather than raising, so make sure they all made it
+        # before the old list goes.  We'll try again next time if they didn't.
+        if not set(old_whitelist) <= will.set_members(WHITELIST_KEY):
+            logging.error("Couldn't move the whitelist into %s, keeping the old one for now." % WHITELIST_KEY)
+            return
+    if old_whitelist is not None:
+        will.clear("whitelist")
+    _migrated = True
+
+
+# Returns the whitelisted channel ids.
+def whitelist_channels(will):
+    whitelist_migrate(will)
+    return will.set_members(WHITELIST_KEY)
 
 
 # Initilizes a whitelist if none exists
 def whitelist_init(will):
-    whitelist = []
-    will.save("whitelist", whitelist)
+    whitelist_migrate(will)
     return
 
 
@@ -28,15 +58,14 @@ def whitelist_list(will):
         return
 
 
-# This removes duplicates from the whitelist,
-# and removes DM channels from the whitelist since they're already whitelisted by default.
+# This removes DM channels from the whitelist since they're already whitelisted by default.
 def whitelist_clean(will):
-    white_list = will.load("whitelist")
-    white_list = list(set(white_list))
-    for entry in white_list:
+    white_list = []
+    for entry in whitelist_channels(will):
         if entry.startswith('DB'):
-            white_list.remove(entry)
-    will.save("whitelist", white_list)
+            will.set_remove(WHITELIST_KEY, entry)
+        else:
+            white_list.append(entry)
     return white_list
 
 
@@ -54,10 +83,9 @@ def whitelist_remove(will, channel_name=None):
         if not channel_id:
             will.reply('I coulnd\'t find a channel named "%s"' % channel_name)
         else:
-            white_list = will.load("whitelist")
+            whitelist_migrate(will)
             for c_id in channel_id:
-                white_list.remove(c_id)
-            will.save("whitelist", white_list)
+                will.set_remove(WHITELIST_KEY, c_id)
             will.reply('"%s" channel(s) removed from the whitelist.' % channel_name)
     except Exception as e:
         print(type(e))
@@ -78,15 +106,10 @@ def whitelist_add(will, channel_name=None):
         if not channel_id:
             will.reply('I coulnd\'t find a channel named "%s"' % channel_name)
         else:
-            try:
-                white_list = will.load("whitelist")
-            except:
-                white_list = []
-            finally:
-                for c_id in channel_id:
-                    white_list.append(c_id)
-                will.save("whitelist", white_list)
-                will.reply('"%s" channel(s) added to the whitelist.' % channel_name)
+            whitelist_migrate(will)
+            for c_id in channel_id:
+                will.set_add(WHITELIST_KEY, c_id)
+            will.reply('"%s" channel(s) added to the whitelist.' % channel_name)
     except Exception as e:
         print(type(e))
     return
@@ -98,8 +121,9 @@ def whitelist_add(will, channel_name=None):
 def wl_chan_id(will):
     channel = ""
     try:
-        whitelist = will.load("whitelist")
-        if will.message.data.channel.id not in whitelist and not will.message.data.channel.id.startswith("DB"):
+        whitelist_migrate(will)
+        whitelisted = will.set_contains(WHITELIST_KEY, will.message.data.channel.id)
+        if not whitelisted and not will.message.data.channel.id.startswith("DB"):
             print(will.message.data.channel.id)
             will.reply('The "%s" channel is not whitelisted. So I sent it as a direct message.'
                        % will.message.data.channel.name.title())
@@ -116,8 +140,8 @@ def wl_chan_id(will):
 def wl_check(will):
     result = False
     try:
-        whitelist = will.load("whitelist")
-        if will.message.data.channel.id not in whitelist:
+        whitelist_migrate(will)
+        if not will.set_contains(WHITELIST_KEY, will.message.data.channel.id):
             will.reply('Sorry the "%s" channel is not whitelisted.'
                        % will.message.data.channel.name.title())
             result = False
@@ -169,6 +193,7 @@ def get_slack_archived_channels(will, id_list):
 def whitelist_wipe(will):
     try:
         will.clear("whitelist")
+        will.clear(WHITELIST_KEY)
     except Exception as e:
         print("There isn't a whitelist to clear.")
         will.reply("There isn't a whitelist to clear.")
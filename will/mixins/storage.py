@@ -1,10 +1,17 @@
+import contextlib
+import copy
 import importlib
 import logging
-import dill as pickle
 from will import settings
 from will.abstractions import Person, Event, Channel, Message
 
 
+def storage_cache():
+    # will.storage_cache needs will.mixins itself.
+    from will.storage_cache import get_storage_cache
+    return get_storage_cache()
+
+
 class StorageMixin(object):
     def bootstrap_storage(self):
         if not hasattr(self, "storage"):
@@ -29,9 +36,11 @@ class StorageMixin(object):
     def save(self, key, value, expire=None):
         self.bootstrap_storage()
         try:
-            return self.storage.save(key, pickle.dumps(value), expire=expire)
+            return self.storage.save(key, value, expire=expire)
         except:
             logging.exception("Unable to save %s", key)
+        finally:
+            storage_cache().invalidate(key)
 
     def clear(self, key):
         self.bootstrap_storage()
@@ -39,6 +48,8 @@ class StorageMixin(object):
             return self.storage.clear(key)
         except:
             logging.exception("Unable to clear %s", key)
+        finally:
+            storage_cache().invalidate(key)
 
     def clear_all_keys(self):
         self.bootstrap_storage()
@@ -46,18 +57,102 @@ class StorageMixin(object):
             return self.storage.clear_all_keys()
         except:
             logging.exception("Unable to clear all keys")
+        finally:
+            storage_cache().invalidate()
 
     def load(self, key, default=None):
+        # Keys in STORAGE_CACHE_KEYS are served from memory, if they were loaded recently.
+        cache = storage_cache()
+        cached = cache.ttl(key)
+        if cached:
+            found, val = cache.get(key)
+            if found:
+                return val if val is not None else default
+            generation = cache.generation(key)
+
         self.bootstrap_storage()
         try:
             val = self.storage.load(key)
+            if cached:
+                cache.put(key, val, generation)
             if val is not None:
-                return pickle.loads(val)
+                return val
             return default
         except:
             # logging.exception("Failed to load %s", key)
             return default
 
+    def save_many(self, values, expire=None):
+        # values is a dict of keys to what to save in them, all sent to storage in one go.
+        self.bootstrap_storage()
+        try:
+            return self.storage.save_many(values, expire=expire)
+        except:
+            logging.exception("Unable to save %s", ", ".join(values.keys()))
+        finally:
+            cache = storage_cache()
+            for key in values.keys():
+                cache.invalidate(key)
+
+    def load_many(self, keys, default=None):
+        """
+        Loads several keys from storage in one go, and returns a dict of each key to its value
+        (or a copy of default, if it isn't set, so keys never share a default like {}.)
+        """
+        cache = storage_cache()
+        found = {}
+        generations = {}
+        for key in keys:
+            if cache.ttl(key):
+                hit, val = cache.get(key)
+                if hit:
+                    found[key] = val
+                else:
+                    generations[key] = cache.generation(key)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            self.bootstrap_storage()
+            try:
+                loaded = self.storage.load_many(missing)
+            except:
+                loaded = {}
+            for key in missing:
+                val = loaded.get(key, None)
+                if key in generations and key in loaded:
+                    cache.put(key, val, generations[key])
+                found[key] = val
+
+        return dict([
+            (key, found[key] if found[key] is not None else copy.copy(default)) for key in keys
+        ])
+
+    @contextlib.contextmanager
+    def storage_lock(self, name, ttl=60):
+        """
+        Takes the lock called name, across every Will process, for up to ttl seconds:
+
+            with self.storage_lock("my_lock", 30) as token:
+                if token is None:
+                    # Someone else has it.
+
+        It doesn't wait for the lock.  token goes up every time the lock's taken.
+        """
+        self.bootstrap_storage()
+        token = None
+        try:
+            token = self.storage.acquire_lock(name, ttl)
+        except:
+            logging.exception("Unable to take the %s lock", name)
+        try:
+            yield token
+        finally:
+            if token is not None:
+                try:
+                    self.storage.release_lock(name, token)
+                except:
+                    logging.exception("Unable to release the %s lock", name)
+
     def size(self):
         self.bootstrap_storage()
         try:
@@ -65,20 +160,157 @@ class StorageMixin(object):
         except Exception:
             logging.exception("Failed to get the size of our storage")
 
-    # list specific save/load/clear operations
+    # list specific save/load/clear operations, on a list saved whole with save().
+    # For lists that get long, or busy, use list_push and friends instead.
 
     def pop(self, key, value):
-        tmp_value = self.load(key)
-        if tmp_value is None:
-            pass
-        else:
-            tmp_value.remove(value)
-            self.save(key, tmp_value)
+        def remove(values):
+            if value in values:
+                values.remove(value)
+            return values
+
+        self.bootstrap_storage()
+        try:
+            if self.storage.load(key) is not None:
+                self.storage.update(key, remove, [])
+        except:
+            logging.exception("Unable to pop from %s", key)
+        finally:
+            storage_cache().invalidate(key)
 
     def append(self, key, value, expire=None):
-        tmp_value = self.load(key)
-        if tmp_value is None:
-            self.save(key, [value], expire)
-        else:
-            tmp_value.append(value)
-            self.save(key, tmp_value, expire)
+        if expire is not None:
+            # update() can't set an expiry.
+            tmp_value = self.load(key)
+            self.save(key, (tmp_value or []) + [value], expire)
+            return
+
+        self.bootstrap_storage()
+        try:
+            self.storage.update(key, lambda values: values + [value], [])
+        except:
+            logging.exception("Unable to append to %s", key)
+        finally:
+            storage_cache().invalidate(key)
+
+    # Lists, hashes, sets, sorted sets and counters that the storage backend changes a piece at a time.
+    # Keys used with these should only ever be used with them.
+
+    def list_push(self, key, value):
+        self.bootstrap_storage()
+        try:
+            return self.storage.list_push(key, value)
+        except:
+            logging.exception("Unable to push to %s", key)
+
+    def list_range(self, key, start=0, end=-1):
+        self.bootstrap_storage()
+        try:
+            return self.storage.list_range(key, start, end)
+        except:
+            logging.exception("Unable to load the list at %s", key)
+            return []
+
+    def list_trim(self, key, start, end):
+        self.bootstrap_storage()
+        try:
+            return self.storage.list_trim(key, start, end)
+        except:
+            logging.exception("Unable to trim %s", key)
+
+    def hash_set(self, key, field, value):
+        self.bootstrap_storage()
+        try:
+            return self.storage.hash_set(key, field, value)
+        except:
+            logging.exception("Unable to set %s in %s", field, key)
+
+    def hash_get(self, key, field, default=None):
+        self.bootstrap_storage()
+        try:
+            return self.storage.hash_get(key, field, default)
+        except:
+            logging.exception("Unable to get %s from %s", field, key)
+            return default
+
+    def hash_delete(self, key, field):
+        self.bootstrap_storage()
+        try:
+            return self.storage.hash_delete(key, field)
+        except:
+            logging.exception("Unable to delete %s from %s", field, key)
+
+    def hash_all(self, key):
+        self.bootstrap_storage()
+        try:
+            return self.storage.hash_all(key)
+        except:
+            logging.exception("Unable to load the hash at %s", key)
+            return {}
+
+    def set_add(self, key, member):
+        self.bootstrap_storage()
+        try:
+            return self.storage.set_add(key, member)
+        except:
+            logging.exception("Unable to add to %s", key)
+
+    def set_remove(self, key, member):
+        self.bootstrap_storage()
+        try:
+            return self.storage.set_remove(key, member)
+        except:
+            logging.exception("Unable to remove from %s", key)
+
+    def set_members(self, key):
+        self.bootstrap_storage()
+        try:
+            return self.storage.set_members(key)
+        except:
+            logging.exception("Unable to load the set at %s", key)
+            return set()
+
+    def set_contains(self, key, member):
+        self.bootstrap_storage()
+        try:
+            return self.storage.set_contains(key, member)
+        except:
+            logging.exception("Unable to check %s", key)
+            return False
+
+    def zset_add(self, key, member, score):
+        self.bootstrap_storage()
+        try:
+            return self.storage.zset_add(key, member, score)
+        except:
+            logging.exception("Unable to add to %s", key)
+
+    def zset_remove(self, key, member):
+        self.bootstrap_storage()
+        try:
+            return self.storage.zset_remove(key, member)
+        except:
+            logging.exception("Unable to remove from %s", key)
+
+    def zset_range_by_score(self, key, min_score=None, max_score=None):
+        self.bootstrap_storage()
+        try:
+            return self.storage.zset_range_by_score(key, min_score, max_score)
+        except:
+            logging.exception("Unable to load the sorted set at %s", key)
+            return []
+
+    def zset_pop_by_score(self, key, max_score):
+        self.bootstrap_storage()
+        try:
+            return self.storage.zset_pop_by_score(key, max_score)
+        except:
+            logging.exception("Unable to pop from %s", key)
+            return []
+
+    def incr(self, key, amount=1):
+        self.bootstrap_storage()
+        try:
+            return self.storage.incr(key, amount)
+        except:
+            logging.exception("Unable to increment %s", key)
@@ -16,6 +16,9 @@ class WillPlugin(EmailMixin, StorageMixin, NaturalTimeMixin, HipChatRoomMixin, H
                  ScheduleMixin, SettingsMixin, PubSubMixin):
     is_will_plugin = True
     request = request
+    # Set to True for plugins that need a fresh process for every message, instead of
+    # a shared execution worker.
+    execute_in_own_process = False
 
     def __init__(self, *args, **kwargs):
         if "bot" in kwargs:
@@ -2,23 +2,36 @@ from will.plugin import WillPlugin
 from will.decorators import respond_to, periodic, hear, randomly, route, rendered_template, require_settings
 
 
+# Everyone's contact info, by handle, in a storage hash.
+CONTACTS_KEY = "emergency_contacts"
+
+
 class EmergencyContactsPlugin(WillPlugin):
 
+    def migrate_contacts(self):
+        # Older versions saved everyone's contact info together, in one dict.
+        old_contacts = self.load("contact_info")
+        if old_contacts:
+            for handle, contact in old_contacts.items():
+                self.hash_set(CONTACTS_KEY, handle, contact)
+        if old_contacts is not None:
+            self.clear("contact_info")
+
     @respond_to("^set my contact info to (?P<contact_info>.*)", multiline=True)
     def set_my_info(self, message, contact_info=""):
         """set my contact info to ____: Set your emergency contact info."""
-        contacts = self.load("contact_info", {})
-        contacts[message.sender.handle] = {
+        self.migrate_contacts()
+        self.hash_set(CONTACTS_KEY, message.sender.handle, {
             "info": contact_info,
             "name": message.sender.name,
-        }
-        self.save("contact_info", contacts)
+        })
         self.say("Got it.", message=message)
 
     @respond_to("^contact info$")
     def respond_to_contact_info(self, message):
         """contact info: Show everyone's emergency contact info."""
-        contacts = self.load("contact_info", {})
+        self.migrate_contacts()
+        contacts = self.hash_all(CONTACTS_KEY)
         context = {
             "contacts": contacts,
         }
@@ -48,7 +48,5 @@ class WhitelistPlugin(WillPlugin):
     # Testing function for wiping the whitelist
     @hear("(!wlwipe)", acl=["admins"])
     def whitelist_wipe(self, message):
-        # NOTE You need to use self.say for this to work!
-        if not self.load("whitelist"):
-            whitelist_wipe(self)
+        whitelist_wipe(self)
         self.reply("Whitelist Wiped!", message=message)
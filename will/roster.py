@@ -0,0 +1,225 @@
+import threading
+import time
+
+from will import settings
+from will.abstractions import Channel, Person
+from will.mixins import StorageMixin
+from will.utils import Bunch
+
+# One Roster per IO backend, per process.
+_rosters = {}
+_rosters_lock = threading.Lock()
+
+
+def get_roster(backend_name):
+    if backend_name not in _rosters:
+        with _rosters_lock:
+            if backend_name not in _rosters:
+                _rosters[backend_name] = Roster(backend_name)
+    return _rosters[backend_name]
+
+
+class Roster(StorageMixin):
+    """
+    An IO backend's people and channels, shared between processes through storage.
+
+    The IO adapter publishes them whenever they change, which bumps the version.  Every
+    other process keeps a copy, and reloads it when the version has moved on.  It checks
+    at most every ROSTER_CHECK_INTERVAL seconds (default 5.)
+
+    People are stored as they are.  Channels only keep their members' ids, since the
+    people are already here.
+    """
+
+    def __init__(self, backend_name):
+        self.backend_name = backend_name
+        self.version = None
+        self.checked_at = 0
+        self.people = {}
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def _key(self, name):
+        return "roster.%s.%s" % (self.backend_name, name)
+
+    def publish(self, people=None, channels=None):
+        """
+        Stores whichever of people and channels were passed, if they've changed since we last
+        published them.  Returns True if anything was saved.
+        """
+        changed = {}
+        if people is not None and people != self.people:
+            changed["people"] = people
+        if channels is not None:
+            channels = dict([(id, self._channel_entry(c)) for id, c in channels.items()])
+            if channels != self.channels:
+                changed["channels"] = channels
+        if not changed:
+            return False
+
+        with self.lock:
+            for kind, values in changed.items():
+                self.save(self._key(kind), values)
+                setattr(self, kind, values)
+            self.version = (self.load(self._key("version"), 0) or 0) + 1
+            self.save(self._key("version"), self.version)
+            self.checked_at = time.time()
+        return True
+
+    def _channel_entry(self, channel):
+        return Bunch(
+            id=channel.id,
+            name=channel.name,
+            source=channel.source,
+            member_ids=sorted(channel.members.keys()),
+        )
+
+    def refresh(self):
+        now = time.time()
+        if now - self.checked_at < getattr(settings, "ROSTER_CHECK_INTERVAL", 5):
+            return
+        with self.lock:
+            version = self.load(self._key("version"), None)
+            if version != self.version:
+                self.people = self.load(self._key("people"), {})
+                self.channels = self.load(self._key("channels"), {})
+                self.version = version
+            self.checked_at = now
+
+    def get(self, kind, id):
+        self.refresh()
+        return getattr(self, kind).get(id, None)
+
+
+class RosterDict(dict):
+    """
+    A dict that fills itself from the roster the first time it's read.  It pickles as just
+    a reference back to the roster, so it's cheap to send around.
+    """
+
+    def __init__(self, backend_name, id):
+        dict.__init__(self)
+        self.roster_ref = (backend_name, id)
+        self.filled = False
+
+    def __reduce__(self):
+        return (self.__class__, self.roster_ref)
+
+    def fill(self):
+        if not self.filled:
+            self.filled = True
+            self.update(self.load_from_roster(get_roster(self.roster_ref[0]), self.roster_ref[1]))
+
+    def load_from_roster(self, roster, id):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        self.fill()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self.fill()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self.fill()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.fill()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self.fill()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self.fill()
+        return dict.__repr__(self)
+
+    def get(self, key, default=None):
+        self.fill()
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self.fill()
+        return dict.keys(self)
+
+    def values(self):
+        self.fill()
+        return dict.values(self)
+
+    def items(self):
+        self.fill()
+        return dict.items(self)
+
+
+class RosterSource(RosterDict):
+    """
+    The raw source profile of a person (or channel), as the chat service sent it.
+    Readable as attributes too, like the Bunch it stands in for.
+    """
+
+    def __init__(self, backend_name, id, kind="people"):
+        super(RosterSource, self).__init__(backend_name, id)
+        self.kind = kind
+
+    def __reduce__(self):
+        return (self.__class__, self.roster_ref + (self.kind, ))
+
+    def load_from_roster(self, roster, id):
+        obj = roster.get(self.kind, id)
+        if obj is None:
+            return {}
+        return obj.source
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name in ("roster_ref", "filled", "kind"):
+            raise AttributeError(name)
+        self.fill()
+        try:
+            return dict.__getitem__(self, name)
+        except KeyError:
+            raise AttributeError(name)
+
+
+class RosterMembers(RosterDict):
+    """
+    A channel's members, by id.  The Person objects come from the roster.
+    """
+
+    def load_from_roster(self, roster, id):
+        channel = roster.get("channels", id)
+        if channel is None:
+            return {}
+        return dict([(person_id, roster.get("people", person_id)) for person_id in channel.member_ids])
+
+
+def slim_person(person, backend_name):
+    """A copy of person, with its source left in the roster."""
+    slim = Person(
+        id=person.id,
+        handle=person.handle,
+        mention_handle=person.mention_handle,
+        source=RosterSource(backend_name, person.id),
+        name=person.name,
+        first_name=person.first_name,
+        # Slack sets timezone to the plain name after the Person's made.
+        timezone=getattr(person.timezone, "zone", person.timezone) if person.timezone else None,
+    )
+    return slim
+
+
+def slim_channel(channel, backend_name):
+    """A copy of channel, with its source and members left in the roster."""
+    slim = Channel(
+        id=channel.id,
+        name=channel.name,
+        source=RosterSource(backend_name, channel.id, kind="channels"),
+        members={},
+    )
+    slim.members = RosterMembers(backend_name, channel.id)
+    return slim
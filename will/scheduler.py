@@ -1,27 +1,34 @@
 import logging
 import datetime
-import imp
 import time
 import traceback
 import threading
 
-from will.mixins import ScheduleMixin, PluginModulesLibraryMixin
+from will import settings
+from will.mixins import ScheduleMixin, PluginModulesLibraryMixin, StorageMixin
+from will.utils import load_plugin_module
 
 
-class Scheduler(ScheduleMixin, PluginModulesLibraryMixin):
+# How many expired keys to delete from storage at a time.
+STORAGE_SWEEP_BATCH_SIZE = 100
+# How long a scheduler run can hold the scheduler lock, if it dies mid-run.
+SCHEDULER_LOCK_TTL = 60
+
+
+class Scheduler(ScheduleMixin, PluginModulesLibraryMixin, StorageMixin):
 
     @classmethod
     def clear_locks(cls, bot):
-        bot.save("scheduler_add_lock", False)
-        bot.save("scheduler_lock", False)
-        bot.save("will_periodic_list", {})
-        bot.save("will_periodic_times_list", {})
+        # Older Wills locked the schedule with these.
+        bot.clear("scheduler_add_lock")
+        bot.clear("scheduler_lock")
+        # Periodic tasks are all added again at startup.
+        bot.clear_schedule(periodic_list=True)
+        bot.migrate_schedule()
 
     def start_loop(self, bot):
+        # Storage comes from the bot.
         self.bot = bot
-        # For other mixins that expect save.
-        self.save = self.bot.save
-        self.load = self.bot.load
 
         self.active_processes = []
 
@@ -33,60 +40,31 @@ class Scheduler(ScheduleMixin, PluginModulesLibraryMixin):
             pass
 
     def _clear_random_tasks(self):
-        self.bot.save("scheduler_lock", True)
-        periodic_list = self.bot.get_schedule_list(periodic_list=True)
-        periodic_times_list = self.bot.get_times_list(periodic_list=True)
-
-        new_periodic_list = {}
-        new_periodic_times_list = {}
-
-        for item_hash, item in periodic_list.items():
-            if not "random_task" in item:
-                new_periodic_list[item_hash] = item
-                new_periodic_times_list[item_hash] = periodic_times_list[item_hash]
-
-        self.bot.save_schedule_list(new_periodic_list, periodic_list=True)
-        self.bot.save_times_list(new_periodic_times_list, periodic_list=True)
-
-        self.bot.save("scheduler_lock", False)
+        for item_hash, item in self.bot.get_schedule_list(periodic_list=True).items():
+            if item["type"] == "random_task":
+                self.bot.remove_from_schedule(item_hash, periodic_list=True)
 
     def _run_applicable_actions_in_list(self, now, periodic_list=False):
-        times_list = self.bot.get_times_list(periodic_list=periodic_list)
-
-        # Iterate through times_list first, before loading the full schedule_list into memory (big pickled stuff, etc)
-        a_task_needs_run = False
-        for task_time in times_list.values():
-            if task_time < now:
-                a_task_needs_run = True
-                break
-
-        if a_task_needs_run:
-            sched_list = self.bot.get_schedule_list(periodic_list=periodic_list)
-            for item in sched_list.values():
-                running_task = False
-                try:
-
-                    if item["when"] < now:
-                        running_task = True
-                        self.run_action(item)
-                except:
-                    logging.critical(
-                        "Error running task %s.  \n\n%s\n"
-                        "Trying to delete it and recover...\n",
-                        item,
-                        traceback.format_exc()
-                    )
-
-                if running_task:
-                    try:
-                        self.bot.remove_from_schedule(item["hash"], periodic_list=periodic_list)
-                    except:
-                        logging.critical(
-                            "Unable to remove task. Leaving it in, you'll have to clean it out by hand."
-                            "Sorry! \n\n%s\nContinuing...\n" % (traceback.format_exc(),)
-                        )
+        # Only the tasks that are due are loaded, and they're off the schedule before they run.
+        for item in self.bot.pop_due_tasks(now, periodic_list=periodic_list):
+            try:
+                self.run_action(item)
+            except:
+                logging.critical(
+                    "Error running task %s.  \n\n%s\nIt's been removed from the schedule.\n",
+                    item,
+                    traceback.format_exc()
+                )
 
     def check_scheduled_actions(self):
+        # Only one scheduler runs at a time, even with several Wills sharing storage.
+        with self.storage_lock("scheduler", SCHEDULER_LOCK_TTL) as token:
+            if token is not None:
+                self._check_scheduled_actions()
+
+        self.sweep_storage()
+
+    def _check_scheduled_actions(self):
         now = datetime.datetime.now()
 
         # Re-schedule random tasks at midnight
@@ -109,14 +87,29 @@ class Scheduler(ScheduleMixin, PluginModulesLibraryMixin):
                     meta["num_times_per_day"]
                 )
         try:
-            if not self.bot.load("scheduler_add_lock", False) or not self.bot.load("scheduler_lock", False):
-                self.bot.save("scheduler_lock", True)
-                self._run_applicable_actions_in_list(now,)
-                self._run_applicable_actions_in_list(now, periodic_list=True)
-                self.bot.save("scheduler_lock", False)
+            self._run_applicable_actions_in_list(now,)
+            self._run_applicable_actions_in_list(now, periodic_list=True)
         except:
             logging.critical("Scheduler run blew up.\n\n%s\nContinuing...\n", traceback.format_exc())
 
+    def sweep_storage(self):
+        # Storage that can't expire keys itself gets them deleted here, a batch at a time.
+        now = time.time()
+        interval = getattr(settings, "STORAGE_SWEEP_INTERVAL", 60)
+        if now - getattr(self, "last_storage_sweep", 0) < interval:
+            return
+        try:
+            self.bot.bootstrap_storage()
+            swept = self.bot.storage.sweep_expired(limit=STORAGE_SWEEP_BATCH_SIZE)
+            if swept:
+                logging.info("Deleted %s expired keys from storage." % swept)
+            # If there were more than a batch, get the rest next time around.
+            if swept < STORAGE_SWEEP_BATCH_SIZE:
+                self.last_storage_sweep = now
+        except:
+            self.last_storage_sweep = now
+            logging.critical("Error sweeping expired keys from storage.\n\n%s\nContinuing...\n", traceback.format_exc())
+
     def run_action(self, task):
 
         if task["type"] == "message" and "topic" in task:
@@ -128,7 +121,7 @@ class Scheduler(ScheduleMixin, PluginModulesLibraryMixin):
         elif task["type"] == "periodic_task":
             # Run the task
             module_info = self.plugin_modules_library[task["module_name"]]
-            module = imp.load_source(module_info["name"], module_info["file_path"])
+            module = load_plugin_module(module_info["name"], module_info["file_path"])
             cls = getattr(module, task["class_name"])
             fn = getattr(cls(), task["function_name"])
 
@@ -142,12 +135,11 @@ class Scheduler(ScheduleMixin, PluginModulesLibraryMixin):
                 task["function_name"],
                 task["sched_args"],
                 task["sched_kwargs"],
-                ignore_scheduler_lock=True
             )
         elif task["type"] == "random_task":
             # Run the task
             module_info = self.plugin_modules_library[task["module_name"]]
-            module = imp.load_source(module_info["name"], module_info["file_path"])
+            module = load_plugin_module(module_info["name"], module_info["file_path"])
             cls = getattr(module, task["class_name"])
             fn = getattr(cls(), task["function_name"])
 
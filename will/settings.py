@@ -181,10 +181,11 @@ IO_BACKENDS = "
 
         if "ANALYZE_BACKENDS" not in settings:
             if not quiet:
-                note("No ANALYZE_BACKENDS specified.  Defaulting to history only.")
+                note("No ANALYZE_BACKENDS specified.  Defaulting to history and features.")
             settings["ANALYZE_BACKENDS"] = [
                 "will.backends.analysis.nothing",
                 "will.backends.analysis.history",
+                "will.backends.analysis.features",
             ]
 
         if "GENERATION_BACKENDS" not in settings:
@@ -331,6 +332,12 @@ IO_BACKENDS = "
                 if not quiet:
                     note("FILE_DIR not set.  Defaulting to ~/.will/")
 
+        if settings["STORAGE_BACKEND"] == "sqlite":
+            if "SQLITE_FILE" not in settings:
+                settings["SQLITE_FILE"] = "~/.will.sqlite3"
+                if not quiet:
+                    note("SQLITE_FILE not set.  Defaulting to ~/.will.sqlite3")
+
         if settings["STORAGE_BACKEND"] == "couchbase":
             if "COUCHBASE_URL" not in settings:
                 settings["COUCHBASE_URL"] = "couchbase:///will"
@@ -426,6 +433,8 @@ IO_BACKENDS = "
             settings["FUZZY_MINIMUM_MATCH_CONFIDENCE"] = 91
         if "FUZZY_REGEX_ALLOWABLE_ERRORS" not in settings:
             settings["FUZZY_REGEX_ALLOWABLE_ERRORS"] = 3
+        if "FUZZY_REGEX_TIME_BUDGET" not in settings:
+            settings["FUZZY_REGEX_TIME_BUDGET"] = 0.25
 
         # Set them in the module namespace
         for k in sorted(settings, key=lambda x: x[0]):
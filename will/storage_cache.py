@@ -0,0 +1,139 @@
+import collections
+import fnmatch
+import logging
+import os
+import threading
+import time
+import traceback
+
+from will import settings
+from will.mixins.pubsub import PubSubMixin
+
+INVALIDATE_TOPIC = "storage.invalidate"
+
+# One cache per process.
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_storage_cache():
+    global _cache
+    if _cache is None or _cache.pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache.pid != os.getpid():
+                # A forked process can't trust what its parent had, or its listener.
+                _cache = StorageCache(
+                    getattr(settings, "STORAGE_CACHE_KEYS", None) or {},
+                    getattr(settings, "STORAGE_CACHE_SIZE", 1000),
+                )
+    return _cache
+
+
+class StorageCache(object):
+    """
+    Keeps loaded values for the keys in STORAGE_CACHE_KEYS in memory, so loading them
+    again is just a dict lookup.
+
+    STORAGE_CACHE_KEYS maps keys (or glob patterns of them) to how many seconds a value can
+    be kept.  Once there are STORAGE_CACHE_SIZE values, the least recently used go first.
+    Saving or clearing a cached key tells every other process to forget it, over pubsub.
+
+    Values are handed out as-is, not copied, so change them by saving, not in place.
+    """
+
+    def __init__(self, ttls, max_size):
+        self.ttls = ttls
+        self.max_size = max_size
+        self.pid = os.getpid()
+        self.entries = collections.OrderedDict()
+        # Bumped whenever a key is invalidated, so a load that raced with a save can't
+        # put the old value back.
+        self.generations = {}
+        self.epoch = 0
+        self.lock = threading.Lock()
+        self.listener = None
+        # Set once the listener's subscribed.  Nothing's cached before then, since we
+        # wouldn't hear about it changing.
+        self.subscribed = threading.Event()
+        # Publishing and listening each get their own connection.
+        self.publisher = PubSubMixin()
+
+    def ttl(self, key):
+        if key in self.ttls:
+            return self.ttls[key]
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatchcase(key, pattern):
+                return ttl
+        return None
+
+    def generation(self, key):
+        return (self.epoch, self.generations.get(key, 0))
+
+    def get(self, key):
+        """Returns (True, value) if key's cached, and (False, None) if not."""
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self.entries[key]
+                return False, None
+            del self.entries[key]
+            self.entries[key] = entry
+            return True, value
+
+    def put(self, key, value, generation):
+        ttl = self.ttl(key)
+        if not ttl:
+            return
+        self.start_listener()
+        if not self.subscribed.is_set():
+            return
+        with self.lock:
+            if self.generation(key) != generation:
+                return
+            self.entries.pop(key, None)
+            self.entries[key] = (value, time.time() + ttl)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def forget(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+                self.generations.clear()
+                self.epoch += 1
+            else:
+                self.entries.pop(key, None)
+                self.generations[key] = self.generations.get(key, 0) + 1
+
+    def invalidate(self, key=None):
+        """Forgets key (or everything, if None) here, and tells every other process to."""
+        if not self.ttls or (key is not None and not self.ttl(key)):
+            return
+        self.forget(key)
+        self.publisher.publish(INVALIDATE_TOPIC, key)
+
+    def start_listener(self):
+        if self.listener is not None:
+            return
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen)
+                self.listener.daemon = True
+                self.listener.start()
+
+    def listen(self):
+        try:
+            listener = PubSubMixin()
+            listener.subscribe(INVALIDATE_TOPIC)
+            # Anything loaded before now could have missed an invalidation.
+            self.forget()
+            self.subscribed.set()
+            for m in listener.pubsub.iter_messages():
+                if m.type == INVALIDATE_TOPIC:
+                    self.forget(m.data)
+        except:
+            # Values still expire, they just won't be forgotten early.
+            logging.critical("Storage cache stopped hearing invalidations: \n%s" % traceback.format_exc())
@@ -0,0 +1,18 @@
+from will.backends.storage.base import BaseStorageBackend
+
+
+class MemoryStorage(BaseStorageBackend):
+    """A storage backend that keeps everything in a dict, for tests."""
+    binary_safe = True
+
+    def __init__(self):
+        self.values = {}
+
+    def do_save(self, key, value, expire=None):
+        self.values[key] = value
+
+    def do_load(self, key):
+        return self.values.get(key, None)
+
+    def clear(self, key):
+        self.values.pop(key, None)
@@ -0,0 +1,77 @@
+import re
+import unittest
+
+from mock import MagicMock
+
+from will.backends.generation.strict_regex import RegexBackend
+from will.decorators import command, hear
+
+
+def listener(name, fn):
+    meta = fn.will_fn_metadata
+    regex = meta["listener_regex"]
+    if not meta["case_sensitive"]:
+        regex = "(?i)%s" % regex
+    return {
+        "full_method_name": name,
+        "regex": re.compile(regex, re.MULTILINE | re.DOTALL if meta["multiline"] else 0),
+        "include_me": meta["listener_includes_me"],
+        "direct_mentions_only": meta["listens_only_to_direct_mentions"],
+        "command_names": meta.get("command_names", None),
+    }
+
+
+class TestCommands(unittest.TestCase):
+
+    def setUp(self):
+        @command("!phone", "!number", args=["pco_name"], stop_at="'?")
+        def phone(self, message, pco_name):
+            pass
+
+        @command("!teams", args=["team", "role"], direct_mentions_only=True)
+        def teams(self, message, team, role):
+            pass
+
+        @hear("phone")
+        def overheard(self, message):
+            pass
+
+        self.backend = RegexBackend()
+        self.backend.bot = MagicMock()
+        self.backend.bot.listener_index = None
+        self.backend.bot.message_listeners = {
+            "phone": listener("phone", phone),
+            "teams": listener("teams", teams),
+            "overheard": listener("overheard", overheard),
+        }
+        self.backend.bot.command_registry = {"!phone": ["phone"], "!number": ["phone"], "!teams": ["teams"]}
+        self.backend.bot.command_stop_at = "'?"
+
+    def generate(self, content, is_direct=False):
+        message = MagicMock(content=content, will_said_it=False, is_private_chat=False, is_direct=is_direct)
+        return self.backend.do_generate(MagicMock(data=message))
+
+    def test_commands_fill_in_args(self):
+        options = self.generate("!NUMBER Jane Doe's cell?")
+        self.assertEqual(["phone"], [o.context.full_method_name for o in options])
+        self.assertEqual({"pco_name": "Jane Doe"}, options[0].context.search_matches)
+
+        options = self.generate("!teams  worship  band leader", is_direct=True)
+        self.assertEqual({"team": "worship", "role": "band leader"}, options[0].context.search_matches)
+
+        options = self.generate("!phone")
+        self.assertEqual({"pco_name": ""}, options[0].context.search_matches)
+
+    def test_stop_at_can_end_the_command(self):
+        options = self.generate("!phone?")
+        self.assertEqual(["phone"], [o.context.full_method_name for o in options])
+        self.assertEqual({"pco_name": ""}, options[0].context.search_matches)
+        self.assertEqual(["phone"], [o.context.full_method_name for o in self.generate("!Number's")])
+        # Only the command's own stop_at, though.
+        self.assertEqual([], self.generate("!teams? worship", is_direct=True))
+
+    def test_falls_back_to_regex_listeners(self):
+        self.assertEqual(["overheard"], [o.context.full_method_name for o in self.generate("my phone died")])
+        self.assertEqual(["overheard"], [o.context.full_method_name for o in self.generate("!phonebook")])
+        # Direct mentions only.
+        self.assertEqual([], self.generate("!teams worship"))
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will.abstractions import Event
+from will.backends.pubsub.memory_pubsub import MemoryPubSub
+from will.engine import AsyncioEngine
+from will.main import WillBot
+
+
+class SlowAnalysis(object):
+
+    def do_analyze(self, message):
+        time.sleep(1)
+        return {"slow": True}
+
+
+class TestAsyncioEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, SECRET_KEY="test", METRICS_ENABLED=False)
+        self.settings_patch.start()
+
+        self.bot = WillBot.__new__(WillBot)
+        self.bot.pubsub = MemoryPubSub(settings)
+        self.bot.analysis_instances = [MagicMock(**{"do_analyze.return_value": {"mood": "happy"}})]
+        self.bot.generation_instances = [MagicMock(**{"generate.return_value": ["an option"]})]
+        self.executed = threading.Event()
+        self.bot.execution_backends = [MagicMock(**{"handle_execution.side_effect": lambda e: self.executed.set()})]
+
+        self.engine = AsyncioEngine(self.bot)
+        self.engine_thread = threading.Thread(target=self.engine.run)
+        self.engine_thread.daemon = True
+        self.engine_thread.start()
+        while not self.bot.pubsub.topics:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.engine.stop()
+        self.engine_thread.join(5)
+        self.bot.pubsub.unsubscribe(["message.*"])
+        self.settings_patch.stop()
+
+    def publish_incoming(self):
+        message = MagicMock(content="hi", original_incoming_event={"text": "hi"})
+        MemoryPubSub(settings).publish("message.incoming", message, reference_message=message)
+
+    def test_runs_the_pipeline_in_process(self):
+        self.publish_incoming()
+        self.assertTrue(self.executed.wait(5))
+
+        working_event = self.bot.execution_backends[0].handle_execution.call_args[0][0]
+        self.assertEqual({"mood": "happy"}, working_event.analysis)
+        self.assertEqual(["an option"], working_event.generation_options)
+        analyzed = self.bot.analysis_instances[0].do_analyze.call_args[0][0].data
+        self.assertEqual("hi", analyzed.content)
+        self.assertEqual({"text": "hi"}, analyzed.original_incoming_event)
+
+    def test_slow_analysis_times_out(self):
+        self.bot.analysis_instances = [SlowAnalysis()]
+        self.bot.analysis_timeout = 100
+        self.publish_incoming()
+
+        self.assertTrue(self.executed.wait(0.9))
+        working_event = self.bot.execution_backends[0].handle_execution.call_args[0][0]
+        self.assertFalse(hasattr(working_event, "analysis"))
+
+    def test_shutdown_clears_the_ephemeral_secret_key(self):
+        self.bot.engine = self.engine
+        with patch.dict(os.environ, {"WILL_SECRET_KEY": "secret", "WILL_EPHEMERAL_SECRET_KEY": "True"}):
+            self.bot.handle_sys_exit()
+            self.assertEqual("", os.environ["WILL_SECRET_KEY"])
+        self.engine_thread.join(5)
+        self.assertFalse(self.engine_thread.is_alive())
@@ -0,0 +1,96 @@
+import time
+import unittest
+
+from mock import MagicMock
+
+from will.abstractions import Event
+from will.main import WillBot
+from will.metrics import Metrics
+
+
+class TestInFlightDeadlines(unittest.TestCase):
+
+    def setUp(self):
+        self.bot = WillBot.__new__(WillBot)
+        self.bot.pubsub = MagicMock()
+        self.bot.execution_backends = [MagicMock()]
+        self.bot.analysis_timeout = 2000
+        self.bot.generation_timeout = 2000
+        self.bot.num_analysis_threads = 2
+        self.bot.num_generation_threads = 2
+        self.bot.analysis_in_flight = {}
+        self.bot.generation_in_flight = {}
+        self.bot.in_flight_deadlines = []
+        self.event = Event(type="message.incoming", data=MagicMock())
+
+    def test_no_deadlines_blocks_forever(self):
+        self.assertEqual(None, self.bot.seconds_until_next_deadline())
+
+    def test_stuck_analysis_moves_on_to_generation(self):
+        self.bot.track_in_flight("analysis", "abc", self.event, self.event, 0)
+        self.bot.sweep_expired_events()
+
+        self.assertNotIn("abc", self.bot.analysis_in_flight)
+        self.assertIn("abc", self.bot.generation_in_flight)
+        self.bot.pubsub.publish.assert_called_once_with(
+            "generation.start", self.event, reference_message=self.event
+        )
+
+    def test_stuck_generation_moves_on_to_execution(self):
+        self.bot.track_in_flight("generation", "abc", self.event, self.event, 0)
+        self.bot.sweep_expired_events()
+
+        self.assertEqual({}, self.bot.generation_in_flight)
+        self.bot.execution_backends[0].handle_execution.assert_called_once_with(self.event)
+        self.assertEqual([], self.event.generation_options)
+
+    def test_finished_entries_are_skipped(self):
+        self.bot.track_in_flight("analysis", "abc", self.event, self.event, 0)
+        self.bot.start_generation("abc")
+        self.bot.generation_in_flight["abc"]["timeout_end"] = time.time() + 60
+        self.bot.pubsub.reset_mock()
+
+        self.bot.sweep_expired_events()
+
+        self.assertFalse(self.bot.pubsub.publish.called)
+        self.assertEqual(1, len(self.bot.in_flight_deadlines))
+
+    def test_late_results_are_dropped(self):
+        late = Event(type="generation.complete", data=[], original_incoming_event_hash="gone")
+        self.bot.handle_event(late)
+        self.assertFalse(self.bot.execution_backends[0].handle_execution.called)
+
+    def test_first_reply_records_response_latency(self):
+        self.bot.metrics_enabled = True
+        self.bot.response_timeout = 60000
+        self.bot.response_in_flight = {}
+        self.bot.metrics = Metrics()
+        self.bot.metrics_dirty = False
+        self.event.stage_timestamps = {"incoming": time.time()}
+        self.event.executed_methods = ["plugins.hello.HelloPlugin.hi"]
+        self.bot.track_in_flight("generation", "abc", self.event, self.event, 0)
+        self.bot.sweep_expired_events()
+        self.assertIn("abc", self.bot.response_in_flight)
+
+        reply = Event(type="message.outgoing.slack", data=MagicMock(source_message=None, original_incoming_event_hash="abc"))
+        self.bot.handle_event(reply)
+
+        self.assertEqual({}, self.bot.response_in_flight)
+        self.assertEqual(1, self.bot.metrics.stage_latencies["response"].count)
+        self.assertEqual(1, self.bot.metrics.plugin_latencies["plugins.hello.HelloPlugin.hi"].count)
+        self.assertTrue(self.bot.metrics_dirty)
+
+    def test_unanswered_messages_stop_being_timed(self):
+        self.bot.metrics_enabled = True
+        self.bot.response_timeout = 0
+        self.bot.response_in_flight = {}
+        self.bot.metrics = Metrics()
+        self.event.stage_timestamps = {"incoming": time.time()}
+        self.bot.track_in_flight("generation", "abc", self.event, self.event, 0)
+        self.bot.sweep_expired_events()
+        self.assertIn("abc", self.bot.response_in_flight)
+        self.bot.sweep_expired_events()
+
+        self.assertEqual({}, self.bot.response_in_flight)
+        self.assertEqual(1, self.bot.metrics.counters["response.timeout"])
+        self.assertEqual(1, self.bot.metrics.stage_latencies["total"].count)
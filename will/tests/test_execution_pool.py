@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from will.backends.execution.pool import ExecutionWorkerPool
+
+PLUGIN_SOURCE = """
+from will.plugin import WillPlugin
+
+
+class RecordingPlugin(WillPlugin):
+
+    def record(self, message, name=None):
+        with open(message["path"], "w") as f:
+            f.write(name)
+"""
+
+
+class TestExecutionWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.plugin_path = os.path.join(self.tmp_dir, "recording_plugin.py")
+        with open(self.plugin_path, "w") as f:
+            f.write(PLUGIN_SOURCE)
+        self.plugin_info = {
+            "name": "RecordingPlugin",
+            "parent_name": "recording_plugin",
+            "parent_path": self.plugin_path,
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_runs_listeners_on_workers(self):
+        pool = ExecutionWorkerPool(num_workers=2, mode="thread")
+        output_path = os.path.join(self.tmp_dir, "output")
+        message = {"path": output_path}
+
+        self.assertTrue(pool.submit(self.plugin_info, "record", message, [], {"name": "will"}))
+        output = None
+        for i in range(0, 50):
+            if os.path.exists(output_path):
+                with open(output_path) as f:
+                    output = f.read()
+                if output:
+                    break
+            time.sleep(0.1)
+        pool.stop()
+
+        self.assertEqual("will", output)
+
+    def test_full_queue_falls_back(self):
+        pool = ExecutionWorkerPool(num_workers=0, mode="thread", queue_size=1)
+        self.assertTrue(pool.submit(self.plugin_info, "record", {}, [], {}))
+        self.assertFalse(pool.submit(self.plugin_info, "record", {}, [], {}))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mock import MagicMock
+
+from will.backends.analysis.features import FeatureAnalysis, message_features
+from will.backends.generation.fuzzy_index import process_query
+from will.backends.generation.strict_regex import RegexBackend
+from will.main import WillBot
+from will.utils import Bunch
+
+
+class TestMessageFeatures(unittest.TestCase):
+
+    def test_features(self):
+        f = message_features(u"!Teams  <@U5GUL9D9N> and @steven, please")
+        self.assertEqual(u"!teams  <@u5gul9d9n> and @steven, please", f.normalized)
+        self.assertEqual([u"!Teams", u"<@U5GUL9D9N>", u"and", u"@steven,", u"please"], f.tokens)
+        self.assertEqual(u"!Teams", f.first_token)
+        self.assertEqual(u"!Teams", f.command)
+        self.assertEqual([u"<@U5GUL9D9N>", u"@steven"], f.mentions)
+        self.assertEqual(process_query(u"!Teams  <@U5GUL9D9N> and @steven, please"), f.fuzzy_query)
+        self.assertIn(u"!te", f.ngrams)
+        self.assertIn(u"s <", f.ngrams)
+
+    def test_normalized_lines_up_with_content(self):
+        content = u"İstanbul ſtreet"
+        self.assertEqual(len(content), len(message_features(content).normalized))
+
+    def test_empty_message(self):
+        f = message_features(u"  ")
+        self.assertEqual((None, None, [], set()), (f.first_token, f.command, f.tokens, f.ngrams))
+
+    def test_analysis(self):
+        event = MagicMock(data=MagicMock(content=u"hello there"))
+        self.assertEqual([u"hello", u"there"], FeatureAnalysis().do_analyze(event)["features"].tokens)
+
+
+class TestSharedFeatures(unittest.TestCase):
+
+    def test_analysis_results_are_merged(self):
+        bot = WillBot.__new__(WillBot)
+        event = Bunch()
+        bot.add_analysis(event, {"history": []})
+        bot.add_analysis(event, {"features": "some"})
+        self.assertEqual({"history": [], "features": "some"}, event.analysis)
+
+    def test_generation_uses_analysis_features(self):
+        backend = RegexBackend()
+        event = MagicMock(data=MagicMock(content=u"hello"), analysis={"features": "already done"})
+        self.assertEqual("already done", backend.message_features(event))
+        event = MagicMock(data=MagicMock(content=u"hello"), analysis={})
+        self.assertEqual([u"hello"], backend.message_features(event).tokens)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+import unittest
+
+from fuzzywuzzy import fuzz
+from fuzzywuzzy import process as fuzz_process
+from mock import patch
+
+from will.backends.generation.fuzzy_index import FuzzyChoiceIndex, FuzzyRegexTimeout, compile_fuzzy_regex, compile_fuzzy_regexes
+from will.tests.test_listener_index import MESSAGES, PATTERNS
+
+
+class TestFuzzyChoiceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.patterns = []
+        for p in PATTERNS + ["hello", "help", "what's the weather", "remind me", "tell me a joke"]:
+            if p not in self.patterns:
+                self.patterns.append(p)
+        self.index = FuzzyChoiceIndex(dict([
+            ("listener%s" % i, {"regex_pattern": p}) for i, p in enumerate(self.patterns)
+        ]))
+        # fuzzywuzzy complains about queries that process down to nothing.
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_same_results_as_fuzzywuzzy(self):
+        for cutoff in [91, 80, 50]:
+            for m in MESSAGES + ["helo", "remind me later", "weather", "tell me a joke please", "!!!"]:
+                expected = [r for r in fuzz_process.extract(m, self.patterns) if r[1] >= cutoff]
+                got = [(l["regex_pattern"], score) for l, score in self.index.extract(m, score_cutoff=cutoff)]
+                self.assertEqual(expected, got, "%s at %s" % (m, cutoff))
+
+    def test_only_scores_choices_close_in_length(self):
+        with patch("will.backends.generation.fuzzy_index.fuzz.WRatio", wraps=fuzz.WRatio) as wratio:
+            self.assertEqual("hello", self.index.extract("Hello!", score_cutoff=91)[0][0]["regex_pattern"])
+            self.assertLess(wratio.call_count, len(self.patterns) / 3)
+
+
+class TestCompileFuzzyRegexes(unittest.TestCase):
+
+    def test_one_regex_per_listener(self):
+        # Two listeners from the same plugin used to share one compiled regex.
+        compiled, timings, failures = compile_fuzzy_regexes({
+            "plugin.hello": {"regex_pattern": "hello", "case_sensitive": False, "multiline": False},
+            "plugin.weather": {"regex_pattern": "weather", "case_sensitive": False, "multiline": False},
+        }, 1)
+        self.assertEqual(set(["plugin.hello", "plugin.weather"]), set(compiled.keys()))
+        self.assertEqual(set(compiled.keys()), set(timings.keys()))
+        self.assertEqual({}, failures)
+        self.assertTrue(compiled["plugin.hello"].search("HELLP"))
+        self.assertFalse(compiled["plugin.weather"].search("hello"))
+
+    def test_bad_patterns_match_as_text(self):
+        compiled, timings, failures = compile_fuzzy_regexes({
+            "plugin.broken": {"regex_pattern": "what (is", "case_sensitive": False, "multiline": False},
+        }, 1)
+        self.assertTrue(compiled["plugin.broken"].search("What (is this"))
+
+    def test_only_searches_near_the_anchor(self):
+        fuzzy = compile_fuzzy_regex({"regex_pattern": "remind me (?P<text>.*)", "case_sensitive": False, "multiline": False}, 3)
+        content = "a pasted log line\n" * 50 + "please Remind me to eat\nmore log"
+        self.assertEqual("remind", fuzzy.anchor)
+        self.assertEqual(1, len(fuzzy.windows(content)))
+        self.assertEqual("to eat", fuzzy.search(content).group("text").strip())
+        self.assertEqual([], fuzzy.windows("nothing to see here"))
+
+    def test_gives_up_when_out_of_time(self):
+        fuzzy = compile_fuzzy_regex({"regex_pattern": "hello", "case_sensitive": False, "multiline": False}, 3)
+        self.assertRaises(FuzzyRegexTimeout, fuzzy.search, "hello", time.time() - 1)
+
+    def test_long_searches_are_cut_off(self):
+        # Nothing to anchor on, so this backtracks over the whole message, and needs a
+        # regex that takes a timeout (2019.3.12 or later) to be stopped part way.
+        fuzzy = compile_fuzzy_regex({
+            "regex_pattern": "(?P<a>.*) at (?P<b>.*) in (?P<c>\\w+)", "case_sensitive": False, "multiline": False
+        }, 3)
+        self.assertEqual(None, fuzzy.anchor)
+        start = time.time()
+        self.assertRaises(FuzzyRegexTimeout, fuzzy.search, " at " * 3000 + "!", time.time() + 0.2)
+        self.assertLess(time.time() - start, 5)
+
+    def test_searches_to_the_end_of_the_message(self):
+        # Windows don't stop at the end of a line, so $ and \s mean what they always have.
+        fuzzy = compile_fuzzy_regex({"regex_pattern": "ping$", "case_sensitive": False, "multiline": False}, 0)
+        self.assertFalse(fuzzy.search("ping\nfoo"))
+        self.assertTrue(fuzzy.search("foo\nping"))
+        fuzzy = compile_fuzzy_regex({"regex_pattern": "hello\\s+world", "case_sensitive": False, "multiline": False}, 0)
+        self.assertTrue(fuzzy.search("hello\nworld"))
@@ -0,0 +1,82 @@
+import re
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will.backends.generation.base import GenerationBackend
+from will.backends.generation.strict_regex import RegexBackend
+
+
+def message(content, is_direct=False):
+    return MagicMock(content=content, is_direct=is_direct, is_private_chat=False, will_said_it=False)
+
+
+class TestGenerationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, GENERATION_CACHE_SIZE=2)
+        self.settings_patch.start()
+
+        self.backend = RegexBackend()
+        self.backend.bot = MagicMock(listener_index=None, command_registry={})
+        self.backend.bot.message_listeners = {
+            "plugin.hello": {"full_method_name": "plugin.hello", "regex": re.compile("hello (?P<name>\\w+)"), "fn": None},
+            "plugin.help": {"full_method_name": "plugin.help", "regex": re.compile("help"), "fn": None,
+                            "direct_mentions_only": True},
+        }
+
+    def tearDown(self):
+        self.settings_patch.stop()
+
+    def generate(self, content, **kwargs):
+        return self.backend.generate(MagicMock(data=message(content, **kwargs)))
+
+    def test_cached_options_match_generated_ones(self):
+        first = self.generate("hello will")
+        with patch.object(self.backend, "do_generate") as do_generate:
+            second = self.generate("hello will")
+            self.assertFalse(do_generate.called)
+        self.assertEqual([o.context for o in first], [o.context for o in second])
+        self.assertEqual({"name": "will"}, second[0].context.search_matches)
+        self.assertEqual((1, 1), (self.backend.generation_cache.hits, self.backend.generation_cache.misses))
+
+    def test_counts_are_saved_for_metrics(self):
+        self.backend.name = "strict_regex"
+        self.generate("hello will")
+        self.backend.bot.hash_set.assert_called_once_with("will_generation_cache", "strict_regex", {"hits": 0, "misses": 1})
+
+        # Saved at most every METRICS_SAVE_INTERVAL seconds.
+        self.generate("hello will")
+        self.assertEqual(1, self.backend.bot.hash_set.call_count)
+        self.backend.save_generation_cache_counts(force=True)
+        self.backend.bot.hash_set.assert_called_with("will_generation_cache", "strict_regex", {"hits": 1, "misses": 1})
+
+    def test_other_backends_arent_cached(self):
+        backend = GenerationBackend()
+        backend.bot = self.backend.bot
+        backend.do_generate = MagicMock(return_value=[])
+        backend.generate(MagicMock(data=message("hello will")))
+        backend.generate(MagicMock(data=message("hello will")))
+        self.assertEqual(2, backend.do_generate.call_count)
+        self.assertFalse(hasattr(backend, "generation_cache"))
+
+    def test_keyed_on_how_will_was_addressed(self):
+        self.assertEqual([], self.generate("help"))
+        self.assertEqual(1, len(self.generate("help", is_direct=True)))
+
+    def test_least_recently_used_is_dropped(self):
+        self.generate("hello a")
+        self.generate("hello b")
+        self.generate("hello a")
+        self.generate("hello c")
+        self.assertEqual(
+            ["hello a", "hello c"],
+            [k[0] for k in self.backend.generation_cache.entries.keys()]
+        )
+
+    def test_emptied_when_listeners_change(self):
+        self.generate("hello will")
+        self.backend.bot.message_listeners = dict(self.backend.bot.message_listeners)
+        del self.backend.bot.message_listeners["plugin.hello"]
+        self.assertEqual([], self.generate("hello will"))
@@ -0,0 +1,72 @@
+import datetime
+import pickle
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will.abstractions import Message
+from will.backends.analysis import history
+from will.backends.analysis.history import HistoryAnalysis
+from will.tests.memory_storage import MemoryStorage
+from will.utils import Bunch
+
+
+def message(content, channel_id="C1", seconds=0):
+    return Message(
+        content=content,
+        is_direct=False,
+        is_private_chat=False,
+        is_group_chat=True,
+        will_is_mentioned=False,
+        will_said_it=False,
+        sender=None,
+        channel=Bunch(id=channel_id),
+        backend_supports_acl=True,
+        backend="slack",
+        original_incoming_event={"text": content},
+        timestamp=datetime.datetime(2026, 10, 17, 12, 0, seconds),
+    )
+
+
+class TestHistoryAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(
+            settings, create=True, HISTORY_CONTEXT_LENGTH=2, SECRET_KEY="test", ENABLE_INTERNAL_ENCRYPTION=False
+        )
+        self.settings_patch.start()
+        self.storage = MemoryStorage()
+        self.storage_patch = patch.object(history._storage, "storage", self.storage, create=True)
+        self.storage_patch.start()
+        self.analysis = HistoryAnalysis()
+        self.analysis.storage = self.storage
+
+    def tearDown(self):
+        self.storage_patch.stop()
+        self.settings_patch.stop()
+
+    def analyze(self, m):
+        return self.analysis.do_analyze(MagicMock(data=m))["history"]
+
+    def test_history_is_per_channel_capped_and_newest_first(self):
+        for i in range(0, 5):
+            self.analyze(message("general %s" % i, seconds=i))
+        self.analyze(message("elsewhere", channel_id="C2", seconds=6))
+        h = self.analyze(message("general 5", seconds=7))
+
+        self.assertEqual(["general 4", "general 3"], [m.content for m in h])
+        self.assertEqual(3, len(self.storage.list_range("history.slack.C1")))
+        self.assertIsNone(self.storage.list_range("history.slack.C1")[0].original_incoming_event)
+
+    def test_loads_only_when_asked(self):
+        self.analyze(message("first"))
+        h = self.analyze(message("second", seconds=1))
+        with patch.object(history._storage, "list_range", wraps=history._storage.list_range) as load:
+            # Later messages don't show up in an earlier one's history.
+            self.analyze(message("third", seconds=2))
+            load.reset_mock()
+            sent = pickle.loads(pickle.dumps(h))
+            self.assertFalse(load.called)
+            self.assertEqual(["first"], [m.content for m in sent])
+            self.assertEqual(1, load.call_count)
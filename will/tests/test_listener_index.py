@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import re
+import unittest
+
+from will.backends.generation.listener_index import AhoCorasick, ListenerIndex
+
+PATTERNS = [
+    "^How big is the db?",
+    "^SERIOUSLY. Clear (?P<key>.*)",
+    "^Show (?:me )?(?:the )?storage for (?P<key>.*)",
+    "^ping$",
+    "what time is it in (?P<place>.*)?\\?+",
+    "(?:can |will you )?remind me(?P<to_string> to)? (?P<reminder_text>.*?) (at|on|in) (?P<remind_time>.*)?\\??",
+    "^(good )?(morning?)",
+    "^(?:thanks|thank you|tx|thx|ty|tyvm)",
+    "(thanks|thank you|tx|thx|ty|tyvm),? (will|william)",
+    "\\bpugs?\\b",
+    "(!wladd)(?P<channel>.*?(?=(?:\\?)|$))",
+    "^pd maintenance (?P<service_name>[\\S+ ]+) (?P<interval>[1-9])h$",
+    "(?i)sister",
+    "(?i)ıs it",
+    ".*",
+    "",
+]
+
+MESSAGES = [
+    "how big is the db?",
+    "SERIOUSLY. Clear all",
+    "show me the storage for x",
+    "ping",
+    "PING",
+    "what time is it in Denver??",
+    "remind me to eat lunch at 12pm",
+    "good morning",
+    "mornin",
+    "thank you will",
+    "tyvm",
+    "I like pugs",
+    "!wladd general",
+    "pd maintenance web 2h",
+    u"SİSTER",
+    u"ſiſter",
+    u"IS IT",
+    u"🐶 pugs",
+    "nothing to see here",
+]
+
+
+class TestListenerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.listeners = {}
+        for p in PATTERNS:
+            self.listeners[p] = {"regex": re.compile(p)}
+            self.listeners["(?i)" + p] = {"regex": re.compile("(?i)" + p)}
+        self.index = ListenerIndex(self.listeners)
+
+    def test_never_misses_a_match(self):
+        for m in MESSAGES:
+            candidates = self.index.candidates(m)
+            for name, l in self.listeners.items():
+                if l["regex"].search(m):
+                    self.assertIn(name, candidates, "%s should be a candidate for %s" % (name, m))
+
+    def test_rules_out_listeners(self):
+        candidates = self.index.candidates("hello")
+        self.assertEqual(set([".*", "", "(?i).*", "(?i)"]), candidates)
+
+    def test_aho_corasick_finds_overlapping_words(self):
+        self.assertEqual(set(["he", "she", "hers"]), AhoCorasick(["he", "she", "his", "hers"]).search("ushers"))
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import patch
+
+from will import settings
+from will.backends.pubsub.local_pubsub import LocalPubSub
+
+
+class TestLocalPubSub(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.settings_patch = patch.multiple(
+            settings,
+            create=True,
+            SECRET_KEY="test",
+            LOCAL_PUBSUB_PATH=os.path.join(self.tmp_dir, "pubsub.sock"),
+        )
+        self.settings_patch.start()
+        self.publisher = LocalPubSub(settings)
+        self.subscriber = LocalPubSub(settings)
+
+    def tearDown(self):
+        self.settings_patch.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_wildcard_topics(self):
+        self.subscriber.subscribe("message.*")
+        self.publisher.publish_to_backend("test.message.incoming", "hello")
+        self.publisher.publish_to_backend("test.analysis.start", "not for us")
+
+        m = self.subscriber.wait_for_backend(timeout=2)
+        self.assertEqual("test.message.incoming", m["channel"])
+        self.assertEqual(b"hello", m["data"])
+        self.assertEqual(None, self.subscriber.wait_for_backend(timeout=0.1))
+
+    def test_messages_from_other_processes(self):
+        self.subscriber.subscribe("message.*")
+        pid = os.fork()
+        if pid == 0:
+            self.publisher.publish_to_backend("test.message.outgoing", "from the child")
+            time.sleep(0.2)
+            os._exit(0)
+
+        m = self.subscriber.wait_for_backend(timeout=2)
+        os.waitpid(pid, 0)
+        self.assertEqual(b"from the child", m["data"])
@@ -0,0 +1,34 @@
+import unittest
+
+from will.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_stage_timestamps(self):
+        metrics = Metrics()
+        metrics.observe_stage_timestamps({"incoming": 10.0, "analysis": 10.5, "generation": 11.0, "execution": 11.25})
+
+        self.assertEqual(0.5, metrics.stage_latencies["analysis"].total)
+        self.assertEqual(0.25, metrics.stage_latencies["execution"].total)
+        self.assertEqual(1.25, metrics.stage_latencies["total"].total)
+        self.assertNotIn("response", metrics.stage_latencies)
+
+    def test_render_prometheus(self):
+        metrics = Metrics()
+        metrics.observe_plugin('plugins.say."quoted"', 0.2)
+        metrics.increment("message.incoming")
+        output = metrics.render_prometheus()
+
+        self.assertIn('will_plugin_latency_seconds{plugin="plugins.say.\\"quoted\\"",quantile="0.5"} 0.2', output)
+        self.assertIn('will_plugin_latency_seconds_count{plugin="plugins.say.\\"quoted\\""} 1', output)
+        self.assertIn('will_events_total{event="message.incoming"} 1', output)
+
+    def test_render_generation_caches(self):
+        output = Metrics().render_prometheus(generation_caches={
+            "will.backends.generation.strict_regex": {"hits": 3, "misses": 2},
+        })
+
+        self.assertIn('will_generation_cache_hits_total{backend="will.backends.generation.strict_regex"} 3', output)
+        self.assertIn('will_generation_cache_misses_total{backend="will.backends.generation.strict_regex"} 2', output)
+        self.assertNotIn("will_generation_cache", Metrics().render_prometheus())
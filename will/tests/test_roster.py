@@ -0,0 +1,79 @@
+import pickle
+import unittest
+
+from mock import patch
+
+from will import settings
+from will.abstractions import Channel, Person
+from will.roster import Roster, slim_channel, slim_person, _rosters
+from will.tests.memory_storage import MemoryStorage
+
+
+def person(i):
+    return Person(
+        id="U%s" % i,
+        handle="person%s" % i,
+        mention_handle="<@U%s>" % i,
+        source={"id": "U%s" % i, "email": "person%s@example.com" % i, "profile": {"title": "x" * 200}},
+        name="Person %s" % i,
+        timezone="US/Eastern",
+    )
+
+
+class TestRoster(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(
+            settings, create=True, SECRET_KEY="test-secret", ENABLE_INTERNAL_ENCRYPTION=False, ROSTER_CHECK_INTERVAL=0
+        )
+        self.settings_patch.start()
+        self.storage = MemoryStorage()
+        self.people = dict([("U%s" % i, person(i)) for i in range(0, 5000)])
+        self.channels = {"C1": Channel(id="C1", name="general", source={"id": "C1"}, members=self.people)}
+
+        publisher = Roster("slack")
+        publisher.storage = self.storage
+        self.assertTrue(publisher.publish(people=self.people, channels=self.channels))
+        self.assertFalse(publisher.publish(people=self.people, channels=self.channels))
+
+        # Someone else's process.
+        _rosters.clear()
+        self.reader = Roster("slack")
+        self.reader.storage = self.storage
+        _rosters["slack"] = self.reader
+
+    def tearDown(self):
+        _rosters.clear()
+        self.settings_patch.stop()
+
+    def test_slim_payloads_resolve_from_roster(self):
+        sender = pickle.loads(pickle.dumps(slim_person(self.people["U1"], "slack"), pickle.HIGHEST_PROTOCOL))
+        channel = slim_channel(self.channels["C1"], "slack")
+        payload = pickle.dumps((sender, channel), pickle.HIGHEST_PROTOCOL)
+        self.assertLess(len(payload), 1000)
+
+        sender, channel = pickle.loads(payload)
+        self.assertEqual("person1", sender.handle)
+        self.assertEqual("US/Eastern", sender.timezone.zone)
+        self.assertEqual("person1@example.com", sender.source.email)
+        self.assertEqual("person1@example.com", sender.source["email"])
+        self.assertIn("U4999", channel.members)
+        self.assertEqual(5000, len(channel.members))
+        self.assertEqual("person2", channel.members["U2"].handle)
+
+    def test_slim_person_with_slack_timezone(self):
+        # SlackBackend._update_people sets the timezone after the Person's made, as a string.
+        slack_person = Person(id="U9", handle="slack", mention_handle="<@U9>", source={}, name="Slack Person")
+        slack_person.timezone = "America/Los_Angeles"
+        slim = slim_person(slack_person, "slack")
+        self.assertEqual("America/Los_Angeles", slim.timezone.zone)
+
+    def test_readers_pick_up_new_versions(self):
+        self.assertEqual("person1", self.reader.get("people", "U1").handle)
+
+        self.people["U1"] = Person(id="U1", handle="renamed", mention_handle="<@U1>", source={}, name="Renamed")
+        publisher = Roster("slack")
+        publisher.storage = self.storage
+        self.assertTrue(publisher.publish(people=self.people))
+
+        self.assertEqual("renamed", self.reader.get("people", "U1").handle)
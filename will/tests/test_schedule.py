@@ -0,0 +1,68 @@
+import datetime
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will.mixins import ScheduleMixin, StorageMixin
+from will.scheduler import Scheduler
+from will.tests.memory_storage import MemoryStorage
+
+
+class Schedule(ScheduleMixin, StorageMixin):
+    pass
+
+
+class TestSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, SECRET_KEY="test", ENABLE_INTERNAL_ENCRYPTION=False)
+        self.settings_patch.start()
+        self.schedule = Schedule()
+        self.schedule.storage = MemoryStorage()
+        self.now = datetime.datetime(2018, 1, 1, 12, 0)
+
+    def tearDown(self):
+        self.settings_patch.stop()
+
+    def add(self, minutes, content):
+        when = self.now + datetime.timedelta(minutes=minutes)
+        self.schedule.add_to_schedule(when, {"type": "message", "content": content})
+
+    def test_pops_only_due_tasks(self):
+        self.add(5, "later")
+        self.add(-1, "second")
+        self.add(-5, "first")
+        self.add(-3, "removed")
+        removed = [h for h, i in self.schedule.get_schedule_list().items() if i["content"] == "removed"][0]
+        self.schedule.remove_from_schedule(removed)
+
+        self.assertEqual(["first", "second"], [t["content"] for t in self.schedule.pop_due_tasks(self.now)])
+        self.assertEqual([], self.schedule.pop_due_tasks(self.now))
+        self.assertEqual(["later"], [t["content"] for t in self.schedule.get_schedule_list().values()])
+        self.assertEqual(1, len(self.schedule.get_times_list()))
+
+    def test_migrates_old_schedule(self):
+        self.schedule.save("will_schedule_list", {
+            123: {"type": "message", "content": "old", "when": self.now, "hash": 123},
+        })
+        self.schedule.save("will_schedule_times_list", {123: self.now})
+        self.schedule.migrate_schedule()
+
+        self.assertEqual(None, self.schedule.load("will_schedule_list"))
+        self.assertEqual(["old"], [t["content"] for t in self.schedule.pop_due_tasks(self.now)])
+
+    def test_one_scheduler_at_a_time(self):
+        scheduler = Scheduler()
+        scheduler.bot = self.schedule
+        scheduler.storage = self.schedule.storage
+        scheduler.last_random_schedule = datetime.datetime.now()
+        scheduler.run_action = MagicMock()
+        self.add(-1, "due")
+
+        with self.schedule.storage_lock("scheduler"):
+            scheduler.check_scheduled_actions()
+        self.assertFalse(scheduler.run_action.called)
+
+        scheduler.check_scheduled_actions()
+        self.assertEqual("due", scheduler.run_action.call_args[0][0]["content"])
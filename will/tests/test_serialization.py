@@ -0,0 +1,114 @@
+import datetime
+import unittest
+
+import dill
+from mock import patch
+from pytz import timezone
+
+from will import settings
+from will.abstractions import Event, Message, Person
+from will.mixins.encryption import EncryptionMixin, is_encoded
+from will.tests.memory_storage import MemoryStorage
+
+
+def sample_event():
+    sender = Person(
+        id="U1", handle="alice", mention_handle="<@U1>", source={}, name="Alice Smith", timezone="US/Eastern"
+    )
+    message = Message(
+        content="hi will",
+        type="message.incoming",
+        is_direct=True,
+        is_private_chat=False,
+        is_group_chat=True,
+        backend="will.backends.io_adapters.slack",
+        sender=sender,
+        will_is_mentioned=True,
+        will_said_it=False,
+        backend_supports_acl=True,
+        original_incoming_event={"type": "message", "text": "hi will", "ts": "1.2"},
+    )
+    return Event(type="message.incoming", data=message, sent_at=timezone("US/Eastern").localize(
+        datetime.datetime(2017, 11, 5, 1, 30)
+    ), tags=("a", "b"))
+
+
+class TestEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(
+            settings, create=True, SECRET_KEY="test-secret", ENABLE_INTERNAL_ENCRYPTION=False
+        )
+        self.settings_patch.start()
+        self.codec = EncryptionMixin()
+
+    def tearDown(self):
+        self.settings_patch.stop()
+
+    def assertRoundTrips(self, event):
+        decoded = self.codec.decode(self.codec.encode(event))
+        self.assertEqual(Event, type(decoded))
+        self.assertEqual(event.hash, decoded.hash)
+        self.assertEqual(("a", "b"), decoded.tags)
+        self.assertEqual(event.sent_at, decoded.sent_at)
+        self.assertEqual(event.sent_at.utcoffset(), decoded.sent_at.utcoffset())
+        self.assertEqual(Message, type(decoded.data))
+        self.assertEqual("hi will", decoded.data.content)
+        self.assertEqual("US/Eastern", decoded.data.sender.timezone.zone)
+        self.assertEqual("alice", decoded.data.sender.handle)
+        self.assertEqual("1.2", decoded.data.original_incoming_event["ts"])
+
+    def test_serializers_round_trip(self):
+        for backend in ["pickle", "msgpack", "dill"]:
+            with patch.object(settings, "SERIALIZATION_BACKEND", backend, create=True):
+                self.assertRoundTrips(sample_event())
+
+    def test_encrypted_round_trip(self):
+        with patch.object(settings, "ENABLE_INTERNAL_ENCRYPTION", True):
+            encoded = self.codec.encode(sample_event())
+            self.assertNotIn(b"hi will", encoded.encode("ascii"))
+            self.assertRoundTrips(sample_event())
+
+    def test_unpicklable_values_fall_back_to_dill(self):
+        decoded = self.codec.decode(self.codec.encode({"fn": lambda x: x * 2}))
+        self.assertEqual(4, decoded["fn"](2))
+
+    def test_binary_safe_transports_skip_base64(self):
+        self.codec.binary_safe = True
+        encoded = self.codec.encode({"a": 1})
+        self.assertTrue(encoded.startswith(b"\xffW"))
+        self.assertEqual({"a": 1}, self.codec.decode(encoded))
+
+    def test_large_values_are_compressed(self):
+        self.codec.binary_safe = True
+        people = dict([("U%s" % i, {"name": "person %s" % i, "tz": "US/Eastern"}) for i in range(0, 500)])
+        encoded = self.codec.encode(people)
+        self.assertTrue(encoded.startswith(b"\xffZz"))
+        self.assertEqual(people, self.codec.decode(encoded))
+        with patch.object(settings, "ENABLE_INTERNAL_ENCRYPTION", True):
+            self.assertEqual(people, self.codec.decode(self.codec.encode(people)))
+
+        self.assertFalse(self.codec.encode({"a": 1}).startswith(b"\xffZ"))
+
+
+class TestStorageEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(
+            settings, create=True, SECRET_KEY="test-secret", ENABLE_INTERNAL_ENCRYPTION=False
+        )
+        self.settings_patch.start()
+        self.storage = MemoryStorage()
+
+    def tearDown(self):
+        self.settings_patch.stop()
+
+    def test_values_are_pickled_once(self):
+        self.storage.save("help_modules", {"Other": ["help"]})
+        self.assertTrue(is_encoded(self.storage.values["help_modules"]))
+        self.assertEqual({"Other": ["help"]}, self.storage.load("help_modules"))
+
+    def test_loads_values_saved_by_older_versions(self):
+        # StorageMixin used to dill values itself, before the backend encrypted them.
+        self.storage.values["help_modules"] = self.storage.encrypt(dill.dumps({"Other": ["help"]}))
+        self.assertEqual({"Other": ["help"]}, self.storage.load("help_modules"))
@@ -0,0 +1,36 @@
+import unittest
+
+from mock import patch
+
+from will import settings
+from will.mixins import StorageMixin
+from will.mixins import slackwhitelist
+from will.tests.memory_storage import MemoryStorage
+
+
+class TestWhitelistMigrate(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, SECRET_KEY="test", ENABLE_INTERNAL_ENCRYPTION=False)
+        self.settings_patch.start()
+        slackwhitelist._migrated = False
+        self.will = StorageMixin()
+        self.will.storage = MemoryStorage()
+        self.will.save("whitelist", ["C1", "C2"])
+
+    def tearDown(self):
+        slackwhitelist._migrated = False
+        self.settings_patch.stop()
+
+    def test_moves_the_old_whitelist(self):
+        self.assertEqual(set(["C1", "C2"]), slackwhitelist.whitelist_channels(self.will))
+        self.assertEqual(None, self.will.load("whitelist"))
+
+    def test_keeps_the_old_whitelist_if_the_move_fails(self):
+        with patch.object(self.will.storage, "set_add", side_effect=Exception("down")):
+            slackwhitelist.whitelist_migrate(self.will)
+        self.assertEqual(["C1", "C2"], self.will.load("whitelist"))
+
+        # And tries again next time.
+        self.assertEqual(set(["C1", "C2"]), slackwhitelist.whitelist_channels(self.will))
+        self.assertEqual(None, self.will.load("whitelist"))
@@ -0,0 +1,120 @@
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will import storage_cache
+from will.mixins import StorageMixin
+from will.storage_cache import StorageCache
+from will.tests.memory_storage import MemoryStorage
+
+
+class TestStorageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, SECRET_KEY="test", ENABLE_INTERNAL_ENCRYPTION=False)
+        self.settings_patch.start()
+        self.cache = StorageCache({"help_modules": 60, "slack_*": 60}, 2)
+        self.cache.publisher = MagicMock()
+        self.cache.start_listener = MagicMock()
+        self.cache.subscribed.set()
+        self.cache_patch = patch.object(storage_cache, "get_storage_cache", return_value=self.cache)
+        self.cache_patch.start()
+
+    def tearDown(self):
+        self.cache_patch.stop()
+        self.settings_patch.stop()
+
+    def test_only_listed_keys(self):
+        self.assertEqual(60, self.cache.ttl("slack_channel_cache"))
+        self.assertEqual(None, self.cache.ttl("scheduler_lock"))
+        self.cache.put("scheduler_lock", True, self.cache.generation("scheduler_lock"))
+        self.assertEqual((False, None), self.cache.get("scheduler_lock"))
+
+    def test_expires(self):
+        with patch("will.storage_cache.time.time", return_value=1000):
+            self.cache.put("help_modules", {"a": 1}, self.cache.generation("help_modules"))
+            self.assertEqual((True, {"a": 1}), self.cache.get("help_modules"))
+        with patch("will.storage_cache.time.time", return_value=1061):
+            self.assertEqual((False, None), self.cache.get("help_modules"))
+
+    def test_least_recently_used_go_first(self):
+        for key in ["slack_a", "slack_b"]:
+            self.cache.put(key, key, self.cache.generation(key))
+        self.cache.get("slack_a")
+        self.cache.put("slack_c", "slack_c", self.cache.generation("slack_c"))
+        self.assertTrue(self.cache.get("slack_a")[0])
+        self.assertFalse(self.cache.get("slack_b")[0])
+        self.assertTrue(self.cache.get("slack_c")[0])
+
+    def test_load_that_raced_a_save_is_not_kept(self):
+        generation = self.cache.generation("help_modules")
+        self.cache.forget("help_modules")
+        self.cache.put("help_modules", "stale", generation)
+        self.assertEqual((False, None), self.cache.get("help_modules"))
+
+        generation = self.cache.generation("slack_a")
+        self.cache.forget()
+        self.cache.put("slack_a", "stale", generation)
+        self.assertEqual((False, None), self.cache.get("slack_a"))
+
+    def test_mixin_loads_through_the_cache(self):
+        mixin = StorageMixin()
+        mixin.storage = MagicMock(wraps=MemoryStorage())
+        mixin.save("help_modules", {"a": 1})
+        self.cache.publisher.publish.assert_called_once_with(storage_cache.INVALIDATE_TOPIC, "help_modules")
+
+        self.assertEqual({"a": 1}, mixin.load("help_modules"))
+        self.assertEqual({"a": 1}, mixin.load("help_modules"))
+        self.assertEqual(1, mixin.storage.load.call_count)
+
+        mixin.save("help_modules", {"a": 2})
+        self.assertEqual({"a": 2}, mixin.load("help_modules"))
+        self.assertEqual(2, mixin.storage.load.call_count)
+
+        # Keys that aren't listed always go to storage, and saving them doesn't publish.
+        mixin.save("other", 1)
+        mixin.load("other")
+        mixin.load("other")
+        self.assertEqual(4, mixin.storage.load.call_count)
+        self.assertEqual(2, self.cache.publisher.publish.call_count)
+
+    def test_mixin_load_many(self):
+        mixin = StorageMixin()
+        mixin.storage = MagicMock(wraps=MemoryStorage())
+        mixin.save_many({"help_modules": {"a": 1}, "other": 1})
+        self.assertEqual(1, self.cache.publisher.publish.call_count)
+
+        mixin.load("help_modules")
+        self.assertEqual(
+            {"help_modules": {"a": 1}, "other": 1, "missing": "default"},
+            mixin.load_many(["help_modules", "other", "missing"], "default")
+        )
+        mixin.storage.load_many.assert_called_once_with(["other", "missing"])
+
+    def test_mixin_load_many_defaults_arent_shared(self):
+        mixin = StorageMixin()
+        mixin.storage = MemoryStorage()
+        loaded = mixin.load_many(["a", "b"], {})
+        loaded["a"]["task"] = 1
+        self.assertEqual({}, loaded["b"])
+
+    def test_nothing_cached_until_the_listener_subscribes(self):
+        cache = StorageCache({"help_modules": 60}, 2)
+        cache.start_listener = MagicMock()
+        generation = cache.generation("help_modules")
+        cache.put("help_modules", "value", generation)
+        self.assertEqual((False, None), cache.get("help_modules"))
+
+        # A load that started before the subscription might have missed an invalidation.
+        listener = MagicMock()
+        listener.pubsub.iter_messages.return_value = []
+        with patch.object(storage_cache, "PubSubMixin", return_value=listener):
+            cache.listen()
+        listener.subscribe.assert_called_once_with(storage_cache.INVALIDATE_TOPIC)
+        self.assertTrue(cache.subscribed.is_set())
+        cache.put("help_modules", "stale", generation)
+        self.assertEqual((False, None), cache.get("help_modules"))
+
+        cache.put("help_modules", "value", cache.generation("help_modules"))
+        self.assertEqual((True, "value"), cache.get("help_modules"))
@@ -0,0 +1,191 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import MagicMock, patch
+
+from will import settings
+from will.backends.storage.file_backend import FileStorage
+from will.backends.storage.sqlite_backend import SQLiteStorage
+from will.utils import sizeof_fmt
+from will.tests.memory_storage import MemoryStorage
+
+
+class StorageOpsTests(object):
+
+    def setUp(self):
+        self.settings_patch = patch.multiple(settings, create=True, SECRET_KEY="test", ENABLE_INTERNAL_ENCRYPTION=False)
+        self.settings_patch.start()
+        self.storage = self.make_storage()
+
+    def tearDown(self):
+        self.settings_patch.stop()
+
+    def test_lists(self):
+        for i in range(0, 5):
+            self.assertEqual(i + 1, self.storage.list_push("l", {"n": i}))
+        self.assertEqual([{"n": 3}, {"n": 4}], self.storage.list_range("l", -2, -1))
+        self.storage.list_trim("l", 1, 2)
+        self.assertEqual([{"n": 1}, {"n": 2}], self.storage.list_range("l"))
+        self.assertEqual([], self.storage.list_range("missing"))
+
+    def test_hashes(self):
+        self.storage.hash_set("h", "steven", {"info": "555-1234"})
+        self.storage.hash_set("h", "greg", {"info": "555-9876"})
+        self.storage.hash_set("h", "steven", {"info": "555-0000"})
+        self.assertEqual({"info": "555-0000"}, self.storage.hash_get("h", "steven"))
+        self.assertEqual("none", self.storage.hash_get("h", "nobody", "none"))
+        self.storage.hash_delete("h", "greg")
+        self.assertEqual({"steven": {"info": "555-0000"}}, self.storage.hash_all("h"))
+
+    def test_sets(self):
+        for c in ["C1", "C2", "C1"]:
+            self.storage.set_add("s", c)
+        self.storage.set_remove("s", "C2")
+        self.storage.set_remove("s", "C3")
+        self.assertEqual(set(["C1"]), self.storage.set_members("s"))
+        self.assertTrue(self.storage.set_contains("s", "C1"))
+        self.assertFalse(self.storage.set_contains("s", "C2"))
+
+    def test_sorted_sets(self):
+        self.storage.zset_add("z", "b", 20)
+        self.storage.zset_add("z", "a", 10)
+        self.storage.zset_add("z", "c", 30)
+        self.storage.zset_add("z", "d", 5)
+        self.storage.zset_add("z", "d", 40)
+        self.storage.zset_remove("z", "c")
+        self.storage.zset_remove("z", "missing")
+        self.assertEqual([("a", 10), ("b", 20), ("d", 40)], self.storage.zset_range_by_score("z"))
+        self.assertEqual([("b", 20)], self.storage.zset_range_by_score("z", 15, 25))
+        self.assertEqual([("a", 10), ("b", 20)], self.storage.zset_pop_by_score("z", 20))
+        self.assertEqual([], self.storage.zset_pop_by_score("z", 20))
+        self.assertEqual([("d", 40)], self.storage.zset_range_by_score("z"))
+        self.storage.clear("z")
+        self.assertEqual([], self.storage.zset_range_by_score("z"))
+
+    def test_locks(self):
+        with self.storage.lock("l", 10) as token:
+            self.assertEqual(1, token)
+            with self.storage.lock("l", 10) as other:
+                self.assertEqual(None, other)
+            self.storage.release_lock("l", 99)
+            self.assertEqual(None, self.storage.acquire_lock("l", 10))
+        self.assertEqual(2, self.storage.acquire_lock("l", 10))
+
+        # Whoever held it died.
+        with patch("will.backends.storage.base.time.time", return_value=time.time() + 11):
+            self.assertEqual(3, self.storage.acquire_lock("l", 10))
+        self.storage.release_lock("l", 2)
+        self.assertEqual(None, self.storage.acquire_lock("l", 10))
+
+    def test_counters(self):
+        self.assertEqual(0, self.storage.incr("c", 0))
+        self.assertEqual(2, self.storage.incr("c", 2))
+        self.assertEqual(1, self.storage.incr("c", -1))
+
+    def test_many(self):
+        self.storage.save_many({"a": {"n": 1}, "b": [2]})
+        self.storage.save("c", "three")
+        self.assertEqual(
+            {"a": {"n": 1}, "b": [2], "c": "three", "missing": None},
+            self.storage.load_many(["a", "b", "c", "missing"])
+        )
+        self.assertEqual({}, self.storage.load_many([]))
+
+
+class TestBaseStorageOps(StorageOpsTests, unittest.TestCase):
+
+    def make_storage(self):
+        return MemoryStorage()
+
+    def test_pop_with_nothing_due_doesnt_write(self):
+        self.storage.zset_add("z", "a", 10)
+        with patch.object(self.storage, "do_save") as do_save:
+            self.assertEqual([], self.storage.zset_pop_by_score("z", 5))
+            self.assertFalse(do_save.called)
+
+
+class TestFileStorageOps(StorageOpsTests, unittest.TestCase):
+
+    def make_storage(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        file_dir = "%s/will" % self.dirname
+        settings_patch = patch.multiple(settings, create=True, FILE_DIR=file_dir)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+        return FileStorage(MagicMock(FILE_DIR=file_dir))
+
+    def test_size(self):
+        self.storage.save("a", "x" * 100)
+        self.storage.save("b", "x" * 50, expire=10)
+        self.storage.save("a", "x" * 10)
+        self.storage.clear("missing")
+        self.assertEqual("%s in 2 keys" % sizeof_fmt(self.bytes_on_disk()), self.storage.size())
+        self.storage.clear("b")
+        self.assertEqual("%s in 1 keys" % sizeof_fmt(self.bytes_on_disk()), self.storage.size())
+
+        # Older Wills didn't keep count.
+        os.unlink(os.path.join(self.storage.dirname, ".will_size"))
+        self.assertEqual("%s in 1 keys" % sizeof_fmt(self.bytes_on_disk()), self.storage.size())
+
+    def bytes_on_disk(self):
+        return sum([
+            os.path.getsize(os.path.join(self.storage.dirname, f))
+            for f in os.listdir(self.storage.dirname) if not f.startswith(".")
+        ])
+
+    def test_sweep_expired(self):
+        for key in ["a", "b", "c"]:
+            self.storage.save(key, key, expire=10)
+        self.storage.save("b", "b")
+        self.storage.save("d", "d")
+        os.unlink(os.path.join(self.storage.dirname, ".will_expiry"))
+
+        with patch("will.backends.storage.file_backend.time.time", return_value=time.time() + 11):
+            self.assertEqual(1, self.storage.sweep_expired(limit=1))
+            self.assertEqual(1, self.storage.sweep_expired())
+            self.assertEqual(0, self.storage.sweep_expired())
+        self.assertEqual(["b", "d"], sorted([
+            f for f in os.listdir(self.storage.dirname) if not f.startswith(".")
+        ]))
+        self.assertEqual("%s in 2 keys" % sizeof_fmt(self.bytes_on_disk()), self.storage.size())
+
+
+class TestSQLiteStorageOps(StorageOpsTests, unittest.TestCase):
+
+    def make_storage(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        sqlite_file = "%s/will/will.sqlite3" % self.dirname
+        settings_patch = patch.multiple(settings, create=True, SQLITE_FILE=sqlite_file)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+        return SQLiteStorage(MagicMock(SQLITE_FILE=sqlite_file))
+
+    def test_expiry(self):
+        self.storage.save("a", "soon", expire=10)
+        self.storage.save_many({"b": "soon", "c": "later"}, expire=10)
+        self.storage.save("c", "never")
+        self.assertEqual("soon", self.storage.load("a"))
+        with patch("will.backends.storage.sqlite_backend.time.time", return_value=time.time() + 11):
+            self.assertEqual(None, self.storage.load("a"))
+            self.assertEqual({"a": None, "b": None, "c": "never"}, self.storage.load_many(["a", "b", "c"]))
+            self.storage.save("d", "now", expire=10)
+            self.assertEqual(1, self.storage.sweep_expired(limit=1))
+            self.assertEqual(1, self.storage.sweep_expired())
+            self.assertEqual(0, self.storage.sweep_expired())
+        rows = self.storage.connection.execute("SELECT key FROM storage ORDER BY key").fetchall()
+        self.assertEqual(["c", "d"], [r[0] for r in rows])
+
+    def test_failed_update_changes_nothing(self):
+        self.storage.save("a", [1])
+
+        def fail(values):
+            self.storage.save("b", "inside")
+            raise ValueError()
+
+        self.assertRaises(ValueError, self.storage.update, "a", fail)
+        self.assertEqual({"a": [1], "b": None}, self.storage.load_many(["a", "b"]))
@@ -0,0 +1,29 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from will.utils import load_plugin_module
+
+
+class TestLoadPluginModule(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "cached_plugin.py")
+        with open(self.path, "w") as f:
+            f.write("VALUE = 1\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_reuses_module_until_file_changes(self):
+        module = load_plugin_module("cached_plugin", self.path)
+        self.assertIs(module, load_plugin_module("cached_plugin", self.path))
+
+        with open(self.path, "w") as f:
+            f.write("VALUE = 2\n")
+        mtime = os.path.getmtime(self.path) + 10
+        os.utime(self.path, (mtime, mtime))
+
+        self.assertEqual(2, load_plugin_module("cached_plugin", self.path).VALUE)
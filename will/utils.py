@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+import imp
+import os
+import threading
+
 from clint.textui import puts, colored
 from six.moves import html_parser
 
@@ -48,6 +52,59 @@ def clean_for_pickling(d):
     return cleaned_obj
 
 
+# Plugin modules we've already loaded, keyed by path: (mtime, module)
+_plugin_module_cache = {}
+_plugin_module_lock = threading.Lock()
+
+
+def load_plugin_module(name, path):
+    """
+    Like imp.load_source, but only re-runs the file if it's changed since we last loaded it.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    cached = _plugin_module_cache.get(path, None)
+    if cached and mtime is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _plugin_module_lock:
+        cached = _plugin_module_cache.get(path, None)
+        if cached and mtime is not None and cached[0] == mtime:
+            return cached[1]
+        module = imp.load_source(name, path)
+        _plugin_module_cache[path] = (mtime, module)
+    return module
+
+
+class ThreadProcess(threading.Thread):
+    """
+    A daemon thread with enough of multiprocessing.Process' interface to stand in for one.
+    Threads can't be killed, so terminate() does nothing - they go when the process does.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ThreadProcess, self).__init__(*args, **kwargs)
+        self.daemon = True
+
+    def terminate(self):
+        pass
+
+
+def spawn(target, args=(), kwargs=None):
+    """
+    Returns an unstarted multiprocessing.Process for target, or a ThreadProcess when
+    running under ENGINE = "asyncio", where everything shares one process.
+    """
+    from multiprocessing import Process
+    from will import settings
+    if getattr(settings, "ENGINE", "processes") == "asyncio":
+        return ThreadProcess(target=target, args=args, kwargs=kwargs or {})
+    return Process(target=target, args=args, kwargs=kwargs or {})
+
+
 # Via http://stackoverflow.com/a/925630
 class HTMLStripper(html_parser.HTMLParser):
     def __init__(self):